@@ -24,12 +24,124 @@ MONGODB_DATABASE = os.getenv("MONGODB_DATABASE")
 # MongoDB 연결 문자열 생성
 MONGODB_URI = f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/{MONGODB_DATABASE}?authSource=admin"
 
+# MongoDB 커넥션 풀 및 타임아웃 설정
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "10000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(
+    os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000")
+)
+
 # OpenAI API 설정
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+RESPONSE_MAX_TOKENS = int(os.getenv("RESPONSE_MAX_TOKENS", "1000"))
+
+# OpenAI 게이트웨이 설정 (공유 커넥션 풀, 엔드포인트별 동시 요청 수, 429 재시도)
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "50"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CHAT_CONCURRENCY = int(os.getenv("OPENAI_CHAT_CONCURRENCY", "16"))
+OPENAI_EMBEDDING_CONCURRENCY = int(os.getenv("OPENAI_EMBEDDING_CONCURRENCY", "8"))
+OPENAI_EMOTION_CONCURRENCY = int(os.getenv("OPENAI_EMOTION_CONCURRENCY", "8"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "20"))
+# OpenAI 연결 상태 점검 주기 (오프라인 상태에서는 더 자주 확인해 빠르게 복구)
+OPENAI_HEALTH_INTERVAL = float(os.getenv("OPENAI_HEALTH_INTERVAL", "60"))
+OPENAI_HEALTH_RETRY_INTERVAL = float(os.getenv("OPENAI_HEALTH_RETRY_INTERVAL", "10"))
+OPENAI_HEALTH_TIMEOUT = float(os.getenv("OPENAI_HEALTH_TIMEOUT", "5"))
+
+# 프롬프트 토큰 예산 (시스템 프롬프트 + RAG 컨텍스트 + 대화 기록 + 현재 메시지)
+# 기본값은 gpt-3.5-turbo 컨텍스트(16k)에서 응답 토큰을 뺀 값보다 작게 잡아 비용을 제한
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "800"))
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "20000"))
 
 # 벡터 저장소 경로
 VECTOR_STORE_PATH = os.environ.get("VECTOR_STORE_PATH")
 
+# 벡터 저장소 저장 방식 ("incremental": append-only 로그 + 주기적 스냅샷, "full": 매번 전체 저장)
+VECTOR_STORE_PERSIST_MODE = os.getenv("VECTOR_STORE_PERSIST_MODE", "incremental")
+VECTOR_LOG_FSYNC_BATCH = int(os.getenv("VECTOR_LOG_FSYNC_BATCH", "16"))
+VECTOR_LOG_FSYNC_INTERVAL = float(os.getenv("VECTOR_LOG_FSYNC_INTERVAL", "1.0"))
+VECTOR_SNAPSHOT_BYTES = int(os.getenv("VECTOR_SNAPSHOT_BYTES", str(64 * 1024 * 1024)))
+VECTOR_SNAPSHOT_INTERVAL = float(os.getenv("VECTOR_SNAPSHOT_INTERVAL", "600"))
+
+# 문서 저장 방식 ("sqlite": FAISS id 기반 지연 로드, "pickle": LangChain 기본 index.pkl)
+VECTOR_STORE_DOCSTORE = os.getenv("VECTOR_STORE_DOCSTORE", "sqlite")
+
+# 벡터 인덱스 종류 ("flat": 정확한 검색, "ivf": IVF-Flat, "hnsw": HNSW 그래프)
+# IVF는 학습 전까지 Flat으로 동작하며 init_vector_store.py rebuild로 중심점을 학습
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+VECTOR_IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "1024"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "16"))
+VECTOR_IVF_TRAIN_SIZE = int(os.getenv("VECTOR_IVF_TRAIN_SIZE", "100000"))
+VECTOR_HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+VECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "200"))
+VECTOR_HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+# 사용자 지정 검색에서 사용자 벡터가 이 개수 이상이면 IVF/HNSW 인덱스를 IDSelector로 사용
+# (미만이면 사용자 벡터만 brute-force로 정확히 계산)
+VECTOR_PARTITION_ANN_MIN_SIZE = int(os.getenv("VECTOR_PARTITION_ANN_MIN_SIZE", "4096"))
+
+# 벡터 양자화 ("none", "fp16", "sq8", "pq") - sq8/pq는 학습이 필요하므로 migrate_index.py로 전환
+VECTOR_INDEX_QUANTIZATION = os.getenv("VECTOR_INDEX_QUANTIZATION", "none")
+VECTOR_PQ_M = int(os.getenv("VECTOR_PQ_M", "64"))
+# 양자화 인덱스에서 k * 배수만큼 후보를 뽑아 임베딩 캐시의 원본 벡터로 재정렬 (1 이하면 비활성)
+VECTOR_RERANK_FACTOR = int(os.getenv("VECTOR_RERANK_FACTOR", "4"))
+
+# 삽입 전 중복 제거 (같은 사용자의 동일 텍스트는 항상 제외, 코사인 유사도가 임계값 이상인
+# 근접 중복은 임계값이 0보다 클 때만 제외)
+VECTOR_DEDUP_ENABLED = os.getenv("VECTOR_DEDUP_ENABLED", "true").lower() == "true"
+VECTOR_DEDUP_COSINE = float(os.getenv("VECTOR_DEDUP_COSINE", "0"))
+
+# 벡터 인덱스 공유 설정 (mmap 로드 시 여러 워커가 페이지 캐시를 공유)
+VECTOR_STORE_MMAP = os.getenv("VECTOR_STORE_MMAP", "false").lower() == "true"
+VECTOR_STORE_RELOAD_INTERVAL = float(os.getenv("VECTOR_STORE_RELOAD_INTERVAL", "30"))
+# 저장소 쓰기는 writer.lock을 잡은 워커 하나만 수행 ("auto": 잠금을 잡으면 쓰기 워커,
+# "reader": 항상 읽기 전용). 나머지 워커는 새 문서를 inbox에 넣고 쓰기 워커가 반영
+VECTOR_STORE_ROLE = os.getenv("VECTOR_STORE_ROLE", "auto")
+VECTOR_INBOX_POLL_INTERVAL = float(os.getenv("VECTOR_INBOX_POLL_INTERVAL", "2"))
+
+# 임베딩 설정 (캐시 키에 모델 이름이 포함됨)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache")
+
+# 감정 분석 설정 (로컬 분류기 신뢰도가 임계값 미만일 때만 LLM 호출)
+EMOTION_LOCAL_CONFIDENCE = float(os.getenv("EMOTION_LOCAL_CONFIDENCE", "0.7"))
+EMOTION_CACHE_SIZE = int(os.getenv("EMOTION_CACHE_SIZE", "5000"))
+EMOTION_CACHE_TTL = float(os.getenv("EMOTION_CACHE_TTL", "600"))
+# LLM 감정 분석 마이크로 배칭 (대기 시간 동안 모인 메시지를 한 번의 JSON 요청으로 분류)
+EMOTION_BATCH_ENABLED = os.getenv("EMOTION_BATCH_ENABLED", "true").lower() == "true"
+EMOTION_BATCH_MAX_SIZE = int(os.getenv("EMOTION_BATCH_MAX_SIZE", "16"))
+EMOTION_BATCH_MAX_WAIT_MS = float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "5"))
+
+# 의미 기반 응답 캐시 (중립/저강도 짧은 메시지만, 기본 비활성)
+# 범위 "user"는 사용자별로만 재사용하며, "global"은 대화 기록/RAG 컨텍스트가 응답에
+# 섞이지 않는 배포에서만 사용
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+RESPONSE_CACHE_MAX_INTENSITY = int(os.getenv("RESPONSE_CACHE_MAX_INTENSITY", "3"))
+RESPONSE_CACHE_MAX_CHARS = int(os.getenv("RESPONSE_CACHE_MAX_CHARS", "40"))
+RESPONSE_CACHE_SCOPE = os.getenv("RESPONSE_CACHE_SCOPE", "user")
+
+# /chat-stream SSE 설정 (토큰 합치기 기준과 이어받기용 버퍼)
+SSE_FLUSH_INTERVAL_MS = float(os.getenv("SSE_FLUSH_INTERVAL_MS", "50"))
+SSE_FLUSH_BYTES = int(os.getenv("SSE_FLUSH_BYTES", "512"))
+SSE_RESUME_BUFFER_SIZE = int(os.getenv("SSE_RESUME_BUFFER_SIZE", "256"))
+SSE_RESUME_TTL = float(os.getenv("SSE_RESUME_TTL", "300"))
+SSE_RESUME_GRACE = float(os.getenv("SSE_RESUME_GRACE", "10"))
+
+# 응답 후 저장 작업(write-behind) 설정
+PERSIST_QUEUE_SIZE = int(os.getenv("PERSIST_QUEUE_SIZE", "1000"))
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "32"))
+PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "0.5"))
+PERSIST_SHUTDOWN_TIMEOUT = float(os.getenv("PERSIST_SHUTDOWN_TIMEOUT", "30"))
+
 # 애플리케이션 설정
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = int(os.getenv("APP_PORT", "8000"))
@@ -0,0 +1,35 @@
+from fastapi import Request
+
+from app.services.chat_history import ChatHistoryService
+from app.services.health import OpenAIHealthProber
+from app.services.persistence_worker import PersistenceWorker
+from app.services.response_cache import SemanticResponseCache
+from app.services.sse import SSEStreamRegistry
+from app.services.vector_store import VectorStoreService
+
+# 무거운 리소스는 앱 lifespan에서 만들어 app.state에 보관하고,
+# 라우터는 아래 의존성으로만 접근한다 (모듈 임포트 시 연결/네트워크 호출 없음)
+
+
+def get_chat_history_service(request: Request) -> ChatHistoryService:
+    return request.app.state.chat_history_service
+
+
+def get_vector_store_service(request: Request) -> VectorStoreService:
+    return request.app.state.vector_store_service
+
+
+def get_persistence_worker(request: Request) -> PersistenceWorker:
+    return request.app.state.persistence_worker
+
+
+def get_health_prober(request: Request) -> OpenAIHealthProber:
+    return request.app.state.health_prober
+
+
+def get_response_cache(request: Request) -> SemanticResponseCache:
+    return request.app.state.response_cache
+
+
+def get_sse_streams(request: Request) -> SSEStreamRegistry:
+    return request.app.state.sse_streams
@@ -0,0 +1,326 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Prometheus 텍스트 노출 형식(0.0.4)의 최소 구현
+# 외부 의존성 없이 카운터/게이지/히스토그램만 지원한다.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+    suffix = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        """라벨 값에 해당하는 자식 시계열 반환"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name}: 라벨 개수가 맞지 않습니다")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _series(self):
+        """(라벨 튜플, 자식) 목록 (라벨이 없으면 자기 자신)"""
+        if not self.labelnames:
+            return [((), self)]
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        family = self.name + self.suffix
+        lines = [
+            f"# HELP {family} {self.documentation}",
+            f"# TYPE {family} {self.kind}",
+        ]
+        for values, child in self._series():
+            labels = list(zip(self.labelnames, values))
+            lines.extend(child._samples(family, labels))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+    suffix = "_total"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._value = 0.0
+
+    def _new_child(self):
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def _samples(self, name, labels):
+        return [f"{name}{_format_labels(labels)} {_format_value(self._value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._value = 0.0
+
+    def _new_child(self):
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    @contextmanager
+    def track_inprogress(self):
+        """블록이 실행되는 동안 값을 1 증가"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def _samples(self, name, labels):
+        return [f"{name}{_format_labels(labels)} {_format_value(self._value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation, buckets=self.buckets[:-1])
+
+    def observe(self, value: float):
+        with self._lock:
+            self._sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        """블록 실행 시간(초)을 기록"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def _samples(self, name, labels):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            bucket_labels = labels + [("le", _format_value(bound))]
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def counter(name, documentation, labelnames=()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ---- 서비스 지표 ----
+
+EMOTION_LATENCY = histogram(
+    "serenity_emotion_analysis_seconds",
+    "감정 분석 소요 시간 (tier: 응답한 경로)",
+    ("tier",),
+)
+EMOTION_BATCH_SIZE = histogram(
+    "serenity_emotion_batch_size",
+    "LLM 감정 분석 배치당 메시지 수",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+EMOTION_BATCH_WAIT = histogram(
+    "serenity_emotion_batch_wait_seconds",
+    "감정 분석 요청이 배치 전송 전까지 대기한 시간",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+EMOTION_BATCH_FALLBACKS = counter(
+    "serenity_emotion_batch_fallbacks",
+    "배치 결과가 누락/형식 오류여서 단건으로 다시 분석한 메시지 수",
+)
+PIPELINE_STAGE_LATENCY = histogram(
+    "serenity_pipeline_stage_seconds",
+    "채팅 요청 파이프라인 단계별 소요 시간",
+    ("stage",),
+)
+MONGO_LATENCY = histogram(
+    "serenity_mongo_operation_seconds",
+    "MongoDB 작업 소요 시간",
+    ("operation", "kind"),
+)
+FAISS_SEARCH_LATENCY = histogram(
+    "serenity_faiss_search_seconds",
+    "벡터 검색 소요 시간 (질의 임베딩 제외)",
+    ("scope",),
+)
+FAISS_SEARCH_HITS = histogram(
+    "serenity_faiss_search_hits",
+    "벡터 검색 결과 문서 수",
+    ("scope",),
+    buckets=(0, 1, 2, 3, 5, 10, 20),
+)
+EMBEDDING_LATENCY = histogram(
+    "serenity_embedding_seconds",
+    "임베딩 API 요청 소요 시간 (캐시 미스만)",
+)
+EMBEDDING_TEXTS = counter(
+    "serenity_embedding_texts",
+    "임베딩 요청 텍스트 수 (result: cache_hit / api)",
+    ("result",),
+)
+LLM_TTFT = histogram(
+    "serenity_llm_time_to_first_token_seconds",
+    "요청 수신부터 첫 토큰 전송까지 걸린 시간",
+    ("endpoint",),
+)
+LLM_GENERATION = histogram(
+    "serenity_llm_generation_seconds",
+    "LLM 응답 생성 전체 시간",
+    ("endpoint",),
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+SNAPSHOT_LATENCY = histogram(
+    "serenity_vector_snapshot_seconds",
+    "벡터 저장소 스냅샷(save_local) 소요 시간",
+)
+VECTOR_INDEX_SIZE = gauge(
+    "serenity_vector_index_vectors",
+    "벡터 인덱스에 저장된 벡터 수",
+)
+VECTOR_DEDUP_SKIPPED = counter(
+    "serenity_vector_dedup_skipped",
+    "중복으로 판단되어 벡터 저장소에 추가하지 않은 텍스트 수 (reason: exact / near)",
+    ("reason",),
+)
+VECTOR_SNAPSHOT_SIZE = gauge(
+    "serenity_vector_snapshot_bytes",
+    "마지막 스냅샷의 index.faiss 파일 크기",
+)
+RESPONSE_CACHE_REQUESTS = counter(
+    "serenity_response_cache_requests",
+    "의미 기반 응답 캐시 조회 수 (result: hit / miss / skip)",
+    ("result",),
+)
+SSE_STREAMS_IN_FLIGHT = gauge(
+    "serenity_sse_streams_in_flight",
+    "진행 중인 SSE 스트림 수",
+)
+OPENAI_IN_FLIGHT = gauge(
+    "serenity_openai_requests_in_flight",
+    "OpenAI 게이트웨이에서 실행 중인 요청 수",
+    ("endpoint",),
+)
+OPENAI_WAITING = gauge(
+    "serenity_openai_requests_waiting",
+    "OpenAI 게이트웨이 동시성 제한으로 대기 중인 요청 수",
+    ("endpoint",),
+)
@@ -1,16 +1,33 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from app.core.config import APP_HOST, APP_PORT
+from app.core import metrics
+from app.core.config import (APP_HOST, APP_PORT, RESPONSE_CACHE_ENABLED,
+                             RESPONSE_CACHE_MAX_CHARS,
+                             RESPONSE_CACHE_MAX_INTENSITY,
+                             RESPONSE_CACHE_SCOPE, RESPONSE_CACHE_SIMILARITY,
+                             RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL,
+                             SSE_RESUME_BUFFER_SIZE, SSE_RESUME_GRACE,
+                             SSE_RESUME_TTL)
 from app.routes.chat import router as chat_router
 from app.routes.debug import router as debug_router
+from app.services.chat_history import ChatHistoryService
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.health import OpenAIHealthProber
+from app.services.openai_gateway import openai_gateway
+from app.services.persistence_worker import PersistenceWorker
+from app.services.response_cache import SemanticResponseCache
+from app.services.sse import SSEStreamRegistry
+from app.services.vector_store_registry import vector_store_registry
 
 # 환경 변수 로드
 load_dotenv()
@@ -21,8 +38,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+async def warm_up(app: FastAPI):
+    """인덱스 확인과 벡터 저장소 로드 (서버가 요청을 받기 시작한 뒤 백그라운드로 실행)"""
+    await app.state.chat_history_service.ensure_indexes()
+    # 임베딩 디스크 캐시의 키 파일은 클 수 있으므로 이벤트 루프 밖에서 읽음
+    embeddings = app.state.vector_store_service.embeddings
+    try:
+        if isinstance(embeddings, CachedEmbeddings):
+            await asyncio.to_thread(embeddings.load)
+        # 스냅샷 로드 후 증분 로그 재생 (디스크 I/O이므로 스레드에서 실행)
+        await asyncio.to_thread(vector_store_registry.load)
+    finally:
+        # 로드가 끝난 뒤에야 저장 워커가 벡터 색인을 시작 (실패 시 추가 요청이 로드를 다시 시도)
+        app.state.persistence_worker.mark_vector_store_loaded()
+    vector_store_registry.start_watching()
+    app.state.warmed_up = True
+    logger.info("애플리케이션 준비 완료")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """애플리케이션 시작/종료 시 리소스 관리
+
+    모듈 임포트 시에는 연결이나 네트워크 호출을 하지 않고, 여기서 리소스를 만들어
+    app.state에 보관한다 (라우터는 app.core.dependencies로 접근).
+    """
+    chat_history_service = ChatHistoryService()
+    vector_store_service = vector_store_registry.get()
+    persistence_worker = PersistenceWorker(chat_history_service, vector_store_service)
+    health_prober = OpenAIHealthProber(openai_gateway)
+
+    app.state.chat_history_service = chat_history_service
+    app.state.vector_store_service = vector_store_service
+    app.state.persistence_worker = persistence_worker
+    app.state.health_prober = health_prober
+    app.state.response_cache = SemanticResponseCache(
+        enabled=RESPONSE_CACHE_ENABLED,
+        maxsize=RESPONSE_CACHE_SIZE,
+        ttl=RESPONSE_CACHE_TTL,
+        threshold=RESPONSE_CACHE_SIMILARITY,
+        max_intensity=RESPONSE_CACHE_MAX_INTENSITY,
+        max_chars=RESPONSE_CACHE_MAX_CHARS,
+        scope=RESPONSE_CACHE_SCOPE,
+    )
+    app.state.sse_streams = SSEStreamRegistry(
+        maxsize=SSE_RESUME_BUFFER_SIZE, ttl=SSE_RESUME_TTL, grace=SSE_RESUME_GRACE
+    )
+    app.state.warmed_up = False
+
+    persistence_worker.start()
+    health_prober.start()
+    warm_up_task = asyncio.create_task(warm_up(app))
+    yield
+    if not warm_up_task.done():
+        warm_up_task.cancel()
+    await health_prober.stop()
+    # 대기 중인 저장 작업을 모두 처리한 뒤 종료
+    await persistence_worker.stop()
+    await vector_store_registry.stop_watching()
+    # 종료 시 남은 벡터 로그 fsync
+    vector_store_registry.close()
+    # 종료 시 MongoDB 커넥션 풀 정리
+    await chat_history_service.close()
+    logger.info("MongoDB 클라이언트 종료")
+    # OpenAI 커넥션 풀 정리
+    openai_gateway.close()
+
+
 # FastAPI 앱 초기화
-app = FastAPI(title="Serenity API")
+app = FastAPI(title="Serenity API", lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -66,6 +151,38 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """요청을 처리할 준비가 되었는지 확인 (OpenAI가 오프라인이어도 오프라인 모드로 응답 가능)
+
+    OpenAI 상태 첫 확인이 끝나기 전에는 프로버가 오프라인으로 취급해 요청이 오프라인
+    응답을 받으므로, 첫 확인 결과가 나올 때까지는 준비되지 않은 것으로 본다.
+    """
+    state = request.app.state
+    mongo_ok = await state.chat_history_service.ping()
+    openai_checked = state.health_prober.checked_at is not None
+    ready = state.warmed_up and mongo_ok and openai_checked
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "warmed_up": state.warmed_up,
+        "mongodb": mongo_ok,
+        "openai_checked": openai_checked,
+        "vector_store_loaded": state.vector_store_service.vector_store is not None,
+        "openai": state.health_prober.status(),
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 텍스트 형식 지표"""
+    # 게이트웨이 대기열 깊이는 수집 시점의 값으로 갱신
+    for endpoint, stats in openai_gateway.stats()["endpoints"].items():
+        metrics.OPENAI_IN_FLIGHT.labels(endpoint=endpoint).set(stats["in_flight"])
+        metrics.OPENAI_WAITING.labels(endpoint=endpoint).set(stats["waiting"])
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # 서버 실행 코드
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host=APP_HOST, port=APP_PORT, reload=True)
@@ -2,3 +2,13 @@
 from .chat import ChatHistoryResponse, ChatRequest, ChatResponse, Message
 # 디버그 모델
 from .debug import DebugRequest, DebugResponse, DocumentResponse
+
+__all__ = [
+    "ChatHistoryResponse",
+    "ChatRequest",
+    "ChatResponse",
+    "Message",
+    "DebugRequest",
+    "DebugResponse",
+    "DocumentResponse",
+]
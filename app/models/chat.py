@@ -29,6 +29,7 @@ class ChatResponse(BaseModel):
     message: str
     response: str
     emotion_analysis: Optional[Dict[str, Any]] = None
+    debug: Optional[Dict[str, Any]] = None  # 단계별 소요 시간 등 디버그 정보
     timestamp: datetime = Field(default_factory=datetime.now)
 
 
@@ -38,3 +39,4 @@ class ChatHistoryResponse(BaseModel):
     user_id: str
     messages: List[Message]
     total_messages: int
+    next_before: Optional[str] = None  # 이전 페이지 조회용 커서
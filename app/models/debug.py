@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -19,6 +19,7 @@ class DebugResponse(BaseModel):
     results: List[DocumentResponse]
     success: bool
     message: str
+    index: Optional[Dict[str, Any]] = None  # 인덱스 종류(flat/ivf/hnsw)와 검색 파라미터
 
 
 class DebugRequest(BaseModel):
@@ -27,5 +28,5 @@ class DebugRequest(BaseModel):
     query: str
     user_id: Optional[str] = None
     k: Optional[int] = 3
-    reload: Optional[bool] = True
+    reload: Optional[bool] = False  # True면 스냅샷이 바뀐 경우에만 다시 로드
     score_threshold: Optional[float] = 0.3
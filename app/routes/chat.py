@@ -1,18 +1,35 @@
-import json
+import asyncio
+import datetime
 import logging
-import os
+import re
+import time
+from typing import Optional
 
-import openai
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 
+from app.core.config import (CHAT_MODEL, RESPONSE_MAX_TOKENS, SSE_FLUSH_BYTES,
+                             SSE_FLUSH_INTERVAL_MS)
+from app.core.dependencies import (get_chat_history_service, get_health_prober,
+                                   get_persistence_worker, get_response_cache,
+                                   get_sse_streams, get_vector_store_service)
+from app.core.metrics import LLM_GENERATION, LLM_TTFT, SSE_STREAMS_IN_FLIGHT
 from app.models import ChatRequest, ChatResponse, Message
 from app.models.chat import ChatHistoryResponse
 from app.services.chat_history import ChatHistoryService
 from app.services.emotion_analyzer import (analyze_emotion,
                                            generate_offline_response)
+from app.services.health import OpenAIHealthProber
+from app.services.history_export import ndjson_chunks
+from app.services.openai_gateway import openai_gateway
+from app.services.persistence_worker import ConversationTurn, PersistenceWorker
+from app.services.pipeline import Stage, run_pipeline
+from app.services.prompt_budget import assemble_messages
 from app.services.prompt_service import create_prompt_with_emotion
+from app.services.response_cache import SemanticResponseCache
+from app.services.sse import (SSE_PROTOCOL_VERSION, SSEStreamRegistry,
+                              coalesce, parse_event_id)
 from app.services.vector_store import VectorStoreService
 
 # 환경 변수 로드
@@ -24,100 +41,131 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-chat_history_service = ChatHistoryService()
-vector_store_service = VectorStoreService()
-
-# API 키 확인
-api_key = os.environ.get("OPENAI_API_KEY")
-logger.info(f"API 키 상태: {'설정됨' if api_key else '설정되지 않음'}")
-
-try:
-    client = openai.OpenAI(api_key=api_key)
-    # 테스트 API 호출로 연결 확인
-    models = client.models.list()
-    logger.info("OpenAI API 연결 성공")
-    offline_mode = False
-except Exception as e:
-    logger.warning(f"OpenAI 클라이언트 초기화 실패: {str(e)}")
-    client = None
-    offline_mode = True
-    logger.info("오프라인 모드로 전환됨")
-
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    chat_history_svc: ChatHistoryService = Depends(lambda: chat_history_service),
-    vector_store_svc: VectorStoreService = Depends(lambda: vector_store_service),
+    chat_history_svc: ChatHistoryService = Depends(get_chat_history_service),
+    vector_store_svc: VectorStoreService = Depends(get_vector_store_service),
+    persistence_worker: PersistenceWorker = Depends(get_persistence_worker),
+    health: OpenAIHealthProber = Depends(get_health_prober),
+    response_cache: SemanticResponseCache = Depends(get_response_cache),
 ):
     user_id = request.user_id
     user_message = request.message
+    # 요청 시점의 연결 상태 (백그라운드 프로버가 갱신)
+    offline_mode = health.offline
 
+    user_msg = Message(is_user=True, content=user_message)
     logger.info(f"사용자 '{user_id}'의 메시지: {user_message}")
 
-    # 감정 분석
-    emotion_analysis = await analyze_emotion(user_message)
-    logger.info(f"감정 분석 결과: {emotion_analysis}")
+    def retrieve_context(query_vector):
+        """RAG: 관련 컨텍스트 검색 (FAISS 검색은 블로킹이므로 스레드에서 실행)"""
+        if offline_mode or query_vector is None or not vector_store_svc.vector_store:
+            return ""
 
-    try:
-        # 대화 기록 가져오기
-        history = (
-            request.chat_history
-            if request.chat_history
-            else chat_history_svc.get_history(user_id)
+        logger.info("RAG: 관련 컨텍스트 검색 시작")
+        docs = vector_store_svc.search(
+            user_message,
+            user_id=user_id,
+            k=3,
+            score_threshold=0.3,  # 유사도 임계값 추가
+            query_vector=query_vector,
         )
 
-        # RAG: 관련 컨텍스트 검색
-        context = ""
-        if not offline_mode and vector_store_svc.vector_store:
-            logger.info("RAG: 관련 컨텍스트 검색 시작")
-            docs = vector_store_svc.search(
-                user_message,
-                user_id=user_id,
-                k=3,
-                score_threshold=0.3,  # 유사도 임계값 추가
-            )
-
-            if docs:
-                context = "\n\n".join([doc.page_content for doc in docs])
-                logger.info(f"RAG: {len(docs)}개의 관련 컨텍스트 검색됨")
-                for i, doc in enumerate(docs):
-                    logger.info(
-                        f"RAG: 문서 {i+1}: {doc.page_content[:50]}... (유사도: {doc.metadata.get('similarity', 'N/A')})"
-                    )
-            else:
-                logger.info("RAG: 관련 컨텍스트 없음")
-
-        # 프롬프트 구성
-        prompt = construct_prompt(user_message, history, emotion_analysis, context)
-        logger.info(f"최종 프롬프트 길이: {len(prompt)} 자")
-
-        # 응답 생성
-        response_text = generate_response(prompt)
+        if not docs:
+            logger.info("RAG: 관련 컨텍스트 없음")
+            return ""
 
-        # 채팅 기록 저장
-        user_msg = Message(is_user=True, content=user_message)
-        assistant_msg = Message(is_user=False, content=response_text)
+        logger.info(f"RAG: {len(docs)}개의 관련 컨텍스트 검색됨")
+        for i, doc in enumerate(docs):
+            logger.info(
+                f"RAG: 문서 {i+1}: {doc.page_content[:50]}... (유사도: {doc.metadata.get('similarity', 'N/A')})"
+            )
+        return "\n\n".join([doc.page_content for doc in docs])
 
-        chat_history_svc.add_message(user_id, user_msg)
-        chat_history_svc.add_message(user_id, assistant_msg)
+    try:
+        # 감정 분석, 대화 기록 조회, 질의 임베딩은 서로 독립적이므로 동시에 실행
+        # (임베딩은 한 번만 계산해 RAG 검색과 응답 캐시가 함께 사용)
+        results, timings = await run_pipeline(
+            [
+                Stage("emotion", lambda: analyze_emotion_safely(user_message)),
+                Stage("history", lambda: load_history(request, chat_history_svc)),
+                Stage(
+                    "embedding",
+                    lambda: embed_query_safely(
+                        vector_store_svc, response_cache, user_message, offline_mode
+                    ),
+                    blocking=True,
+                ),
+                Stage("rag", retrieve_context, deps=("embedding",), blocking=True),
+                Stage(
+                    "cache",
+                    lambda emotion, vector: check_response_cache(
+                        response_cache,
+                        user_id,
+                        user_message,
+                        emotion,
+                        vector,
+                        offline_mode,
+                    ),
+                    deps=("emotion", "embedding"),
+                ),
+                Stage(
+                    "prompt",
+                    lambda emotion, history, context: construct_prompt(
+                        user_message, history, emotion, context
+                    ),
+                    deps=("emotion", "history", "rag"),
+                ),
+            ]
+        )
+        emotion_analysis = results["emotion"]
+        messages, prompt_stats = results["prompt"]
+        cache_result = results["cache"]
+        logger.info(f"감정 분석 결과: {emotion_analysis}")
 
-        # 벡터 저장소에 대화 추가 (RAG용)
-        if not offline_mode and vector_store_svc.vector_store:
-            logger.info("RAG: 새 대화 벡터 저장소에 추가 시작")
-            success = vector_store_svc.add_texts([user_message, response_text], user_id)
-            logger.info(f"RAG: 새 대화 추가 결과: {'성공' if success else '실패'}")
+        if cache_result["status"] == "hit":
+            # 유사한 저위험 질의에 대한 이전 응답 재사용 (생성 생략)
+            response_text = cache_result["response"]
+            timings["generation"] = 0.0
+        else:
+            # 응답 생성
+            generation_started = time.perf_counter()
+            response_text, generated = await generate_response(
+                messages, user_message, offline_mode=offline_mode
+            )
+            generation_elapsed = time.perf_counter() - generation_started
+            LLM_GENERATION.labels(endpoint="chat").observe(generation_elapsed)
+            timings["generation"] = round(generation_elapsed * 1000, 2)
+            if generated and cache_result["status"] == "miss":
+                response_cache.store(
+                    cache_result["vector"],
+                    cache_result["bucket"],
+                    user_message,
+                    response_text,
+                )
 
-            # 매 대화마다 벡터 저장소 저장
-            logger.info("RAG: 벡터 저장소 저장 시작")
-            success = vector_store_svc.save_local()
-            logger.info(f"RAG: 벡터 저장소 저장 결과: {'성공' if success else '실패'}")
+        # 채팅 기록 및 벡터 저장소 저장은 백그라운드 워커에 위임
+        await persistence_worker.enqueue(
+            ConversationTurn(
+                user_id,
+                user_msg,
+                Message(is_user=False, content=response_text),
+                index_vectors=not offline_mode,
+            )
+        )
 
         return ChatResponse(
             user_id=user_id,
             message=user_message,
             response=response_text,
             emotion_analysis=emotion_analysis,
+            debug={
+                "timings": timings,
+                "prompt": prompt_stats,
+                "response_cache": cache_debug(cache_result, response_cache),
+            },
         )
     except Exception as e:
         logger.error(f"채팅 처리 중 오류 발생: {str(e)}")
@@ -129,191 +177,409 @@ async def chat(
 @router.post("/chat-stream")
 async def chat_stream(
     request: ChatRequest,
-    chat_history_svc: ChatHistoryService = Depends(lambda: chat_history_service),
-    vector_store_svc: VectorStoreService = Depends(lambda: vector_store_service),
+    chat_history_svc: ChatHistoryService = Depends(get_chat_history_service),
+    vector_store_svc: VectorStoreService = Depends(get_vector_store_service),
+    persistence_worker: PersistenceWorker = Depends(get_persistence_worker),
+    health: OpenAIHealthProber = Depends(get_health_prober),
+    response_cache: SemanticResponseCache = Depends(get_response_cache),
+    sse_streams: SSEStreamRegistry = Depends(get_sse_streams),
 ):
     user_id = request.user_id
     user_message = request.message
+    # 요청 시점의 연결 상태 (백그라운드 프로버가 갱신)
+    offline_mode = health.offline
+    user_msg = Message(is_user=True, content=user_message)
+    request_started = time.perf_counter()
 
-    # 감정 분석
-    try:
-        emotion_analysis = await analyze_emotion(user_message)
-        logger.info(f"감정 분석 결과: {emotion_analysis}")
-    except Exception as e:
-        logger.error(f"감정 분석 중 오류: {str(e)}")
-        emotion_analysis = {
-            "emotion": "중립",
-            "intensity": 5,
-            "raw_analysis": "분석 실패",
-        }
-
-    # 감정 기반 프롬프트 생성
-    final_prompt = create_prompt_with_emotion(emotion_analysis)
-
-    # 대화 기록 가져오기
-    history = (
-        request.chat_history
-        if request.chat_history
-        else chat_history_svc.get_history(user_id)
-    )
+    def retrieve_context(query_vector):
+        """관련 컨텍스트 검색 (RAG, 블로킹이므로 스레드에서 실행)"""
+        if offline_mode or query_vector is None or not vector_store_svc.vector_store:
+            return ""
 
-    # 관련 컨텍스트 검색 (RAG)
-    relevant_docs = []
-    if not offline_mode and vector_store_svc.vector_store:
         try:
-            relevant_docs = vector_store_svc.search(user_message, user_id=user_id, k=3)
+            relevant_docs = vector_store_svc.search(
+                user_message, user_id=user_id, k=3, query_vector=query_vector
+            )
             logger.info(f"관련 컨텍스트 {len(relevant_docs)}개 검색됨")
         except Exception as e:
             logger.error(f"컨텍스트 검색 실패: {str(e)}")
+            return ""
+
+        # 컨텍스트 추가
+        context = ""
+        if relevant_docs:
+            context = "이전 대화 내용:\n"
+            for i, doc in enumerate(relevant_docs):
+                context += f"{i+1}. {doc.page_content}\n"
+        return context
+
+    def build_messages(emotion_analysis, history, context):
+        """감정 기반 프롬프트, 컨텍스트, 대화 기록을 토큰 예산에 맞춰 메시지로 구성"""
+        messages, prompt_stats = assemble_messages(
+            create_prompt_with_emotion(emotion_analysis),
+            user_message,
+            history=history,
+            context=context,
+            context_header="다음은 이전 대화에서 관련된 정보입니다:\n",
+        )
+        logger.info(f"프롬프트 구성 완료: {prompt_stats}")
+        return messages
 
-    # 컨텍스트 추가
-    context = ""
-    if relevant_docs:
-        context = "이전 대화 내용:\n"
-        for i, doc in enumerate(relevant_docs):
-            context += f"{i+1}. {doc.page_content}\n"
+    stream = sse_streams.create()
 
-    async def generate():
+    # 프롬프트 구성에 필요한 단계들을 동시에 실행
+    try:
+        results, timings = await run_pipeline(
+            [
+                Stage("emotion", lambda: analyze_emotion_safely(user_message)),
+                Stage("history", lambda: load_history(request, chat_history_svc)),
+                Stage(
+                    "embedding",
+                    lambda: embed_query_safely(
+                        vector_store_svc, response_cache, user_message, offline_mode
+                    ),
+                    blocking=True,
+                ),
+                Stage("rag", retrieve_context, deps=("embedding",), blocking=True),
+                Stage(
+                    "cache",
+                    lambda emotion, vector: check_response_cache(
+                        response_cache,
+                        user_id,
+                        user_message,
+                        emotion,
+                        vector,
+                        offline_mode,
+                    ),
+                    deps=("emotion", "embedding"),
+                ),
+                Stage(
+                    "prompt",
+                    build_messages,
+                    deps=("emotion", "history", "rag"),
+                ),
+            ]
+        )
+    except Exception as e:
+        # 응답 준비 단계가 실패해도 HTTP 500 대신 SSE error 이벤트로 알림
+        logger.error(f"Error in chat-stream pipeline: {str(e)}", exc_info=True)
+        stream.emit("error", {"error": str(e)})
+        return sse_response(stream.subscribe())
+
+    emotion_analysis = results["emotion"]
+    messages = results["prompt"]
+    cache_result = results["cache"]
+    logger.info(f"감정 분석 결과: {emotion_analysis}")
+
+    async def tokens(upstream):
+        async for chunk in upstream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def produce():
+        SSE_STREAMS_IN_FLIGHT.inc()
         try:
+            # 감정 분석 결과 등 메타데이터는 시작 시 한 번만 전송
+            stream.emit(
+                "meta",
+                {
+                    "v": SSE_PROTOCOL_VERSION,
+                    "stream_id": stream.stream_id,
+                    "emotion_analysis": emotion_analysis,
+                },
+            )
             if offline_mode:
                 logger.info("오프라인 모드로 응답 생성")
-                response_text = generate_offline_response(user_message)
-                yield f"data: {json.dumps({'response': response_text, 'emotion_analysis': emotion_analysis})}\n\n"
+                stream.emit("delta", {"t": generate_offline_response(user_message)})
+                stream.emit("done", {"timings": timings})
+                return
+
+            if cache_result["status"] == "hit":
+                # 유사한 저위험 질의에 대한 이전 응답을 한 번에 전송 (생성 생략)
+                response_text = cache_result["response"]
+                ttft = time.perf_counter() - request_started
+                LLM_TTFT.labels(endpoint="chat_stream").observe(ttft)
+                timings["ttft"] = round(ttft * 1000, 2)
+                timings["generation"] = 0.0
+                stream.emit("delta", {"t": response_text})
             else:
                 logger.info("OpenAI API로 응답 생성")
 
-                # 메시지 구성 (감정 기반 프롬프트 사용)
-                messages = [{"role": "system", "content": final_prompt}]
+                # OpenAI API 스트리밍 호출
+                generation_started = time.perf_counter()
+                upstream = openai_gateway.chat_stream(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=RESPONSE_MAX_TOKENS,
+                )
 
-                # 컨텍스트 추가 (있는 경우)
-                if context:
-                    messages.append(
-                        {
-                            "role": "system",
-                            "content": f"다음은 이전 대화에서 관련된 정보입니다:\n{context}",
-                        }
+                pieces = []
+                try:
+                    # 토큰마다 이벤트를 보내지 않고 flush 간격/바이트 기준으로 합쳐서 전송
+                    async for text in coalesce(
+                        tokens(upstream), SSE_FLUSH_INTERVAL_MS / 1000, SSE_FLUSH_BYTES
+                    ):
+                        if not pieces:
+                            ttft = time.perf_counter() - request_started
+                            LLM_TTFT.labels(endpoint="chat_stream").observe(ttft)
+                            timings["ttft"] = round(ttft * 1000, 2)
+                        pieces.append(text)
+                        stream.emit("delta", {"t": text})
+                finally:
+                    # 이어받는 연결 없이 생성이 취소되면 업스트림 응답도 닫아 생성을 중단
+                    await upstream.aclose()
+                response_text = "".join(pieces)
+                generation_elapsed = time.perf_counter() - generation_started
+                LLM_GENERATION.labels(endpoint="chat_stream").observe(
+                    generation_elapsed
+                )
+                timings["generation"] = round(generation_elapsed * 1000, 2)
+                if response_text and cache_result["status"] == "miss":
+                    response_cache.store(
+                        cache_result["vector"],
+                        cache_result["bucket"],
+                        user_message,
+                        response_text,
                     )
 
-                # 채팅 기록 추가
-                for msg in history:
-                    role = "user" if msg.is_user else "assistant"
-                    messages.append({"role": role, "content": msg.content})
+            # 채팅 기록 및 벡터 저장소 저장은 백그라운드 워커에 위임
+            await persistence_worker.enqueue(
+                ConversationTurn(
+                    user_id,
+                    user_msg,
+                    Message(is_user=False, content=response_text),
+                )
+            )
 
-                # 현재 메시지 추가
-                messages.append({"role": "user", "content": user_message})
+            # 완료 신호 전송
+            stream.emit(
+                "done",
+                {
+                    "timings": timings,
+                    "response_cache": cache_debug(cache_result, response_cache),
+                },
+            )
 
-                # OpenAI API 스트리밍 호출
-                stream = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1000,
-                    stream=True,
-                )
+        except Exception as e:
+            logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
+            stream.emit("error", {"error": str(e)})
+        finally:
+            stream.finish()
+            SSE_STREAMS_IN_FLIGHT.dec()
 
-                full_response = ""
-                for chunk in stream:
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        full_response += content
-                        yield f"data: {json.dumps({'response': content, 'emotion_analysis': emotion_analysis, 'chunk': True})}\n\n"
+    # 생성은 HTTP 연결과 분리된 태스크에서 실행 (연결이 끊겨도 이어받을 수 있음)
+    stream.producer = asyncio.create_task(produce())
+    return sse_response(stream.subscribe())
 
-                # 채팅 기록 저장
-                user_msg = Message(is_user=True, content=user_message)
-                assistant_msg = Message(is_user=False, content=full_response)
 
-                chat_history_svc.add_message(user_id, user_msg)
-                chat_history_svc.add_message(user_id, assistant_msg)
+@router.get("/chat-stream/resume")
+async def chat_stream_resume(
+    last_event_id: Optional[str] = Header(None),
+    sse_streams: SSEStreamRegistry = Depends(get_sse_streams),
+):
+    """끊긴 /chat-stream 응답 이어받기 (Last-Event-ID 이후의 이벤트부터 전송)
 
-                # 벡터 저장소에 대화 추가 (RAG용)
-                vector_store_svc.add_texts([user_message, full_response], user_id)
+    스트림은 만든 워커의 메모리에만 있으므로 다른 워커로 간 요청은 404를 반환한다.
+    """
+    parsed = parse_event_id(last_event_id)
+    stream = sse_streams.get(parsed[0]) if parsed else None
+    if stream is None:
+        raise HTTPException(status_code=404, detail="이어받을 스트림이 없습니다")
+    return sse_response(stream.subscribe(after=parsed[1]))
+
+
+def sse_response(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-SSE-Protocol": str(SSE_PROTOCOL_VERSION),
+        },
+    )
 
-                # 매 대화마다 벡터 저장소 저장
-                logger.info("RAG: 벡터 저장소 저장 시작")
-                success = vector_store_svc.save_local()
-                logger.info(
-                    f"RAG: 벡터 저장소 저장 결과: {'성공' if success else '실패'}"
-                )
 
-                # 완료 신호 전송
-                yield f"data: {json.dumps({'done': True})}\n\n"
+async def analyze_emotion_safely(user_message):
+    """감정 분석 (실패 시 중립으로 대체)"""
+    try:
+        return await analyze_emotion(user_message)
+    except Exception as e:
+        logger.error(f"감정 분석 중 오류: {str(e)}")
+        return {
+            "emotion": "중립",
+            "intensity": 5,
+            "raw_analysis": "분석 실패",
+        }
 
-        except Exception as e:
-            logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
-    return StreamingResponse(generate(), media_type="text/event-stream")
+async def load_history(request, chat_history_svc):
+    """요청에 포함된 대화 기록이 없으면 DB에서 조회"""
+    if request.chat_history:
+        return request.chat_history
+    return await chat_history_svc.get_history(request.user_id)
 
 
-def construct_prompt(user_message, history, emotion_analysis, context=""):
+def embed_query_safely(
+    vector_store_svc: VectorStoreService,
+    response_cache: SemanticResponseCache,
+    user_message,
+    offline_mode,
+):
+    """RAG 검색과 응답 캐시가 함께 쓰는 질의 임베딩 (블로킹이므로 스레드에서 실행)
+
+    필요 없거나 실패하면 None을 반환하며, 이 경우 두 단계 모두 건너뛴다.
     """
-    사용자 메시지, 대화 기록, 감정 분석, 컨텍스트를 기반으로 프롬프트 구성
+    if offline_mode or not vector_store_svc.embeddings:
+        return None
+    if not vector_store_svc.vector_store and not response_cache.enabled:
+        return None
+    try:
+        return vector_store_svc.embeddings.embed_query(user_message)
+    except Exception as e:
+        logger.error(f"질의 임베딩 실패: {str(e)}")
+        return None
+
+
+def check_response_cache(
+    response_cache: SemanticResponseCache,
+    user_id,
+    user_message,
+    emotion_analysis,
+    vector,
+    offline_mode,
+):
+    """의미 기반 응답 캐시 조회 (vector는 embedding 단계에서 계산한 질의 임베딩)
+
+    미스인 경우 결과에 담긴 vector/bucket으로 생성한 응답을 저장한다.
     """
-    # 시스템 프롬프트
-    prompt = SYSTEM_PROMPT + "\n\n"
+    if not response_cache.enabled or offline_mode:
+        return {"status": "disabled"}
+
+    bucket = response_cache.bucket(user_id, user_message, emotion_analysis)
+    if bucket is None:
+        return response_cache.lookup(None, None)
+    if vector is None:
+        # 질의 임베딩 실패
+        return {"status": "error"}
+
+    result = response_cache.lookup(vector, bucket)
+    if result["status"] == "hit":
+        logger.info(f"응답 캐시 적중 (유사도: {result['similarity']})")
+    return {**result, "vector": vector, "bucket": bucket}
 
-    # 감정 분석 정보 추가
-    prompt += f"사용자의 현재 감정 상태: {emotion_analysis}\n\n"
 
-    # 컨텍스트 추가 (있는 경우)
-    if context:
-        prompt += f"이전 대화 컨텍스트:\n{context}\n\n"
+def cache_debug(cache_result, response_cache: SemanticResponseCache):
+    """디버그 정보용 캐시 결과 (벡터 등 내부 값 제외) + 누적 통계"""
+    return {
+        "status": cache_result["status"],
+        "similarity": cache_result.get("similarity"),
+        **response_cache.stats(),
+    }
 
-    # 대화 기록 추가
-    if history:
-        prompt += "이전 대화 내용:\n"
-        for i, msg in enumerate(history[-5:]):  # 최근 5개 메시지만 포함
-            role = "사용자" if msg.is_user else "세레니티"
-            prompt += f"{role}: {msg.content}\n"
-        prompt += "\n"
 
-    # 현재 메시지 추가
-    prompt += f"사용자: {user_message}\n"
-    prompt += "세레니티: "
+def construct_prompt(user_message, history, emotion_analysis, context=""):
+    """
+    사용자 메시지, 대화 기록, 감정 분석, 컨텍스트를 토큰 예산에 맞춰 메시지로 구성
 
-    logger.info(f"프롬프트 구성 완료 (길이: {len(prompt)}자)")
-    return prompt
+    반환값은 (메시지 목록, 토큰 사용 통계)이다.
+    """
+    messages, prompt_stats = assemble_messages(
+        create_prompt_with_emotion(emotion_analysis),
+        user_message,
+        history=history,
+        context=context,
+        context_header="이전 대화 컨텍스트:\n",
+    )
+    logger.info(f"프롬프트 구성 완료: {prompt_stats}")
+    return messages, prompt_stats
 
 
-def generate_response(prompt):
+async def generate_response(messages, user_message, offline_mode=False):
     """
-    프롬프트를 기반으로 응답 생성
+    구성된 메시지를 기반으로 응답 생성
+
+    반환값은 (응답, LLM 생성 여부)이며, 오프라인/오류 시에는 대체 응답과 False를 반환한다.
     """
     try:
-        if offline_mode or not client:
+        if offline_mode:
             logger.info("오프라인 모드로 응답 생성")
-            return generate_offline_response(prompt)
+            return generate_offline_response(user_message), False
 
         logger.info("OpenAI API로 응답 생성")
 
-        # 메시지 구성
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ]
-
         # OpenAI API 호출
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo", messages=messages, temperature=0.7, max_tokens=1000
+        response = await openai_gateway.chat(
+            model=CHAT_MODEL,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=RESPONSE_MAX_TOKENS,
         )
 
         response_text = response.choices[0].message.content
         logger.info(f"응답 생성 완료 (길이: {len(response_text)}자)")
-        return response_text
+        return response_text, True
 
     except Exception as e:
         logger.error(f"응답 생성 중 오류 발생: {str(e)}")
-        return generate_offline_response(prompt)
+        return generate_offline_response(user_message), False
 
 
 @router.get("/chat/history/{user_id}", response_model=ChatHistoryResponse)
-async def get_chat_history(user_id: str):
-    """채팅 기록 조회 엔드포인트"""
+async def get_chat_history(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    before: Optional[str] = None,
+    chat_history_svc: ChatHistoryService = Depends(get_chat_history_service),
+):
+    """채팅 기록 조회 엔드포인트 (before 커서로 이전 페이지 조회)"""
     try:
-        history = chat_history_service.get_history(user_id)
+        history, next_before = await chat_history_svc.get_history_page(
+            user_id, limit=limit, before=before
+        )
         return ChatHistoryResponse(
-            user_id=user_id, messages=history, total_messages=len(history)
+            user_id=user_id,
+            messages=history,
+            total_messages=len(history),
+            next_before=next_before,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 커서: {str(e)}")
     except Exception as e:
         logger.error(f"채팅 기록 조회 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/chat/history/{user_id}/export")
+async def export_chat_history(
+    user_id: str,
+    request: Request,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    chat_history_svc: ChatHistoryService = Depends(get_chat_history_service),
+):
+    """사용자의 전체 대화 기록을 NDJSON으로 스트리밍 (오래된 순)
+
+    Mongo 커서에서 읽는 대로 전송하므로 기록 길이와 관계없이 메모리 사용량이 일정하다.
+    클라이언트가 Accept-Encoding: gzip을 보내면 gzip으로 압축해 전송한다.
+    """
+    if since and until and since >= until:
+        raise HTTPException(
+            status_code=400, detail="since는 until보다 이전이어야 합니다"
+        )
+
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    filename = re.sub(r"[^\w.-]", "_", user_id)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}-history.ndjson"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    docs = chat_history_svc.iter_history(user_id, since=since, until=until)
+    return StreamingResponse(
+        ndjson_chunks(docs, compress=compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
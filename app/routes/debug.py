@@ -1,19 +1,18 @@
 import logging
-from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from fastapi.responses import RedirectResponse
-from pydantic import BaseModel
 
+from app.core.dependencies import get_response_cache, get_vector_store_service
 from app.models.debug import DebugRequest, DebugResponse, DocumentResponse
+from app.services.openai_gateway import openai_gateway
+from app.services.response_cache import SemanticResponseCache
 from app.services.vector_store import VectorStoreService
+from app.services.vector_store_registry import vector_store_registry
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# 벡터 저장소 서비스 인스턴스
-vector_store_service = VectorStoreService()
-
 
 @router.get("/debug")
 async def debug_page():
@@ -21,24 +20,41 @@ async def debug_page():
     return RedirectResponse(url="/static/debug.html")
 
 
+@router.get("/debug/openai")
+async def debug_openai():
+    """OpenAI 게이트웨이의 엔드포인트별 대기열/처리 통계"""
+    return openai_gateway.stats()
+
+
+@router.get("/debug/response-cache")
+async def debug_response_cache(
+    response_cache: SemanticResponseCache = Depends(get_response_cache),
+):
+    """의미 기반 응답 캐시 적중률 및 크기"""
+    return response_cache.stats()
+
+
 @router.post("/debug/rag", response_model=DebugResponse)
-async def debug_rag(request: DebugRequest):
+async def debug_rag(
+    request: DebugRequest,
+    vector_store_service: VectorStoreService = Depends(get_vector_store_service),
+):
     """RAG 디버깅 엔드포인트"""
     logger.info(
         f"RAG 디버그 요청: 쿼리='{request.query}', k={request.k}, 임계값={request.score_threshold}"
     )
 
     try:
-        # 벡터 저장소 로드 확인
-        if request.reload or not vector_store_service.vector_store:
-            success = vector_store_service.load_local()
-            if not success:
-                return DebugResponse(
-                    query=request.query,
-                    results=[],
-                    success=False,
-                    message="벡터 저장소 로드 실패",
-                )
+        # 채팅 라우터와 같은 인덱스를 공유하며, 스냅샷이 바뀐 경우에만 다시 로드
+        if request.reload:
+            vector_store_registry.reload_if_changed()
+        if not vector_store_service.vector_store:
+            return DebugResponse(
+                query=request.query,
+                results=[],
+                success=False,
+                message="벡터 저장소 로드 실패",
+            )
 
         # 관련 문서 검색
         docs = vector_store_service.search(
@@ -64,6 +80,7 @@ async def debug_rag(request: DebugRequest):
             results=results,
             success=True,
             message=f"{len(results)}개의 관련 문서 검색됨",
+            index=vector_store_service.index_info(),
         )
     except Exception as e:
         logger.error(f"RAG 디버그 중 오류 발생: {str(e)}")
@@ -0,0 +1,198 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+import numpy as np
+
+from app.core.config import VECTOR_DEDUP_COSINE, VECTOR_STORE_PATH
+from app.services.faiss_index import (describe_index, index_type_of,
+                                      quantization_of)
+from app.services.vector_log import VectorLog
+from app.services.vector_store import (SNAPSHOT_POINTER, VectorStoreService,
+                                       snapshot_dir)
+from app.services.vector_store_registry import WRITER_LOCK_HELD, writer_lock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 스냅샷/로그 이외의 파일(적재 체크포인트 등)은 새 저장소로 복사
+SNAPSHOT_FILES = ("index.faiss", "index.pkl")
+STORE_FILES = {
+    *SNAPSHOT_FILES,
+    SNAPSHOT_POINTER,
+    "docstore.sqlite",
+    "docstore.sqlite-wal",
+    "docstore.sqlite-shm",
+    VectorLog.FILE_NAME,
+}
+
+
+def store_bytes(path):
+    """스냅샷을 구성하는 파일 크기 합계 (pickle 저장소는 현재 세대 디렉터리의 파일)"""
+    snapshot = snapshot_dir(path)
+    paths = [os.path.join(snapshot, name) for name in SNAPSHOT_FILES]
+    paths += [os.path.join(path, name) for name in STORE_FILES - set(SNAPSHOT_FILES)]
+    return sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+
+
+def iter_batches(service, batch_size):
+    """FAISS id 순서로 (texts, vectors, metadatas, doc_ids) 배치를 반환
+
+    양자화 인덱스는 복원한 벡터가 근사값이므로 임베딩 캐시에 원본이 있으면 그것을 쓴다.
+    """
+    vector_store = service.vector_store
+    index = vector_store.index
+    quantized = quantization_of(index) != "none"
+    lookup = getattr(service.embeddings, "lookup", None)
+
+    items = vector_store.index_to_docstore_id.items()
+    if isinstance(vector_store.index_to_docstore_id, dict):
+        items = sorted(items)
+
+    def flush(batch):
+        faiss_ids = np.array([faiss_id for faiss_id, _ in batch], dtype=np.int64)
+        vectors = index.reconstruct_batch(faiss_ids)
+        texts, embeddings, metadatas, doc_ids = [], [], [], []
+        for (_, doc_id), vector in zip(batch, vectors):
+            doc = vector_store.docstore.search(doc_id)
+            if not hasattr(doc, "page_content"):
+                continue
+            exact = lookup(doc.page_content) if quantized and lookup else None
+            texts.append(doc.page_content)
+            embeddings.append(exact if exact is not None else vector.tolist())
+            metadatas.append(dict(doc.metadata))
+            doc_ids.append(doc_id)
+        return texts, embeddings, metadatas, doc_ids
+
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield flush(batch)
+            batch = []
+    if batch:
+        yield flush(batch)
+
+
+def dedup_vector_store(
+    store_path, cosine=VECTOR_DEDUP_COSINE, batch_size=1000, dry_run=False
+):
+    """기존 벡터 저장소에서 중복 문서를 제거한 새 저장소를 만들고 교체
+
+    모든 문서를 FAISS id 순서로 새 저장소에 다시 넣으며 삽입 시와 같은 규칙
+    (같은 사용자의 동일 텍스트, cosine > 0이면 근접 중복)으로 나중 것을 제외한다.
+    임베딩 API는 호출하지 않는다. 원본은 <경로>.bak-<시각>으로 보관하며,
+    서버가 같은 저장소에 쓰는 중이면 안 되므로 writer.lock을 잡지 못하면 실행하지 않는다.
+    """
+    with writer_lock(store_path) as locked:
+        if not locked:
+            logger.error(WRITER_LOCK_HELD)
+            return None
+        source = VectorStoreService(vector_store_path=store_path, dedup=False)
+        if not source.load_local():
+            logger.error(f"벡터 저장소를 '{store_path}'에서 로드하지 못했습니다")
+            return None
+        source_info = describe_index(source.vector_store.index)
+
+        work_path = f"{os.path.normpath(store_path)}.dedup"
+        shutil.rmtree(work_path, ignore_errors=True)
+        target = VectorStoreService(
+            vector_store_path=work_path,
+            docstore_backend=source.resolve_backend(),
+            # 완료 후 스냅샷을 한 번만 저장하므로 증분 로그는 쓰지 않음
+            persist_mode="full",
+            index_type="flat",
+            quantization="none",
+            dedup=True,
+            dedup_cosine=cosine,
+        )
+
+        started = time.perf_counter()
+        skipped = {"exact": 0, "near": 0}
+        for texts, embeddings, metadatas, doc_ids in iter_batches(source, batch_size):
+            batch_skipped = target.add_embeddings(texts, embeddings, metadatas, doc_ids)
+            for reason, count in batch_skipped.items():
+                skipped[reason] += count
+
+        if target.vector_store is None:
+            logger.error("남은 문서가 없어 새 저장소를 만들지 않습니다")
+            return None
+
+        # 원본과 같은 인덱스 종류/양자화로 재구성
+        index_type = index_type_of(source.vector_store.index)
+        quantization = quantization_of(source.vector_store.index)
+        if (index_type, quantization) != ("flat", "none"):
+            kwargs = {"nlist": source_info["nlist"]} if "nlist" in source_info else {}
+            if not target.rebuild_index(
+                index_type, quantization=quantization, **kwargs
+            ):
+                return None
+        if not target.save_local():
+            return None
+
+        report = {
+            "documents_before": source_info["ntotal"],
+            "documents_after": target.vector_store.index.ntotal,
+            "removed_exact": skipped["exact"],
+            "removed_near": skipped["near"],
+            "cosine_threshold": cosine,
+            "bytes_before": store_bytes(store_path),
+            "bytes_after": store_bytes(work_path),
+            "seconds": round(time.perf_counter() - started, 1),
+        }
+        report["bytes_reclaimed"] = report["bytes_before"] - report["bytes_after"]
+
+        target.close()
+        source.close()
+
+        if dry_run:
+            logger.info("--dry-run: 원본 저장소를 교체하지 않습니다")
+            shutil.rmtree(work_path, ignore_errors=True)
+            return report
+
+        backup_path = f"{os.path.normpath(store_path)}.bak-{int(time.time())}"
+        os.replace(store_path, backup_path)
+        os.replace(work_path, store_path)
+        for name in os.listdir(backup_path):
+            src = os.path.join(backup_path, name)
+            if (
+                name not in STORE_FILES
+                and not name.endswith(".bak")
+                and os.path.isfile(src)
+            ):
+                shutil.copy2(src, os.path.join(store_path, name))
+        report["backup_path"] = backup_path
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 저장소 중복 문서 제거 (1회성)")
+    parser.add_argument("--path", default=VECTOR_STORE_PATH or "vector_store")
+    parser.add_argument(
+        "--cosine",
+        type=float,
+        default=VECTOR_DEDUP_COSINE,
+        help="근접 중복 코사인 유사도 임계값 (0이면 완전 중복만 제거)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="제거량만 측정하고 교체하지 않음"
+    )
+    args = parser.parse_args()
+
+    report = dedup_vector_store(
+        args.path, cosine=args.cosine, batch_size=args.batch_size, dry_run=args.dry_run
+    )
+    if report is None:
+        print("중복 제거 실패")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
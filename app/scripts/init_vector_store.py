@@ -1,3 +1,4 @@
+import argparse
 import logging
 import os
 import sys
@@ -7,8 +8,11 @@ sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
 
-from app.core.config import OPENAI_API_KEY
+from app.core.config import (OPENAI_API_KEY, VECTOR_INDEX_TYPE,
+                             VECTOR_IVF_NLIST, VECTOR_IVF_TRAIN_SIZE)
+from app.services.faiss_index import INDEX_TYPES
 from app.services.vector_store import VectorStoreService
+from app.services.vector_store_registry import WRITER_LOCK_HELD, writer_lock
 
 # 벡터 저장소 경로 직접 정의
 VECTOR_STORE_PATH = os.environ.get("VECTOR_STORE_PATH", "vector_store")
@@ -26,40 +30,103 @@ def initialize_vector_store():
         logger.error("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
         return False
 
-    # 벡터 저장소 서비스 인스턴스 생성
-    vector_store_service = VectorStoreService(api_key=OPENAI_API_KEY)
-
-    # 초기 데이터 추가
-    initial_texts = [
-        "안녕하세요, 저는 심리 상담 코치 세레니티입니다.",
-        "마음 챙김과 명상은 스트레스 관리에 효과적입니다.",
-        "불안감을 느낄 때는 깊은 호흡이 도움이 됩니다.",
-        "자신의 감정을 인식하고 표현하는 것이 중요합니다.",
-    ]
-
-    # 벡터 저장소에 초기 데이터 추가
-    success = vector_store_service.add_texts(initial_texts, user_id="system")
-
-    if success:
-        logger.info("초기 데이터 추가 성공")
-    else:
-        logger.error("초기 데이터 추가 실패")
-        return False
-
-    # 벡터 저장소 저장
-    success = vector_store_service.save_local(VECTOR_STORE_PATH)
-
-    if success:
-        logger.info("벡터 저장소 저장 성공")
-    else:
-        logger.error("벡터 저장소 저장 실패")
-        return False
-
-    return True
+    with writer_lock(VECTOR_STORE_PATH) as locked:
+        if not locked:
+            logger.error(WRITER_LOCK_HELD)
+            return False
+        # 벡터 저장소 서비스 인스턴스 생성
+        vector_store_service = VectorStoreService(
+            api_key=OPENAI_API_KEY, vector_store_path=VECTOR_STORE_PATH
+        )
+
+        # 초기 데이터 추가
+        initial_texts = [
+            "안녕하세요, 저는 심리 상담 코치 세레니티입니다.",
+            "마음 챙김과 명상은 스트레스 관리에 효과적입니다.",
+            "불안감을 느낄 때는 깊은 호흡이 도움이 됩니다.",
+            "자신의 감정을 인식하고 표현하는 것이 중요합니다.",
+        ]
+
+        # 벡터 저장소에 초기 데이터 추가
+        success = vector_store_service.add_texts(initial_texts, user_id="system")
+
+        if success:
+            logger.info("초기 데이터 추가 성공")
+        else:
+            logger.error("초기 데이터 추가 실패")
+            return False
+
+        # 벡터 저장소 저장
+        success = vector_store_service.save_local(VECTOR_STORE_PATH)
+
+        if success:
+            logger.info("벡터 저장소 저장 성공")
+        else:
+            logger.error("벡터 저장소 저장 실패")
+            return False
+
+        return True
+
+
+def rebuild_vector_store(index_type, nlist, train_size):
+    """기존 벡터 저장소의 인덱스를 지정한 종류로 재구성 (IVF는 중심점 학습 포함)
+
+    실행 중인 서버에 반영되지 않으므로 서버를 멈춘 뒤 실행한다 (writer.lock을 잡지
+    못하면 재구성하지 않음).
+    """
+    logger.info(f"벡터 인덱스 재구성 시작: {index_type}")
+
+    with writer_lock(VECTOR_STORE_PATH) as locked:
+        if not locked:
+            logger.error(WRITER_LOCK_HELD)
+            return False
+        vector_store_service = VectorStoreService(vector_store_path=VECTOR_STORE_PATH)
+        if not vector_store_service.load_local():
+            logger.error("재구성할 벡터 저장소를 로드하지 못했습니다")
+            return False
+
+        if not vector_store_service.rebuild_index(
+            index_type, nlist=nlist, train_size=train_size
+        ):
+            return False
+
+        # 서버가 멈춘 상태에서만 실행되므로(writer.lock) 서버는 다음 시작 시 새 인덱스를 로드
+        success = vector_store_service.save_local()
+        if success:
+            logger.info(
+                f"재구성된 인덱스 저장 성공: {vector_store_service.index_info()}"
+            )
+        else:
+            logger.error("재구성된 인덱스 저장 실패")
+        vector_store_service.close()
+        return success
 
 
 if __name__ == "__main__":
-    if initialize_vector_store():
+    parser = argparse.ArgumentParser(description="벡터 저장소 초기화 및 인덱스 재구성")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("init", help="초기 데이터로 벡터 저장소 생성 (기본값)")
+    rebuild_parser = subparsers.add_parser(
+        "rebuild", help="기존 벡터로 인덱스 재구성 (IVF 중심점 학습, 서버 중지 후 실행)"
+    )
+    rebuild_parser.add_argument(
+        "--index-type", choices=INDEX_TYPES, default=VECTOR_INDEX_TYPE
+    )
+    rebuild_parser.add_argument("--nlist", type=int, default=VECTOR_IVF_NLIST)
+    rebuild_parser.add_argument(
+        "--train-size",
+        type=int,
+        default=VECTOR_IVF_TRAIN_SIZE,
+        help="IVF 학습에 사용할 벡터 수",
+    )
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        if rebuild_vector_store(args.index_type, args.nlist, args.train_size):
+            print("벡터 인덱스가 성공적으로 재구성되었습니다.")
+        else:
+            print("벡터 인덱스 재구성 실패")
+    elif initialize_vector_store():
         print("벡터 저장소가 성공적으로 초기화되었습니다.")
     else:
         print("벡터 저장소 초기화 실패")
@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import pickle
+import sys
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+from langchain_core.documents import Document
+
+from app.core.config import VECTOR_STORE_PATH
+from app.services.sqlite_docstore import SQLiteDocstore
+from app.services.vector_store import SNAPSHOT_POINTER, snapshot_dir
+from app.services.vector_store_registry import WRITER_LOCK_HELD, writer_lock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate_docstore(store_path, batch_size=1000, force=False):
+    """index.pkl(pickle 문서 저장소)을 docstore.sqlite로 변환
+
+    index.faiss는 그대로 두고 FAISS id 순서대로 문서를 옮긴 뒤,
+    원본 index.pkl은 index.pkl.bak으로 이름을 바꿔 보관한다.
+    서버의 쓰기 워커가 writer.lock을 잡고 있으면 실행하지 않는다.
+    """
+    with writer_lock(store_path) as locked:
+        if not locked:
+            logger.error(WRITER_LOCK_HELD)
+            return False
+        snapshot = snapshot_dir(store_path)
+        pkl_path = os.path.join(snapshot, "index.pkl")
+        sqlite_path = os.path.join(store_path, SQLiteDocstore.FILE_NAME)
+
+        if not os.path.exists(pkl_path):
+            logger.error(f"변환할 index.pkl이 '{store_path}'에 없습니다")
+            return False
+        if os.path.exists(sqlite_path):
+            if not force:
+                logger.error(f"{sqlite_path}가 이미 존재합니다 (--force로 덮어쓰기)")
+                return False
+            os.remove(sqlite_path)
+
+        logger.info(f"pickle 문서 저장소 로드 중: {pkl_path}")
+        with open(pkl_path, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+        target = SQLiteDocstore(sqlite_path)
+        migrated = 0
+        missing = 0
+        batch = {}
+        # SQLiteDocstore는 추가 순서대로 faiss_id를 부여하므로 FAISS id 순으로 삽입
+        for faiss_id in sorted(index_to_docstore_id):
+            doc_id = index_to_docstore_id[faiss_id]
+            doc = docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                # 순번이 어긋나지 않도록 빈 문서로 자리를 채움
+                missing += 1
+                doc = Document(page_content="", metadata={})
+            batch[doc_id] = doc
+            if len(batch) >= batch_size:
+                target.add(batch)
+                migrated += len(batch)
+                batch = {}
+        if batch:
+            target.add(batch)
+            migrated += len(batch)
+        target.close()
+
+        os.replace(pkl_path, f"{pkl_path}.bak")
+        if snapshot != store_path:
+            # SQLite 저장소는 루트의 index.faiss를 읽으므로 세대 디렉터리에서 옮기고 포인터 해제
+            os.replace(
+                os.path.join(snapshot, "index.faiss"),
+                os.path.join(store_path, "index.faiss"),
+            )
+            pointer = os.path.join(store_path, SNAPSHOT_POINTER)
+            os.replace(pointer, f"{pointer}.bak")
+
+        pkl_size = os.path.getsize(f"{pkl_path}.bak")
+        sqlite_size = os.path.getsize(sqlite_path)
+        logger.info(
+            f"문서 {migrated}개 변환 완료 (누락 {missing}개), "
+            f"index.pkl {pkl_size / 1024 / 1024:.1f}MB → "
+            f"docstore.sqlite {sqlite_size / 1024 / 1024:.1f}MB"
+        )
+        return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="index.pkl → docstore.sqlite 변환")
+    parser.add_argument("--path", default=VECTOR_STORE_PATH or "vector_store")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--force", action="store_true", help="기존 docstore.sqlite를 덮어쓰기"
+    )
+    args = parser.parse_args()
+
+    if migrate_docstore(args.path, batch_size=args.batch_size, force=args.force):
+        print("문서 저장소 변환 완료")
+    else:
+        print("문서 저장소 변환 실패")
@@ -0,0 +1,139 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+import numpy as np
+
+from app.core.config import (VECTOR_INDEX_QUANTIZATION, VECTOR_IVF_NLIST,
+                             VECTOR_IVF_TRAIN_SIZE, VECTOR_RERANK_FACTOR,
+                             VECTOR_STORE_PATH)
+from app.services.faiss_index import (INDEX_TYPES, QUANTIZATIONS,
+                                      describe_index, index_type_of,
+                                      measure_recall)
+from app.services.vector_store import VectorStoreService, snapshot_dir
+from app.services.vector_store_registry import WRITER_LOCK_HELD, writer_lock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate_index(
+    store_path,
+    quantization,
+    index_type=None,
+    nlist=VECTOR_IVF_NLIST,
+    train_size=VECTOR_IVF_TRAIN_SIZE,
+    recall_queries=200,
+    k=10,
+    rerank_factor=VECTOR_RERANK_FACTOR,
+    dry_run=False,
+):
+    """기존 index.faiss를 양자화 인덱스로 변환하고 변환 전후 recall@k를 측정
+
+    질의는 저장된 벡터 중 무작위로 고르고, 변환 전 인덱스의 검색 결과를 기준으로
+    재정렬 없이/재정렬 후의 recall을 각각 기록한다. 원본은 index.faiss.bak으로 보관한다.
+    서버의 쓰기 워커가 writer.lock을 잡고 있으면 실행하지 않는다.
+    """
+    with writer_lock(store_path) as locked:
+        if not locked:
+            logger.error(WRITER_LOCK_HELD)
+            return None
+        service = VectorStoreService(vector_store_path=store_path)
+        if not service.load_local():
+            logger.error(f"변환할 벡터 저장소를 '{store_path}'에서 로드하지 못했습니다")
+            return None
+
+        source = service.vector_store.index
+        if source.ntotal == 0:
+            logger.error("변환할 벡터가 없습니다")
+            return None
+        before = describe_index(source)
+        index_type = index_type or index_type_of(source)
+        index_path = os.path.join(snapshot_dir(store_path), "index.faiss")
+        size_before = os.path.getsize(index_path)
+
+        if not service.rebuild_index(
+            index_type, quantization=quantization, nlist=nlist, train_size=train_size
+        ):
+            return None
+        target = service.vector_store.index
+
+        # 저장된 벡터를 질의로 사용 (변환 전 인덱스가 기준)
+        count = source.ntotal
+        rng = np.random.default_rng(0)
+        query_ids = np.sort(
+            rng.choice(count, min(count, recall_queries), replace=False)
+        ).astype(np.int64)
+        queries = source.reconstruct_batch(query_ids)
+        k = min(k, count)
+        report = {
+            "before": before,
+            "after": describe_index(target),
+            "recall": measure_recall(source, target, queries, k=k),
+            "recall_reranked": measure_recall(
+                source, target, queries, k=k, rerank_factor=rerank_factor
+            ),
+            "index_bytes_before": size_before,
+        }
+
+        if dry_run:
+            logger.info("--dry-run: 변환한 인덱스를 저장하지 않습니다")
+        else:
+            # pickle 저장소의 세대 디렉터리는 이후 저장 시 삭제되므로 백업은 저장소 루트에 둠
+            shutil.copy2(index_path, os.path.join(store_path, "index.faiss.bak"))
+            if not service.save_local():
+                return None
+            report["index_bytes_after"] = os.path.getsize(
+                os.path.join(snapshot_dir(store_path), "index.faiss")
+            )
+            report["reduction"] = round(size_before / report["index_bytes_after"], 2)
+        service.close()
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="index.faiss 양자화 변환 및 recall 측정"
+    )
+    parser.add_argument("--path", default=VECTOR_STORE_PATH or "vector_store")
+    parser.add_argument(
+        "--quantization", choices=QUANTIZATIONS, default=VECTOR_INDEX_QUANTIZATION
+    )
+    parser.add_argument(
+        "--index-type", choices=INDEX_TYPES, help="인덱스 종류 (기본: 현재 종류 유지)"
+    )
+    parser.add_argument("--nlist", type=int, default=VECTOR_IVF_NLIST)
+    parser.add_argument("--train-size", type=int, default=VECTOR_IVF_TRAIN_SIZE)
+    parser.add_argument(
+        "--recall-queries", type=int, default=200, help="recall 측정에 쓸 질의 수"
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=VECTOR_RERANK_FACTOR)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="recall만 측정하고 저장하지 않음"
+    )
+    args = parser.parse_args()
+
+    report = migrate_index(
+        args.path,
+        args.quantization,
+        index_type=args.index_type,
+        nlist=args.nlist,
+        train_size=args.train_size,
+        recall_queries=args.recall_queries,
+        k=args.k,
+        rerank_factor=args.rerank_factor,
+        dry_run=args.dry_run,
+    )
+    if report is None:
+        print("인덱스 변환 실패")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
@@ -1,7 +1,12 @@
+import argparse
+import json
 import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from bson import ObjectId
 from dotenv import load_dotenv
 from pymongo import MongoClient
 
@@ -10,7 +15,9 @@ sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
 
+from app.core.config import VECTOR_STORE_PATH
 from app.services.vector_store import VectorStoreService
+from app.services.vector_store_registry import WRITER_LOCK_HELD, writer_lock
 
 # 환경 변수 로드
 load_dotenv()
@@ -19,9 +26,59 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-
-def vectorize_chat_history():
-    """MongoDB에 저장된 채팅 기록을 벡터화하여 벡터 저장소에 저장"""
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+
+
+def load_checkpoint(path):
+    """마지막으로 적재한 메시지 위치(high-water mark) 로드"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """체크포인트를 임시 파일에 쓴 뒤 원자적으로 교체"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_batches(collection, last_id, batch_size):
+    """_id 순서로 커서를 스트리밍하며 batch_size개씩 반환 (전체를 메모리에 올리지 않음)"""
+    query = {"_id": {"$gt": ObjectId(last_id)}} if last_id else {}
+    cursor = collection.find(
+        query,
+        projection={"_id": 1, "user_id": 1, "content": 1, "timestamp": 1},
+        sort=[("_id", 1)],
+        batch_size=batch_size,
+    )
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_concurrently(embeddings, texts, concurrency, chunk_size):
+    """임베딩 요청을 chunk_size 단위로 나눠 최대 concurrency개까지 동시에 실행
+
+    결과는 임베딩 캐시에 채워지므로 이후 add_user_texts에서는 API를 다시 호출하지 않는다.
+    """
+    chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(embeddings.embed_documents, chunks))
+
+
+def vectorize_chat_history(batch_size=500, concurrency=4, chunk_size=64, reset=False):
+    """MongoDB에 저장된 채팅 기록을 벡터화하여 벡터 저장소에 저장 (증분 적재)"""
     logger.info("채팅 기록 벡터화 시작")
 
     # MongoDB 연결
@@ -33,59 +90,112 @@ def vectorize_chat_history():
     db = client[db_name]
     collection = db[collection_name]
 
-    # 벡터 저장소 서비스 초기화
-    vector_store_service = VectorStoreService()
-
-    # 기존 벡터 저장소 로드 시도
-    try:
-        vector_store_service.load_local(allow_dangerous_deserialization=True)
-    except:
-        logger.info("기존 벡터 저장소 로드 실패, 새로 생성합니다")
-
-    # 사용자별 채팅 기록 가져오기
-    user_ids = collection.distinct("user_id")
-    logger.info(f"총 {len(user_ids)}명의 사용자 데이터 처리 중")
+    # 벡터 저장소 서비스 초기화 (서버의 쓰기 워커가 실행 중이면 저장소에 쓰지 않음)
+    vector_store_service = VectorStoreService(
+        vector_store_path=VECTOR_STORE_PATH or "vector_store"
+    )
+    with writer_lock(vector_store_service.vector_store_path) as locked:
+        if not locked:
+            logger.error(WRITER_LOCK_HELD)
+            return False
+        # 기존 벡터 저장소 로드 시도
+        if not vector_store_service.load_local():
+            logger.info("기존 벡터 저장소 로드 실패, 새로 생성합니다")
+
+        checkpoint_path = os.path.join(
+            vector_store_service.vector_store_path, CHECKPOINT_FILE
+        )
+        checkpoint = {} if reset else load_checkpoint(checkpoint_path)
+        last_id = checkpoint.get("last_id")
+        ingested = checkpoint.get("ingested", 0)
+        logger.info(f"체크포인트: last_id={last_id}, 누적 적재 {ingested}개")
+
+        started = time.perf_counter()
+        scanned = 0
+        added = 0
+        duplicates = 0
+        for batch in iter_batches(collection, last_id, batch_size):
+            batch_started = time.perf_counter()
+            scanned += len(batch)
 
-    for user_id in user_ids:
-        # 사용자 메시지 가져오기
-        messages = list(collection.find({"user_id": user_id}).sort("timestamp", 1))
-        logger.info(f"사용자 '{user_id}'의 메시지 {len(messages)}개 처리 중")
-
-        # 메시지 내용 추출
-        texts = []
-        for msg in messages:
             # 메시지 내용이 있고 길이가 충분한 경우만 처리
-            if msg.get("content") and len(msg.get("content", "")) > 10:
-                texts.append(msg["content"])
+            texts, user_ids = [], []
+            for msg in batch:
+                if msg.get("content") and len(msg.get("content", "")) > 10:
+                    texts.append(msg["content"])
+                    user_ids.append(msg["user_id"])
+
+            # 이전 실행에서 이미 적재한 메시지는 임베딩 전에 제외
+            candidates = len(texts)
+            texts, user_ids = vector_store_service.filter_known(texts, user_ids)
+            duplicates += candidates - len(texts)
+
+            if texts:
+                embed_concurrently(
+                    vector_store_service.embeddings, texts, concurrency, chunk_size
+                )
+                if not vector_store_service.add_user_texts(texts, user_ids):
+                    logger.error("배치 추가 실패, 마지막 체크포인트에서 중단합니다")
+                    return False
+                # 체크포인트보다 벡터가 먼저 디스크에 기록되어야 재실행 시 유실이 없음
+                vector_store_service.persist(force=True)
+                added += len(texts)
+
+            last = batch[-1]
+            checkpoint = {
+                "last_id": str(last["_id"]),
+                "last_timestamp": (
+                    last["timestamp"].isoformat() if last.get("timestamp") else None
+                ),
+                "ingested": ingested + added,
+            }
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            batch_elapsed = time.perf_counter() - batch_started
+            logger.info(
+                f"배치 처리: {len(batch)}개 스캔, {len(texts)}개 적재 "
+                f"({len(batch) / batch_elapsed:.1f} msg/s)"
+            )
 
-        if not texts:
-            logger.warning(f"사용자 '{user_id}'의 처리할 메시지가 없습니다")
-            continue
+        elapsed = time.perf_counter() - started
+        throughput = scanned / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"총 {scanned}개 메시지 스캔, {added}개 적재, 중복 {duplicates}개 제외, {elapsed:.1f}초 "
+            f"({throughput:.1f} msg/s)"
+        )
 
-        # 벡터 저장소에 추가
-        success = vector_store_service.add_texts(texts, user_id=user_id)
+        if added == 0:
+            logger.info("새로 적재할 메시지가 없습니다")
+            return True
+
+        # 벡터 저장소 저장
+        success = vector_store_service.save_local()
 
         if success:
-            logger.info(
-                f"사용자 '{user_id}'의 메시지 {len(texts)}개가 벡터 저장소에 추가됨"
-            )
+            logger.info("벡터 저장소 저장 성공")
         else:
-            logger.error(f"사용자 '{user_id}'의 메시지 추가 실패")
-
-    # 벡터 저장소 저장
-    success = vector_store_service.save_local()
-
-    if success:
-        logger.info("벡터 저장소 저장 성공")
-    else:
-        logger.error("벡터 저장소 저장 실패")
-        return False
+            logger.error("벡터 저장소 저장 실패")
+            return False
 
-    return True
+        return True
 
 
 if __name__ == "__main__":
-    if vectorize_chat_history():
+    parser = argparse.ArgumentParser(description="채팅 기록 벡터화 (증분 적재)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument(
+        "--reset", action="store_true", help="체크포인트를 무시하고 처음부터 적재"
+    )
+    args = parser.parse_args()
+
+    if vectorize_chat_history(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        reset=args.reset,
+    ):
         print("채팅 기록 벡터화 완료")
     else:
         print("채팅 기록 벡터화 실패")
@@ -1,61 +1,208 @@
 import datetime
 import logging
 
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient
 
-from app.core.config import MONGODB_URI
+from app.core.config import (MONGODB_CONNECT_TIMEOUT_MS,
+                             MONGODB_MAX_IDLE_TIME_MS, MONGODB_MAX_POOL_SIZE,
+                             MONGODB_MIN_POOL_SIZE,
+                             MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                             MONGODB_SOCKET_TIMEOUT_MS, MONGODB_URI)
+from app.core.metrics import MONGO_LATENCY
 from app.models import Message
 
 logger = logging.getLogger(__name__)
 
+# 대화 기록 조회 시 읽을 필드
+HISTORY_PROJECTION = {"_id": 1, "timestamp": 1, "is_user": 1, "content": 1}
+# 내보내기 시 읽을 필드 (_id 제외)
+EXPORT_PROJECTION = {"_id": 0, "timestamp": 1, "is_user": 1, "content": 1}
+
+
+def parse_history_cursor(before: str):
+    """페이지 커서("timestamp_id" 또는 ISO timestamp)를 keyset 조건으로 변환
+
+    잘못된 형식이면 ValueError를 발생시킨다.
+    """
+    timestamp_part, _, id_part = before.partition("_")
+    timestamp = datetime.datetime.fromisoformat(timestamp_part)
+    if not id_part:
+        return {"timestamp": {"$lt": timestamp}}
+    if not ObjectId.is_valid(id_part):
+        raise ValueError(f"잘못된 커서 id: {id_part}")
+    return {
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": ObjectId(id_part)}},
+        ]
+    }
+
 
 class ChatHistoryService:
     def __init__(self, connection_string=MONGODB_URI):
         try:
-            self.client = MongoClient(connection_string)
+            # AsyncMongoClient는 첫 요청 시점에 연결하므로 이벤트 루프를 막지 않음
+            self.client = AsyncMongoClient(
+                connection_string,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+                connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            )
             self.db = self.client.get_database()
             self.collection = self.db["chat_history"]
-            logger.info("MongoDB 연결 성공")
+            logger.info("MongoDB 비동기 클라이언트 초기화 성공")
         except Exception as e:
             logger.error(f"MongoDB 연결 실패: {str(e)}")
             raise
 
-    def add_message(self, user_id, message):
+    async def add_message(self, user_id, message):
         """메시지 추가"""
         try:
-            self.collection.insert_one(
-                {
-                    "user_id": user_id,
-                    "timestamp": datetime.datetime.now(),
-                    "is_user": message.is_user,
-                    "content": message.content,
-                }
-            )
+            with MONGO_LATENCY.labels(operation="insert_one", kind="write").time():
+                await self.collection.insert_one(
+                    {
+                        "user_id": user_id,
+                        "timestamp": datetime.datetime.now(),
+                        "is_user": message.is_user,
+                        "content": message.content,
+                    }
+                )
             return True
         except Exception as e:
             logger.error(f"메시지 추가 실패: {str(e)}")
             return False
 
-    def get_history(self, user_id, limit=20):
-        """사용자 대화 기록 가져오기"""
+    async def add_messages(self, entries):
+        """여러 메시지를 한 번에 추가 (entries: (user_id, Message) 목록)"""
+        if not entries:
+            return True
         try:
-            cursor = self.collection.find(
-                {"user_id": user_id}, sort=[("timestamp", 1)], limit=limit
+            with MONGO_LATENCY.labels(operation="insert_many", kind="write").time():
+                await self.collection.insert_many(
+                    [
+                        {
+                            "user_id": user_id,
+                            "timestamp": message.timestamp or datetime.datetime.now(),
+                            "is_user": message.is_user,
+                            "content": message.content,
+                        }
+                        for user_id, message in entries
+                    ],
+                    ordered=True,
+                )
+            return True
+        except Exception as e:
+            logger.error(f"메시지 일괄 추가 실패: {str(e)}")
+            return False
+
+    async def ensure_indexes(self):
+        """(user_id, timestamp) 복합 인덱스 생성 (최신 메시지 역순 스캔용)"""
+        try:
+            await self.collection.create_index(
+                [
+                    ("user_id", ASCENDING),
+                    ("timestamp", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="user_id_timestamp",
             )
-            return [
-                Message(is_user=doc["is_user"], content=doc["content"])
-                for doc in cursor
-            ]
+            logger.info("채팅 기록 인덱스 확인 완료")
+        except Exception as e:
+            logger.error(f"채팅 기록 인덱스 생성 실패: {str(e)}")
+
+    async def get_history(self, user_id, limit=20):
+        """사용자의 최근 대화 기록 가져오기 (오래된 순으로 정렬)"""
+        messages, _ = await self.get_history_page(user_id, limit=limit)
+        return messages
+
+    async def get_history_page(self, user_id, limit=20, before=None):
+        """커서 이전의 최근 대화 기록 한 페이지 조회
+
+        인덱스를 역순으로 스캔해 최신 메시지부터 limit개를 읽고, 다음 페이지 조회에
+        사용할 커서(가장 오래된 메시지의 "timestamp_id")를 함께 반환한다.
+        """
+        query = {"user_id": user_id}
+        if before:
+            query.update(parse_history_cursor(before))
+
+        try:
+            with MONGO_LATENCY.labels(operation="find_history", kind="read").time():
+                cursor = self.collection.find(
+                    query,
+                    projection=HISTORY_PROJECTION,
+                    sort=[("timestamp", DESCENDING), ("_id", DESCENDING)],
+                    limit=limit,
+                )
+                docs = await cursor.to_list(length=limit)
         except Exception as e:
             logger.error(f"대화 기록 조회 실패: {str(e)}")
-            return []
+            return [], None
+
+        docs.reverse()
+        messages = [
+            Message(
+                is_user=doc["is_user"],
+                content=doc["content"],
+                timestamp=doc.get("timestamp"),
+            )
+            for doc in docs
+        ]
+        next_before = None
+        if len(docs) == limit:
+            oldest = docs[0]
+            next_before = f"{oldest['timestamp'].isoformat()}_{oldest['_id']}"
+        return messages, next_before
+
+    async def iter_history(self, user_id, since=None, until=None, batch_size=500):
+        """사용자의 전체 대화 기록을 오래된 순으로 하나씩 반환 (내보내기용)
 
-    def get_message_count(self, user_id):
+        커서에서 batch_size개씩 받아오며 결과를 메모리에 모으지 않으므로 기록 길이와
+        관계없이 메모리 사용량이 일정하다. since 이상, until 미만의 메시지만 읽는다.
+        """
+        query = {"user_id": user_id}
+        if since or until:
+            query["timestamp"] = {}
+            if since:
+                query["timestamp"]["$gte"] = since
+            if until:
+                query["timestamp"]["$lt"] = until
+
+        cursor = self.collection.find(
+            query,
+            projection=EXPORT_PROJECTION,
+            sort=[("timestamp", ASCENDING), ("_id", ASCENDING)],
+            batch_size=batch_size,
+        )
+        try:
+            async for doc in cursor:
+                yield doc
+        finally:
+            await cursor.close()
+
+    async def get_message_count(self, user_id):
         """사용자의 메시지 수 반환"""
         try:
             # MongoDB에서 사용자 메시지 수 조회
-            count = self.collection.count_documents({"user_id": user_id})
+            with MONGO_LATENCY.labels(operation="count", kind="read").time():
+                count = await self.collection.count_documents({"user_id": user_id})
             return count
         except Exception as e:
             logger.error(f"메시지 수 조회 실패: {str(e)}")
             return 0
+
+    async def ping(self) -> bool:
+        """MongoDB 연결 확인 (준비 상태 점검용)"""
+        try:
+            await self.client.admin.command("ping")
+            return True
+        except Exception as e:
+            logger.warning(f"MongoDB 연결 확인 실패: {str(e)}")
+            return False
+
+    async def close(self):
+        """MongoDB 클라이언트 종료"""
+        await self.client.close()
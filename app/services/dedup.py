@@ -0,0 +1,74 @@
+import hashlib
+import logging
+from typing import Optional
+
+import numpy as np
+
+from app.services.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(user_id: Optional[str], text: str) -> int:
+    """(사용자, 정규화된 텍스트)의 64비트 해시
+
+    같은 문장이라도 사용자가 다르면 검색 범위(사용자 파티션)가 다르므로 다른 문서로 본다.
+    SQLite INTEGER 컬럼에 그대로 저장할 수 있도록 부호 있는 정수로 반환한다.
+    """
+    payload = f"{user_id}\0{normalize_text(text)}".encode("utf-8")
+    digest = hashlib.blake2b(payload, digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def cosine_similarity(a, b) -> float:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    denominator = float(np.linalg.norm(a) * np.linalg.norm(b))
+    if denominator == 0.0:
+        return 0.0
+    return float(a @ b) / denominator
+
+
+class ContentHashIndex:
+    """저장된 문서의 콘텐츠 해시 집합 (삽입 전 완전 중복 확인용)
+
+    SQLite 문서 저장소는 해시를 문서와 함께 파일에 기록하므로 조회를 저장소에 맡기고,
+    pickle 저장소는 문서당 64비트 정수 하나를 메모리에 두고 로드 시 다시 계산한다.
+    """
+
+    def __init__(self):
+        self._hashes = set()
+        self._docstore = None
+
+    def __len__(self):
+        if self._docstore is not None:
+            return self._docstore.size
+        return len(self._hashes)
+
+    def clear(self):
+        self._hashes.clear()
+        self._docstore = None
+
+    def contains(self, user_id: Optional[str], text: str) -> bool:
+        value = content_hash(user_id, text)
+        if self._docstore is not None:
+            return self._docstore.contains_hash(value)
+        return value in self._hashes
+
+    def add(self, user_id: Optional[str], text: str):
+        # SQLite 문서 저장소는 문서를 추가할 때 해시도 함께 기록됨
+        if self._docstore is None:
+            self._hashes.add(content_hash(user_id, text))
+
+    def rebuild(self, vector_store):
+        """LangChain FAISS 저장소의 문서로 해시 집합 재구성 (SQLite는 저장소 연결만)"""
+        self.clear()
+        docstore = vector_store.docstore
+        if hasattr(docstore, "contains_hash"):
+            self._docstore = docstore
+            return
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = docstore.search(doc_id)
+            if hasattr(doc, "page_content"):
+                self.add(doc.metadata.get("user_id"), doc.page_content)
+        logger.info(f"콘텐츠 해시 인덱스 재구성 완료: {len(self._hashes)}개")
@@ -0,0 +1,198 @@
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.cache import LRUCache
+from app.core.metrics import EMBEDDING_LATENCY, EMBEDDING_TEXTS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키 계산용 텍스트 정규화 (유니코드 NFC + 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model: str, text: str) -> str:
+    """모델 이름과 정규화된 텍스트로 만든 콘텐츠 주소 키"""
+    payload = f"{model}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """mmap으로 읽는 float32 임베딩 디스크 저장소
+
+    embeddings.f32에는 벡터가 행 단위로, embeddings.keys에는 같은 순서로 키가
+    한 줄씩 저장된다 (첫 줄은 벡터 차원). 추가는 파일 잠금 하에 append로만 이루어지므로 여러
+    프로세스(서버, 스크립트)가 같은 저장소를 공유할 수 있다.
+
+    키 파일은 생성 시가 아니라 load() 또는 첫 조회/추가 시 읽는다. 서버는 이벤트 루프를
+    막지 않도록 시작 시 스레드에서 load()를 호출한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data_path = os.path.join(path, "embeddings.f32")
+        self.keys_path = os.path.join(path, "embeddings.keys")
+        self.dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        os.makedirs(path, exist_ok=True)
+
+    def load(self):
+        """키 파일 읽기 (이미 읽었으면 아무것도 하지 않음)"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self):
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            header = f.readline().strip()
+            keys = [line.rstrip("\n") for line in f if line.strip()]
+        if not header:
+            return
+
+        self.dim = int(header)
+        data_size = (
+            os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        )
+        # 쓰다 만 키 줄이 있으면 실제 벡터 수에 맞춰 무시
+        keys = keys[: data_size // 4 // self.dim]
+        # 키 없이 남은 벡터(비정상 종료)는 잘라내 행 번호를 키 순서와 맞춤
+        expected = len(keys) * self.dim * 4
+        if data_size > expected:
+            with open(self.data_path, "r+b") as f:
+                f.truncate(expected)
+        self._rows = {key: row for row, key in enumerate(keys)}
+        logger.info(f"임베딩 디스크 캐시 로드: {len(keys)}개 (차원: {self.dim})")
+
+    def _remap(self):
+        rows = os.path.getsize(self.data_path) // 4 // self.dim
+        self._mmap = np.memmap(
+            self.data_path, dtype=np.float32, mode="r", shape=(rows, self.dim)
+        )
+
+    def get(self, key: str) -> Optional[List[float]]:
+        if not self._loaded:
+            self.load()
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        with self._lock:
+            if self._mmap is None or row >= self._mmap.shape[0]:
+                self._remap()
+            return self._mmap[row].tolist()
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        if not self._loaded:
+            self.load()
+        with self._lock, open(self.keys_path, "a", encoding="utf-8") as keys_file:
+            fcntl.flock(keys_file, fcntl.LOCK_EX)
+            try:
+                vectors = np.asarray(list(items.values()), dtype=np.float32)
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    if keys_file.tell() == 0:
+                        keys_file.write(f"{self.dim}\n")
+                with open(self.data_path, "ab") as data_file:
+                    first_row = data_file.tell() // 4 // self.dim
+                    data_file.write(vectors.tobytes())
+                # 벡터를 먼저 쓰고 키를 기록해야 키가 항상 유효한 행을 가리킴
+                keys_file.write("".join(f"{key}\n" for key in items))
+                keys_file.flush()
+                for offset, key in enumerate(items):
+                    self._rows[key] = first_row + offset
+            finally:
+                fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 모델 앞단의 콘텐츠 주소 기반 캐시
+
+    메모리 LRU → 디스크(mmap) → 실제 임베딩 API 순으로 조회하며,
+    같은 텍스트는 embed_query/embed_documents 어느 쪽으로 요청해도 한 번만 임베딩한다.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache_size: int = 10000,
+        disk_path: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.memory = LRUCache(cache_size)
+        self.disk = DiskEmbeddingStore(disk_path) if disk_path else None
+        self.api_calls = 0
+
+    def load(self):
+        """디스크 캐시의 키 파일 읽기 (앱 시작 시 스레드에서 미리 호출)"""
+        if self.disk is not None:
+            self.disk.load()
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        vector = self.memory.get(key)
+        if vector is None and self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.memory.set(key, vector)
+        return vector
+
+    def lookup(self, text: str) -> Optional[List[float]]:
+        """캐시에 있는 임베딩만 반환 (없으면 API를 호출하지 않고 None)"""
+        return self._lookup(embedding_key(self.model, text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model, text) for text in texts]
+        results: List[Optional[List[float]]] = [self._lookup(key) for key in keys]
+
+        # 캐시 미스만 중복 제거 후 한 번에 임베딩
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, results):
+            if vector is None and key not in missing:
+                missing[key] = text
+        EMBEDDING_TEXTS.labels(result="cache_hit").inc(len(texts) - len(missing))
+        if missing:
+            self.api_calls += 1
+            EMBEDDING_TEXTS.labels(result="api").inc(len(missing))
+            with EMBEDDING_LATENCY.time():
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            for key, vector in computed.items():
+                self.memory.set(key, vector)
+            if self.disk is not None:
+                self.disk.put_many(computed)
+            results = [
+                vector if vector is not None else computed[key]
+                for key, vector in zip(keys, results)
+            ]
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self):
+        """캐시 통계"""
+        return {
+            **self.memory.stats(),
+            "disk_size": len(self.disk) if self.disk is not None else 0,
+            "api_calls": self.api_calls,
+        }
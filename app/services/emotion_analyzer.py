@@ -1,18 +1,406 @@
+import json
 import logging
-import os
 import re
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional
 
-from openai import AsyncOpenAI
+from app.core.cache import TTLCache
+from app.core.config import (EMOTION_BATCH_ENABLED, EMOTION_BATCH_MAX_SIZE,
+                             EMOTION_BATCH_MAX_WAIT_MS, EMOTION_CACHE_SIZE,
+                             EMOTION_CACHE_TTL, EMOTION_LOCAL_CONFIDENCE)
+from app.core.metrics import EMOTION_LATENCY
+from app.services.emotion_batcher import EmotionBatcher
+from app.services.openai_gateway import openai_gateway
 
 logger = logging.getLogger(__name__)
 
-api_key = os.environ.get("OPENAI_API_KEY")
-emotion_client = AsyncOpenAI(api_key=api_key)
+# 이전 분석 결과 캐시 (정규화된 메시지 → 분석 결과)
+emotion_cache = TTLCache(maxsize=EMOTION_CACHE_SIZE, ttl=EMOTION_CACHE_TTL)
+
+# LLM이 고를 수 있는 감정 종류
+EMOTIONS = ("기쁨", "슬픔", "분노", "불안", "중립")
+
+# 로컬 분류기용 감정 어휘 (어간 → 가중치)
+EMOTION_LEXICON = {
+    "기쁨": {
+        "기쁘": 2.0,
+        "기뻐": 2.0,
+        "행복": 2.0,
+        "신나": 1.5,
+        "신난": 1.5,
+        "설레": 1.5,
+        "뿌듯": 1.5,
+        "즐거": 1.5,
+        "최고": 1.0,
+        "좋아": 1.0,
+        "합격": 1.5,
+        "다행": 1.0,
+        "ㅎㅎ": 0.5,
+        "ㅋㅋ": 0.5,
+    },
+    "슬픔": {
+        "슬프": 2.0,
+        "슬퍼": 2.0,
+        "우울": 2.0,
+        "눈물": 1.5,
+        "울고": 1.5,
+        "울었": 1.5,
+        "외로": 1.5,
+        "그리워": 1.5,
+        "허전": 1.0,
+        "괴로": 1.5,
+        "힘들": 1.0,
+        "지쳤": 1.0,
+        "상처": 1.5,
+        "ㅠ": 0.5,
+        "ㅜ": 0.5,
+    },
+    "분노": {
+        "화나": 2.0,
+        "화가": 2.0,
+        "분노": 2.0,
+        "짜증": 2.0,
+        "빡치": 2.0,
+        "열받": 2.0,
+        "억울": 1.5,
+        "미워": 1.5,
+        "어이없": 1.5,
+        "싫어": 1.0,
+    },
+    "불안": {
+        "불안": 2.0,
+        "걱정": 2.0,
+        "초조": 2.0,
+        "두려": 2.0,
+        "무서": 1.5,
+        "긴장": 1.5,
+        "떨려": 1.5,
+        "겁나": 1.5,
+        "막막": 1.5,
+        "공황": 2.0,
+        "스트레스": 1.0,
+    },
+}
+
+# 감정이 아닌 인사말/일상 표현 (중립으로 확신할 수 있는 경우)
+# 부분 문자열이 아니라 어절 전체가 일치할 때만 사용한다 ("네"가 "네가"에 걸리지 않도록)
+NEUTRAL_MARKERS = frozenset(
+    {
+        "안녕",
+        "안녕하세요",
+        "반가워",
+        "반가워요",
+        "반갑습니다",
+        "고마워",
+        "고마워요",
+        "감사",
+        "감사해요",
+        "감사합니다",
+        "배고파",
+        "배고파요",
+        "졸려",
+        "졸려요",
+        "뭐해",
+        "뭐해요",
+        "뭐해?",
+        "잘자",
+        "잘자요",
+        "좋은 아침",
+        "좋은 아침이에요",
+        "ㅇㅇ",
+        "응",
+        "네",
+        "넵",
+        "그래",
+        "그래요",
+    }
+)
+
+# 위기/상실 표현: 짧아도 로컬 분류로 확정하지 않고 항상 LLM 분석으로 넘긴다
+RISK_TERMS = (
+    "죽고",
+    "죽을",
+    "죽었",
+    "자살",
+    "자해",
+    "끝내고 싶",
+    "사라지고 싶",
+    "살기 싫",
+    "살고 싶지",
+    "돌아가셨",
+    "세상을 떠",
+    "장례",
+    "헤어졌",
+    "이별",
+)
+
+# 부정 표현: 어휘 점수를 뒤집을 수 있으므로 ("안 좋아해") 로컬 분류를 확신하지 않는다
+NEGATION_MARKERS = ("안 ", "않", "못 ", "못해", "아무도", "없어", "없다", "별로")
+
+# 강도 수식어
+INTENSIFIERS = ("너무", "정말", "진짜", "완전", "엄청", "매우", "죽겠", "미치겠")
+
+
+def _scale_intensity(raw_intensity: int, message_length: int) -> int:
+    """메시지 길이에 따라 강도 조정"""
+    if message_length <= 5:
+        # 짧은 메시지는 강도를 30%로 줄임
+        return max(2, int(raw_intensity * 0.3))
+    elif message_length <= 10:
+        # 중간 길이 메시지는 강도를 50%로 줄임
+        return max(2, int(raw_intensity * 0.5))
+    # 긴 메시지도 80%로 줄임
+    return max(3, int(raw_intensity * 0.8))
+
+
+def has_risk_terms(message: str) -> bool:
+    """위기/상실 표현이 포함되어 있는지 여부"""
+    return any(term in message for term in RISK_TERMS)
+
+
+def _is_smalltalk(text: str) -> bool:
+    """메시지 전체 또는 모든 어절이 인사말/일상 표현인지 확인"""
+    normalized = " ".join(text.strip(" .!~?ㅎㅋ").split())
+    if normalized in NEUTRAL_MARKERS:
+        return True
+    words = [word.strip(".!~,ㅎㅋ") for word in normalized.split()]
+    return bool(words) and all(word in NEUTRAL_MARKERS for word in words)
+
+
+def classify_emotion_locally(message: str) -> Dict[str, Any]:
+    """어휘 기반 로컬 감정 분류 (LLM 호출 없음)
+
+    결과의 confidence가 낮으면 호출 측에서 LLM 분석으로 넘긴다. 위기/상실 표현이나
+    부정 표현이 있는 메시지는 confidence를 0으로 두어 항상 LLM이 판단하게 한다.
+    """
+    text = message.lower()
+    message_length = len(message.split())
+
+    if has_risk_terms(text):
+        return {
+            "emotion": "중립",
+            "intensity": 5,
+            "confidence": 0.0,
+            "message_length": message_length,
+            "risk": True,
+        }
+
+    scores = {
+        emotion: sum(weight for stem, weight in lexicon.items() if stem in text)
+        for emotion, lexicon in EMOTION_LEXICON.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    top_emotion, top_score = ranked[0]
+    second_score = ranked[1][1]
+
+    if top_score == 0:
+        # 감정 어휘가 없는 경우: 인사말/일상 표현으로만 된 메시지만 중립으로 확신하고,
+        # 나머지는 길이와 관계없이 문맥상 감정일 수 있어 LLM으로 위임
+        confidence = 0.9 if _is_smalltalk(text) else 0.4
+        return {
+            "emotion": "중립",
+            "intensity": 2,
+            "confidence": confidence,
+            "message_length": message_length,
+        }
+
+    # 1위와 2위 점수 차가 클수록, 점수가 높을수록 확신
+    margin = (top_score - second_score) / top_score
+    confidence = round(min(1.0, top_score / 2.5) * (0.5 + 0.5 * margin), 2)
+    if any(marker in text for marker in NEGATION_MARKERS):
+        confidence = min(confidence, 0.4)
+    boost = sum(1 for word in INTENSIFIERS if word in text)
+    raw_intensity = min(10, 4 + int(top_score * 1.5) + boost)
+
+    return {
+        "emotion": top_emotion,
+        "intensity": _scale_intensity(raw_intensity, message_length),
+        "confidence": confidence,
+        "message_length": message_length,
+    }
 
 
 async def analyze_emotion(message: str) -> Dict[str, Any]:
-    """사용자 메시지의 감정 분석"""
+    """사용자 메시지의 감정 분석 (캐시 → 로컬 분류기 → LLM 순의 단계별 분석)
+
+    결과의 "tier"에 실제로 응답한 단계가 기록된다.
+    """
+    started = time.perf_counter()
+    cache_key = " ".join(message.split())
+
+    cached = emotion_cache.get(cache_key)
+    if cached is not None:
+        elapsed = time.perf_counter() - started
+        EMOTION_LATENCY.labels(tier="cache").observe(elapsed)
+        return {
+            **cached,
+            "tier": "cache",
+            "latency_ms": round(elapsed * 1000, 2),
+        }
+
+    local_result = classify_emotion_locally(message)
+    if local_result["confidence"] >= EMOTION_LOCAL_CONFIDENCE:
+        result = {
+            **local_result,
+            "raw_analysis": f"로컬 분류 (신뢰도: {local_result['confidence']:.2f})",
+            "tier": "local",
+        }
+    else:
+        result = await _analyze_emotion_with_llm(message)
+        if "error" in result:
+            # LLM 실패 시 로컬 분류 결과로 대체
+            result = {
+                **local_result,
+                "raw_analysis": "분석 실패 (로컬 분류로 대체)",
+                "error": result["error"],
+                "tier": "local",
+            }
+        else:
+            result["tier"] = "llm"
+        if local_result.get("risk"):
+            # 위기/상실 표현은 LLM 결과와 관계없이 표시 (응답 캐시 등에서 제외)
+            result["risk"] = True
+
+    if "error" not in result:
+        emotion_cache.set(cache_key, result)
+    elapsed = time.perf_counter() - started
+    # LLM 실패 후 로컬 결과로 대체된 경우는 별도 경로로 집계
+    EMOTION_LATENCY.labels(
+        tier="fallback" if "error" in result else result["tier"]
+    ).observe(elapsed)
+    result = {
+        **result,
+        "latency_ms": round(elapsed * 1000, 2),
+    }
+    logger.info(f"감정 분석 완료 (단계: {result['tier']}, {result['latency_ms']}ms)")
+    return result
+
+
+EMOTION_GUIDELINES = """
+중요한 지침:
+1. 일상적인 표현이나 단순한 상태 표현("배고파", "피곤해" 등)은 감정이 아닙니다. 이런 경우 "중립"으로 분류하고 강도를 2-3으로 낮게 평가하세요.
+2. 확실하지 않은 경우 항상 "중립"으로 분류하고 강도를 낮게(1-3) 평가하세요.
+3. 짧은 메시지는 대부분 "중립"으로 분류하세요.
+4. 감정이 명확하게 표현된 경우에만 해당 감정으로 분류하세요.
+5. 인사말, 질문, 일상적인 대화는 "중립"으로 분류하세요.
+6. 죽음, 자해, 사별, 이별처럼 위기나 상실을 나타내는 표현은 짧더라도 "중립"으로 분류하지 말고 감정과 강도를 평가하세요.
+"""
+
+BATCH_EMOTION_PROMPT = (
+    """
+번호가 붙은 여러 사용자 메시지가 JSON 배열로 주어집니다. 각 메시지의 감정을 따로 분석해주세요. 다음 감정 중 하나를 선택하고 강도를 1-10 사이로 평가해주세요: 기쁨, 슬픔, 분노, 불안, 중립.
+"""
+    + EMOTION_GUIDELINES
+    + """
+응답 형식 (JSON만 출력, 모든 id를 빠짐없이 포함):
+{"results": [{"id": 1, "emotion": "중립", "intensity": 2}, ...]}
+"""
+)
+
+
+async def _analyze_emotion_with_llm(message: str) -> Dict[str, Any]:
+    """LLM을 이용한 감정 분석 (동시 요청은 배치로 묶어 한 번에 호출)"""
+    if not openai_gateway.available:
+        logger.error("감정 분석용 OpenAI 클라이언트가 초기화되지 않았습니다.")
+        # 실패로 표시해 호출 측이 로컬 분류 결과로 대체하고 캐시하지 않게 함
+        return {
+            "emotion": "중립",
+            "intensity": 3,
+            "raw_analysis": "OpenAI 클라이언트 없음",
+            "error": "OpenAI 클라이언트 없음",
+            "message_length": len(message.split()),
+        }
+    if emotion_batcher is None:
+        return await _analyze_single_with_llm(message)
+
+    try:
+        return await emotion_batcher.submit(message)
+    except Exception as e:
+        # 배치 요청 자체가 실패한 경우 (단건 분석 실패와 같은 형태로 반환)
+        return {
+            "emotion": "중립",
+            "intensity": 3,
+            "raw_analysis": "분석 실패",
+            "error": str(e),
+            "message_length": len(message.split()),
+        }
+
+
+def _parse_batch_result(content: str, count: int) -> List[Optional[tuple]]:
+    """배치 응답 JSON에서 항목별 (감정, 강도) 추출 (누락/형식 오류 항목은 None)"""
+    parsed: List[Optional[tuple]] = [None] * count
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return parsed
+
+    items = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return parsed
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("id")
+        emotion = item.get("emotion")
+        try:
+            intensity = int(item.get("intensity"))
+        except (TypeError, ValueError):
+            continue
+        if (
+            isinstance(index, int)
+            and 1 <= index <= count
+            and emotion in EMOTIONS
+            and 1 <= intensity <= 10
+        ):
+            parsed[index - 1] = (emotion, intensity)
+    return parsed
+
+
+async def _analyze_batch_with_llm(
+    messages: List[str],
+) -> List[Optional[Dict[str, Any]]]:
+    """여러 메시지를 한 번의 JSON 모드 요청으로 분석
+
+    형식이 잘못된 항목은 None으로 반환하며 배처가 단건 분석으로 다시 처리한다.
+    """
+    logger.info(f"감정 분석 배치 시작: {len(messages)}개")
+    payload = [
+        {"id": index, "message": message}
+        for index, message in enumerate(messages, start=1)
+    ]
+    response = await openai_gateway.chat(
+        endpoint="emotion",
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": BATCH_EMOTION_PROMPT},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+        ],
+        temperature=0.3,
+        max_tokens=30 * len(messages) + 20,
+        response_format={"type": "json_object"},
+    )
+    content = response.choices[0].message.content
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for message, item in zip(messages, _parse_batch_result(content, len(messages))):
+        if item is None:
+            results.append(None)
+            continue
+        emotion, raw_intensity = item
+        message_length = len(message.split())
+        results.append(
+            {
+                "emotion": emotion,
+                "intensity": _scale_intensity(raw_intensity, message_length),
+                "raw_analysis": f"감정: {emotion}\n강도: {raw_intensity}",
+                "message_length": message_length,
+            }
+        )
+    return results
+
+
+async def _analyze_single_with_llm(message: str) -> Dict[str, Any]:
+    """LLM을 이용한 단건 감정 분석"""
     try:
         # 로그 추가
         logger.info(f"감정 분석 시작: '{message[:30]}...'")
@@ -31,31 +419,19 @@ async def analyze_emotion(message: str) -> Dict[str, Any]:
         #         "message_length": message_length,
         #     }
 
-        if not emotion_client:
-            logger.error("감정 분석용 OpenAI 클라이언트가 초기화되지 않았습니다.")
-            return {
-                "emotion": "중립",
-                "intensity": 3,
-                "raw_analysis": "OpenAI 클라이언트 없음",
-                "message_length": message_length,
-            }
-
-        # 감정 분석 요청
-        response = await emotion_client.chat.completions.create(
+        # 감정 분석 요청 (같은 메시지에 대한 동시 요청은 하나로 병합)
+        response = await openai_gateway.chat(
+            endpoint="emotion",
+            coalesce=True,
             model="gpt-3.5-turbo",
             messages=[
                 {
                     "role": "system",
                     "content": """
 사용자의 메시지에서 감정을 분석해주세요. 다음 감정 중 하나를 선택하고 강도를 1-10 사이로 평가해주세요: 기쁨, 슬픔, 분노, 불안, 중립.
-
-중요한 지침:
-1. 일상적인 표현이나 단순한 상태 표현("배고파", "피곤해" 등)은 감정이 아닙니다. 이런 경우 "중립"으로 분류하고 강도를 2-3으로 낮게 평가하세요.
-2. 확실하지 않은 경우 항상 "중립"으로 분류하고 강도를 낮게(1-3) 평가하세요.
-3. 짧은 메시지는 대부분 "중립"으로 분류하세요.
-4. 감정이 명확하게 표현된 경우에만 해당 감정으로 분류하세요.
-5. 인사말, 질문, 일상적인 대화는 "중립"으로 분류하세요.
-
+"""
+                    + EMOTION_GUIDELINES
+                    + """
 응답 형식:
 감정: [감정]
 강도: [1-10]
@@ -90,15 +466,7 @@ async def analyze_emotion(message: str) -> Dict[str, Any]:
             raw_intensity = int(numbers[0])
 
             # 메시지 길이에 따라 강도 조정
-            if message_length <= 5:
-                # 짧은 메시지는 강도를 30%로 줄임
-                intensity = max(2, int(raw_intensity * 0.3))
-            elif message_length <= 10:
-                # 중간 길이 메시지는 강도를 50%로 줄임
-                intensity = max(2, int(raw_intensity * 0.5))
-            else:
-                # 긴 메시지도 80%로 줄임
-                intensity = max(3, int(raw_intensity * 0.8))
+            intensity = _scale_intensity(raw_intensity, message_length)
 
         analysis_result = {
             "emotion": emotion,
@@ -123,6 +491,19 @@ async def analyze_emotion(message: str) -> Dict[str, Any]:
         }
 
 
+# 동시에 LLM 분석이 필요한 메시지를 모아 한 번에 호출 (비활성 시 None)
+emotion_batcher = (
+    EmotionBatcher(
+        _analyze_batch_with_llm,
+        _analyze_single_with_llm,
+        max_batch_size=EMOTION_BATCH_MAX_SIZE,
+        max_wait=EMOTION_BATCH_MAX_WAIT_MS / 1000,
+    )
+    if EMOTION_BATCH_ENABLED
+    else None
+)
+
+
 def generate_offline_response(message):
     """오프라인 모드용 응답 생성 함수"""
     message = message.lower()
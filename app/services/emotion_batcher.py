@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.metrics import (EMOTION_BATCH_FALLBACKS, EMOTION_BATCH_SIZE,
+                              EMOTION_BATCH_WAIT)
+
+logger = logging.getLogger(__name__)
+
+
+class EmotionBatcher:
+    """동시에 들어온 감정 분석 요청을 모아 한 번의 LLM 호출로 처리하는 마이크로 배처
+
+    첫 요청 이후 max_wait 동안(또는 max_batch_size개가 모일 때까지) 메시지를 모은 뒤
+    run_batch로 한 번에 분류하고, 각 호출자의 future에 자신의 결과를 전달한다.
+    run_batch가 특정 항목에 대해 None(누락/형식 오류)을 돌려주면 그 항목만
+    run_single로 다시 분석한다. 배치 호출 자체가 실패하면 모든 호출자에게 예외를 전달한다.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], Awaitable[List[Optional[Dict[str, Any]]]]],
+        run_single: Callable[[str], Awaitable[Dict[str, Any]]],
+        max_batch_size: int = 16,
+        max_wait: float = 0.005,
+    ):
+        self.run_batch = run_batch
+        self.run_single = run_single
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+
+    async def submit(self, message: str) -> Dict[str, Any]:
+        """메시지를 현재 배치에 추가하고 분석 결과를 기다림"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 다른 이벤트 루프(테스트/벤치마크의 asyncio.run 등)에서 처음 호출된 경우
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((message, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = self._loop.create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[tuple]):
+        dispatched = time.perf_counter()
+        for _, _, enqueued in batch:
+            EMOTION_BATCH_WAIT.observe(dispatched - enqueued)
+        EMOTION_BATCH_SIZE.observe(len(batch))
+        self.batches += 1
+        self.items += len(batch)
+
+        # 같은 배치 안의 동일한 메시지는 한 번만 분류
+        unique = list(dict.fromkeys(message for message, _, _ in batch))
+        try:
+            if len(unique) == 1:
+                results = {unique[0]: await self.run_single(unique[0])}
+            else:
+                results = await self._classify(unique)
+        except Exception as e:
+            logger.error(f"감정 분석 배치({len(unique)}개) 실패: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for message, future, _ in batch:
+            if not future.done():
+                # 호출자가 결과를 수정해도 다른 호출자에게 영향이 없도록 복사
+                future.set_result(dict(results[message]))
+
+    async def _classify(self, messages: List[str]) -> Dict[str, Dict[str, Any]]:
+        parsed = await self.run_batch(messages)
+        results = {}
+        retry = []
+        for message, result in zip(messages, parsed):
+            if result is None:
+                retry.append(message)
+            else:
+                results[message] = result
+        # 응답에서 빠진 항목(응답 길이가 짧은 경우 포함)도 단건으로 다시 분석
+        retry.extend(messages[len(parsed) :])
+
+        if retry:
+            self.fallbacks += len(retry)
+            EMOTION_BATCH_FALLBACKS.inc(len(retry))
+            logger.warning(
+                f"감정 분석 배치 결과 {len(retry)}/{len(messages)}개 형식 오류, 단건 분석으로 대체"
+            )
+            singles = await asyncio.gather(
+                *(self.run_single(message) for message in retry)
+            )
+            results.update(zip(retry, singles))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "fallbacks": self.fallbacks,
+            "pending": len(self._pending),
+            "avg_batch_size": (
+                round(self.items / self.batches, 2) if self.batches else 0.0
+            ),
+        }
@@ -0,0 +1,247 @@
+import logging
+from typing import Any, Dict
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 지원하는 인덱스 종류
+# flat: 정확한 brute-force 검색 (기본값, 학습 불필요)
+# ivf: IVF-Flat, nlist개 중심점으로 군집화 후 nprobe개 군집만 검색 (학습 필요)
+# hnsw: HNSW 그래프, M개 이웃 / efSearch 후보로 검색 (학습 불필요)
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+# 벡터 저장 방식 (1536차원 기준 벡터당 바이트)
+# none: float32 (6144B), fp16: 반정밀도 (3072B), sq8: 차원당 8비트 스칼라 양자화 (1536B),
+# pq: pq_m개 부분 공간별 8비트 곱 양자화 (pq_m=64면 64B, 학습 필요)
+QUANTIZATIONS = ("none", "fp16", "sq8", "pq")
+
+_SQ_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def build_index(
+    index_type: str,
+    dim: int,
+    quantization: str = "none",
+    nlist: int = 1024,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    pq_m: int = 64,
+):
+    """인덱스 종류와 벡터 저장 방식에 맞는 빈 FAISS 인덱스 생성
+
+    IVF와 sq8/pq 양자화는 학습(is_trained) 후에만 벡터를 추가할 수 있다.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"지원하지 않는 인덱스 종류: {index_type} (가능: {INDEX_TYPES})"
+        )
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(
+            f"지원하지 않는 양자화 방식: {quantization} (가능: {QUANTIZATIONS})"
+        )
+    if quantization == "pq" and dim % pq_m != 0:
+        raise ValueError(f"벡터 차원 {dim}이 pq_m {pq_m}으로 나누어떨어지지 않습니다")
+
+    if index_type == "flat":
+        if quantization == "none":
+            return faiss.IndexFlatL2(dim)
+        if quantization == "pq":
+            return faiss.IndexPQ(dim, pq_m, 8, faiss.METRIC_L2)
+        return faiss.IndexScalarQuantizer(dim, _SQ_TYPES[quantization], faiss.METRIC_L2)
+
+    if index_type == "ivf":
+        # FAISS 파이썬 래퍼가 quantizer 참조를 인덱스에 묶어 둠
+        quantizer = faiss.IndexFlatL2(dim)
+        if quantization == "none":
+            return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_L2)
+        if quantization == "pq":
+            return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, 8)
+        return faiss.IndexIVFScalarQuantizer(
+            quantizer, dim, nlist, _SQ_TYPES[quantization], faiss.METRIC_L2
+        )
+
+    if quantization == "none":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+    elif quantization == "pq":
+        index = faiss.IndexHNSWPQ(dim, pq_m, hnsw_m)
+    else:
+        index = faiss.IndexHNSWSQ(dim, _SQ_TYPES[quantization], hnsw_m)
+    index.hnsw.efConstruction = ef_construction
+    return index
+
+
+def index_type_of(index) -> str:
+    """FAISS 인덱스 객체의 종류 이름"""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf"
+    if isinstance(index, (faiss.IndexFlat, faiss.IndexScalarQuantizer, faiss.IndexPQ)):
+        return "flat"
+    return type(index).__name__
+
+
+def quantization_of(index) -> str:
+    """FAISS 인덱스가 벡터를 저장하는 방식 (QUANTIZATIONS 중 하나)"""
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    else:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            index = faiss.downcast_index(ivf)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    return "none"
+
+
+def prepare_index(index, nprobe: int = 16, ef_search: int = 64):
+    """로드/생성한 인덱스에 검색 파라미터를 적용
+
+    nprobe, efSearch는 인덱스 파일에도 저장되지만 설정값으로 덮어써 재학습 없이
+    정확도와 지연 시간을 조정할 수 있게 한다. IVF는 사용자 파티션 검색의
+    reconstruct를 위해 direct map을 만든다.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+    return index
+
+
+def fit_nlist(nlist: int, count: int) -> int:
+    """벡터 수에 맞게 nlist 조정 (FAISS 권장: 중심점당 학습 벡터 39개 이상)"""
+    fitted = max(1, min(nlist, count // 39))
+    if fitted != nlist:
+        logger.warning(f"벡터 {count}개에 맞춰 nlist를 {nlist} → {fitted}로 조정")
+    return fitted
+
+
+def describe_index(index) -> Dict[str, Any]:
+    """디버그 응답용 인덱스 정보"""
+    info: Dict[str, Any] = {
+        "type": index_type_of(index),
+        "quantization": quantization_of(index),
+        "ntotal": int(index.ntotal),
+        "dim": int(index.d),
+        "is_trained": bool(index.is_trained),
+    }
+    try:
+        # 벡터 하나의 부호 크기 (HNSW 그래프, IVF 목록 등 부가 구조는 제외)
+        info["code_size"] = int(index.sa_code_size())
+    except RuntimeError:
+        pass
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        info["nlist"] = int(ivf.nlist)
+        info["nprobe"] = int(ivf.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        info["M"] = int(index.hnsw.nb_neighbors(1))
+        info["efSearch"] = int(index.hnsw.efSearch)
+        info["efConstruction"] = int(index.hnsw.efConstruction)
+    return info
+
+
+def rebuild_index(
+    source,
+    index_type: str,
+    quantization: str = "none",
+    nlist: int = 1024,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    pq_m: int = 64,
+    train_size: int = 100000,
+    batch_size: int = 10000,
+    seed: int = 0,
+):
+    """기존 인덱스의 벡터를 같은 순서(FAISS id 유지)로 새 종류의 인덱스에 다시 적재
+
+    IVF 중심점과 양자화 코드북은 전체 벡터 중 train_size개만 복원해 학습하고, 적재도 batch_size
+    단위로 복원해 원본 전체를 한 번에 메모리에 올리지 않는다.
+    """
+    count = source.ntotal
+    if index_type == "ivf":
+        nlist = fit_nlist(nlist, count)
+    if quantization == "pq" and count < 256:
+        # 부분 공간마다 256개 중심점을 학습하므로 최소 256개 벡터가 필요
+        raise ValueError(f"PQ 학습에는 최소 256개 벡터가 필요합니다 (현재 {count}개)")
+    target = build_index(
+        index_type,
+        source.d,
+        quantization=quantization,
+        nlist=nlist,
+        hnsw_m=hnsw_m,
+        ef_construction=ef_construction,
+        pq_m=pq_m,
+    )
+    # 원본이 IVF일 수 있으므로 벡터 복원 전에 direct map 준비
+    prepare_index(source)
+
+    if not target.is_trained:
+        if count == 0:
+            raise ValueError("인덱스 학습에 사용할 벡터가 없습니다")
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(
+            rng.choice(count, min(count, train_size), replace=False)
+        ).astype(np.int64)
+        target.train(source.reconstruct_batch(sample_ids))
+        logger.info(
+            f"인덱스 학습 완료: {index_type}/{quantization}, 학습 벡터 {len(sample_ids)}개"
+        )
+
+    prepare_index(target)
+    for start in range(0, count, batch_size):
+        target.add(source.reconstruct_n(start, min(batch_size, count - start)))
+    return target
+
+
+def measure_recall(
+    reference,
+    candidate,
+    queries: np.ndarray,
+    k: int = 10,
+    rerank_factor: int = 0,
+) -> Dict[str, Any]:
+    """reference 인덱스의 상위 k개 대비 candidate 인덱스의 recall@k
+
+    rerank_factor > 1이면 candidate에서 k * rerank_factor개 후보를 뽑은 뒤
+    reference에서 복원한 원본 벡터로 정확한 거리를 다시 계산해 상위 k개를 고른다.
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    _, expected = reference.search(queries, k)
+
+    fetch_k = k * rerank_factor if rerank_factor > 1 else k
+    _, found = candidate.search(queries, fetch_k)
+    if rerank_factor > 1:
+        reranked = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(queries, found)):
+            ids = ids[ids >= 0]
+            if len(ids) == 0:
+                continue
+            diff = reference.reconstruct_batch(ids) - query
+            order = np.argsort(np.einsum("ij,ij->i", diff, diff))[:k]
+            reranked[row, : len(order)] = ids[order]
+        found = reranked
+    else:
+        found = found[:, :k]
+
+    hits = sum(
+        len(set(e[e >= 0].tolist()) & set(f[f >= 0].tolist()))
+        for e, f in zip(expected, found)
+    )
+    total = int((expected >= 0).sum())
+    return {
+        "k": k,
+        "queries": len(queries),
+        "rerank_factor": rerank_factor,
+        "recall": round(hits / total, 4) if total else None,
+    }
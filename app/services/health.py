@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import (OPENAI_HEALTH_INTERVAL,
+                             OPENAI_HEALTH_RETRY_INTERVAL,
+                             OPENAI_HEALTH_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIHealthProber:
+    """OpenAI 연결 상태를 주기적으로 확인하는 백그라운드 프로버
+
+    시작 시 한 번 확인한 결과로 오프라인 모드를 영구히 정하지 않고, 오프라인인
+    동안에는 retry_interval마다 다시 확인해 네트워크가 돌아오면 자동으로 복구한다.
+    첫 확인이 끝나기 전에는 오프라인으로 취급한다.
+    """
+
+    def __init__(
+        self,
+        gateway,
+        interval: float = OPENAI_HEALTH_INTERVAL,
+        retry_interval: float = OPENAI_HEALTH_RETRY_INTERVAL,
+        timeout: float = OPENAI_HEALTH_TIMEOUT,
+    ):
+        self.gateway = gateway
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.online = False
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def offline(self) -> bool:
+        return not self.online
+
+    async def check(self) -> bool:
+        """연결 상태를 한 번 확인하고 상태를 갱신"""
+        if not self.gateway.available:
+            online, error = False, "OPENAI_API_KEY가 설정되지 않았습니다"
+        else:
+            try:
+                await self.gateway.list_models(timeout=self.timeout)
+                online, error = True, None
+            except Exception as e:
+                online, error = False, str(e) or type(e).__name__
+
+        if online != self.online or self.checked_at is None:
+            if online:
+                logger.info("OpenAI API 연결 성공")
+            else:
+                logger.warning(f"OpenAI API 연결 실패, 오프라인 모드로 전환됨: {error}")
+        self.online = online
+        self.last_error = error
+        self.checked_at = time.time()
+        return online
+
+    def start(self):
+        """프로버 태스크 시작 (앱 lifespan에서 호출)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"OpenAI 상태 확인 실패: {str(e)}")
+            await asyncio.sleep(self.interval if self.online else self.retry_interval)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "online": self.online,
+            "checked_at": self.checked_at,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,60 @@
+import json
+import logging
+import zlib
+from typing import Any, AsyncIterator, Dict
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 전송할 바이트 수 (메시지마다 전송하지 않고 모아서 보냄)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def to_ndjson_line(doc: Dict[str, Any]) -> bytes:
+    timestamp = doc.get("timestamp")
+    record = {
+        "timestamp": timestamp.isoformat() if timestamp else None,
+        "is_user": doc.get("is_user"),
+        "content": doc.get("content"),
+    }
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+async def ndjson_chunks(
+    docs: AsyncIterator[Dict[str, Any]],
+    compress: bool = False,
+    chunk_bytes: int = EXPORT_CHUNK_BYTES,
+) -> AsyncIterator[bytes]:
+    """문서를 NDJSON 줄로 변환해 chunk_bytes 단위로 반환 (compress=True면 gzip 스트림)
+
+    중간에 조회가 실패하면 응답 상태 코드를 바꿀 수 없으므로 마지막 줄에
+    {"error": ...}를 써서 내보내기가 잘렸음을 알린다.
+    """
+    # wbits=31: gzip 헤더/트레일러를 포함한 스트리밍 압축
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = bytearray()
+    count = 0
+
+    def drain() -> bytes:
+        data = bytes(buffer)
+        buffer.clear()
+        return compressor.compress(data) if compressor else data
+
+    try:
+        async for doc in docs:
+            buffer += to_ndjson_line(doc)
+            count += 1
+            if len(buffer) >= chunk_bytes:
+                data = drain()
+                if data:
+                    yield data
+    except Exception as e:
+        logger.error(f"대화 기록 내보내기 중 오류 ({count}개 전송 후): {str(e)}")
+        buffer += json.dumps({"error": str(e)}, ensure_ascii=False).encode("utf-8")
+        buffer += b"\n"
+
+    data = drain()
+    if compressor:
+        data += compressor.flush()
+    if data:
+        yield data
+    logger.info(f"대화 기록 내보내기 완료: {count}개")
@@ -0,0 +1,411 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import openai
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import (OPENAI_API_KEY, OPENAI_BACKOFF_BASE,
+                             OPENAI_BACKOFF_MAX, OPENAI_CHAT_CONCURRENCY,
+                             OPENAI_EMBEDDING_CONCURRENCY,
+                             OPENAI_EMOTION_CONCURRENCY, OPENAI_MAX_RETRIES,
+                             OPENAI_POOL_SIZE, OPENAI_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointLimiter:
+    """엔드포인트별 동시 요청 제한과 대기열 통계"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.coalesced = 0
+        self.wait_ms_total = 0.0
+
+    async def __aenter__(self):
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.wait_ms_total += (time.perf_counter() - started) * 1000
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self.semaphore.release()
+        if exc_type is None:
+            self.completed += 1
+        elif not issubclass(exc_type, asyncio.CancelledError):
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "coalesced": self.coalesced,
+            "avg_wait_ms": round(self.wait_ms_total / finished, 2) if finished else 0.0,
+        }
+
+
+class OpenAIGateway:
+    """프로세스 전체가 공유하는 OpenAI 호출 게이트웨이
+
+    - 전용 이벤트 루프 스레드에서 하나의 AsyncOpenAI 클라이언트(httpx 커넥션 풀)를 소유
+    - chat / embeddings / emotion 엔드포인트별 세마포어로 동시 요청 수 제한
+    - 429 응답은 지터를 준 지수 백오프로 재시도 (Retry-After 헤더 우선)
+    - coalesce=True인 요청은 같은 내용의 진행 중인 요청 결과를 함께 사용
+
+    비동기 라우트와 스레드에서 실행되는 동기 코드(임베딩) 모두 같은 루프로 요청을
+    넘기므로, 버스트 상황에서는 제공자 레이트 리밋에 부딪히기 전에 로컬에서 대기한다.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        limits: Optional[Dict[str, int]] = None,
+        pool_size: int = OPENAI_POOL_SIZE,
+        timeout: float = OPENAI_TIMEOUT,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        backoff_base: float = OPENAI_BACKOFF_BASE,
+        backoff_max: float = OPENAI_BACKOFF_MAX,
+    ):
+        self.api_key = api_key or OPENAI_API_KEY
+        self.limits = limits or {
+            "chat": OPENAI_CHAT_CONCURRENCY,
+            "embeddings": OPENAI_EMBEDDING_CONCURRENCY,
+            "emotion": OPENAI_EMOTION_CONCURRENCY,
+        }
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._limiters = {
+            name: EndpointLimiter(limit) for name, limit in self.limits.items()
+        }
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._inflight_waiters: Dict[str, int] = {}
+
+    @property
+    def available(self) -> bool:
+        """API 키가 설정되어 있는지 여부"""
+        return bool(self.api_key)
+
+    # ---- 이벤트 루프 관리 ----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """게이트웨이 전용 이벤트 루프 스레드 시작 (첫 호출 시)"""
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(
+                        target=loop.run_forever, name="openai-gateway", daemon=True
+                    )
+                    thread.start()
+                    self._thread = thread
+                    self._loop = loop
+                    logger.info("OpenAI 게이트웨이 이벤트 루프 시작")
+        return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def _run(self, coro):
+        """호출자 루프에서 게이트웨이 루프의 코루틴 결과를 기다림"""
+        return await asyncio.wrap_future(self._submit(coro))
+
+    def _run_sync(self, coro):
+        """동기 코드(스레드)에서 게이트웨이 루프의 코루틴 결과를 기다림"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "게이트웨이 루프 안에서는 동기 호출을 사용할 수 없습니다"
+            )
+        return self._submit(coro).result()
+
+    def _get_client(self) -> openai.AsyncOpenAI:
+        # 게이트웨이 루프 안에서만 호출됨
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=self.timeout,
+            )
+            # 재시도는 게이트웨이에서 직접 처리
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key, http_client=http_client, max_retries=0
+            )
+        return self._client
+
+    def _limiter(self, endpoint: str) -> EndpointLimiter:
+        return self._limiters[endpoint]
+
+    # ---- 재시도 / 병합 ----
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """지터를 준 지수 백오프 (Retry-After 헤더가 있으면 그 이상 대기)"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        response = getattr(error, "response", None)
+        retry_after = (
+            response.headers.get("retry-after") if response is not None else None
+        )
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    async def _with_retry(self, endpoint: str, make_call):
+        limiter = self._limiter(endpoint)
+        attempt = 0
+        while True:
+            try:
+                async with limiter:
+                    return await make_call()
+            except openai.RateLimitError as e:
+                limiter.rate_limited += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                limiter.retries += 1
+                attempt += 1
+                logger.warning(
+                    f"OpenAI {endpoint} 429 응답, {delay:.2f}초 후 재시도 "
+                    f"({attempt}/{self.max_retries})"
+                )
+                # 대기 중에는 슬롯을 반납해 다른 요청이 진행될 수 있게 함
+                await asyncio.sleep(delay)
+
+    async def _coalesced(self, endpoint: str, key: str, make_call):
+        """같은 키의 요청이 진행 중이면 그 결과를 함께 사용
+
+        공유 호출은 별도 태스크로 실행하므로 처음 요청한 쪽이 취소되어도 기다리는 다른
+        요청에는 결과가 전달되며, 기다리는 요청이 모두 취소된 경우에만 호출을 중단한다.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._with_retry(endpoint, make_call))
+            self._inflight[key] = task
+            self._inflight_waiters[key] = 0
+            task.add_done_callback(lambda _: self._release_inflight(key, task))
+        else:
+            self._limiter(endpoint).coalesced += 1
+
+        self._inflight_waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._inflight_waiters.get(key) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._inflight_waiters[key] -= 1
+
+    def _release_inflight(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._inflight_waiters[key]
+
+    async def _request(self, endpoint: str, make_call, coalesce_key=None):
+        if coalesce_key is None:
+            return await self._with_retry(endpoint, make_call)
+        return await self._coalesced(endpoint, coalesce_key, make_call)
+
+    # ---- 공개 API ----
+
+    async def chat(self, endpoint: str = "chat", coalesce: bool = False, **kwargs):
+        """chat.completions.create 호출 (endpoint로 동시성 풀 선택)"""
+        key = self._key(endpoint, kwargs) if coalesce else None
+
+        async def call():
+            return await self._get_client().chat.completions.create(**kwargs)
+
+        return await self._run(self._request(endpoint, call, key))
+
+    async def chat_stream(self, endpoint: str = "chat", **kwargs) -> AsyncIterator:
+        """스트리밍 chat.completions 호출 결과 청크를 호출자 루프로 전달
+
+        호출자가 중간에 반복을 멈추면(클라이언트 연결 종료 등) 게이트웨이 쪽
+        스트림도 닫아 생성을 중단한다. 스트림이 열려 있는 동안 슬롯을 점유한다.
+        """
+        caller_loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def deliver(item):
+            caller_loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        async def produce():
+            limiter = self._limiter(endpoint)
+            # 재시도는 스트림을 여는 요청에만 적용하고, 슬롯은 스트림이 끝날 때까지 유지
+            attempt = 0
+            while True:
+                await limiter.__aenter__()
+                try:
+                    stream = await self._get_client().chat.completions.create(
+                        stream=True, **kwargs
+                    )
+                    break
+                except openai.RateLimitError as e:
+                    await limiter.__aexit__(type(e), e, None)
+                    limiter.rate_limited += 1
+                    if attempt >= self.max_retries:
+                        raise
+                    limiter.retries += 1
+                    delay = self._backoff_delay(attempt, e)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                except BaseException as e:
+                    await limiter.__aexit__(type(e), e, None)
+                    raise
+            try:
+                async for chunk in stream:
+                    deliver(chunk)
+            except BaseException as e:
+                await limiter.__aexit__(type(e), e, None)
+                raise
+            else:
+                await limiter.__aexit__(None, None, None)
+            finally:
+                await stream.close()
+
+        async def run():
+            try:
+                await produce()
+                deliver(done)
+            except BaseException as e:
+                deliver(e)
+                raise
+
+        future = self._submit(run())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    if isinstance(item, asyncio.CancelledError):
+                        break
+                    raise item
+                yield item
+        finally:
+            # 소비자가 먼저 종료되면 게이트웨이 쪽 태스크 취소 (스트림이 닫힘)
+            future.cancel()
+
+    def _embed_request(self, texts: List[str], model: str):
+        key = self._key("embeddings", {"model": model, "input": texts})
+
+        async def call():
+            response = await self._get_client().embeddings.create(
+                model=model, input=texts
+            )
+            data = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in data]
+
+        return self._request("embeddings", call, key)
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """임베딩 요청 (같은 입력의 진행 중인 요청은 병합)"""
+        return await self._run(self._embed_request(texts, model))
+
+    def embed_sync(self, texts: List[str], model: str) -> List[List[float]]:
+        """스레드에서 실행되는 동기 코드용 임베딩 요청"""
+        return self._run_sync(self._embed_request(texts, model))
+
+    async def _list_models(self):
+        return await self._get_client().models.list()
+
+    async def list_models(self, timeout: Optional[float] = None):
+        """연결 확인용 모델 목록 조회"""
+        return await asyncio.wait_for(self._run(self._list_models()), timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """엔드포인트별 대기열 깊이와 처리 통계"""
+        return {
+            "pool_size": self.pool_size,
+            "endpoints": {
+                name: limiter.stats() for name, limiter in self._limiters.items()
+            },
+        }
+
+    def close(self):
+        """커넥션 풀과 이벤트 루프 스레드 종료"""
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self._run_sync(self._client.close())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+        logger.info("OpenAI 게이트웨이 종료")
+
+    @staticmethod
+    def _key(endpoint: str, payload: Dict[str, Any]) -> str:
+        return endpoint + ":" + json.dumps(payload, sort_keys=True, ensure_ascii=False)
+
+
+class GatewayEmbeddings(Embeddings):
+    """게이트웨이를 거치는 LangChain 임베딩 구현 (OpenAIEmbeddings 대체)"""
+
+    def __init__(self, gateway: OpenAIGateway, model: str, chunk_size: int = 1000):
+        self.gateway = gateway
+        self.model = model
+        self.chunk_size = chunk_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.chunk_size):
+            vectors.extend(
+                self.gateway.embed_sync(texts[i : i + self.chunk_size], self.model)
+            )
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.chunk_size):
+            vectors.extend(
+                await self.gateway.embed(texts[i : i + self.chunk_size], self.model)
+            )
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+openai_gateway = OpenAIGateway()
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from app.core.config import (PERSIST_BATCH_SIZE, PERSIST_FLUSH_INTERVAL,
+                             PERSIST_QUEUE_SIZE, PERSIST_SHUTDOWN_TIMEOUT)
+from app.models import Message
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationTurn:
+    """응답 이후 저장해야 할 한 번의 대화 턴"""
+
+    def __init__(
+        self,
+        user_id: str,
+        user_message: Message,
+        assistant_message: Message,
+        index_vectors: bool = True,
+    ):
+        self.user_id = user_id
+        self.user_message = user_message
+        self.assistant_message = assistant_message
+        self.index_vectors = index_vectors
+
+
+class PersistenceWorker:
+    """응답 후 저장 작업을 처리하는 백그라운드 워커 (write-behind)
+
+    요청 처리 경로에서는 대화 턴을 큐에 넣기만 하고, 워커가 배치 크기나
+    시간 간격에 맞춰 MongoDB insert_many와 사용자 간 일괄 임베딩을 수행한다.
+    벡터 색인은 워밍업에서 저장소 로드가 끝났다고 알린 뒤에만 시작한다.
+    """
+
+    def __init__(
+        self,
+        chat_history_svc,
+        vector_store_svc,
+        maxsize: int = PERSIST_QUEUE_SIZE,
+        batch_size: int = PERSIST_BATCH_SIZE,
+        flush_interval: float = PERSIST_FLUSH_INTERVAL,
+    ):
+        self.chat_history_svc = chat_history_svc
+        self.vector_store_svc = vector_store_svc
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self._vector_store_loaded = asyncio.Event()
+
+    def start(self):
+        """워커 태스크 시작 (앱 lifespan에서 호출)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("저장 워커 시작")
+
+    def mark_vector_store_loaded(self):
+        """벡터 저장소 로드가 끝났음을 알림 (이후 대기 중이던 색인이 진행됨)"""
+        self._vector_store_loaded.set()
+
+    async def enqueue(self, turn: ConversationTurn):
+        """대화 턴을 저장 큐에 추가 (큐가 가득 차면 빈 자리가 날 때까지 대기)"""
+        await self.queue.put(turn)
+
+    async def stop(self, timeout: float = PERSIST_SHUTDOWN_TIMEOUT):
+        """남은 작업을 모두 처리한 뒤 워커 종료"""
+        if self._task is None:
+            return
+        if not self._vector_store_loaded.is_set():
+            # 워밍업 전에 종료되는 경우: 추가 요청이 디스크의 저장소를 먼저 로드하므로 남은 배치를 처리
+            logger.warning(
+                "벡터 저장소 로드 전 종료: 남은 배치는 추가 시 저장소를 로드"
+            )
+            self._vector_store_loaded.set()
+        try:
+            # 큐가 가득 차 종료 신호를 넣지 못하는 경우도 같은 시간 제한 안에서만 대기
+            await asyncio.wait_for(self._shutdown(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"저장 워커 종료 시간 초과: {self.queue.qsize()}개 작업 유실")
+            self._task.cancel()
+        self._task = None
+        logger.info("저장 워커 종료")
+
+    async def _shutdown(self):
+        await self.queue.put(None)
+        await self._task
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is None:
+                break
+
+            # 배치 크기에 도달하거나 flush 간격이 지날 때까지 모음
+            batch: List[ConversationTurn] = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"저장 배치 처리 실패: {str(e)}", exc_info=True)
+
+    async def _flush(self, batch: List[ConversationTurn]):
+        """배치를 MongoDB와 벡터 저장소에 기록"""
+        entries = []
+        for turn in batch:
+            entries.append((turn.user_id, turn.user_message))
+            entries.append((turn.user_id, turn.assistant_message))
+        success = await self.chat_history_svc.add_messages(entries)
+        logger.info(
+            f"채팅 기록 {len(entries)}개 일괄 저장 결과: {'성공' if success else '실패'}"
+        )
+
+        texts, user_ids = [], []
+        for turn in batch:
+            if turn.index_vectors:
+                texts.extend(
+                    [turn.user_message.content, turn.assistant_message.content]
+                )
+                user_ids.extend([turn.user_id, turn.user_id])
+        if texts:
+            # 로드 전에 추가하면 기존 저장소와 같은 FAISS id를 쓰게 되므로 로드 완료까지 대기
+            await self._vector_store_loaded.wait()
+            # 임베딩과 FAISS 갱신은 블로킹이므로 스레드에서 실행
+            await asyncio.to_thread(self._index_texts, texts, user_ids)
+
+    def _index_texts(self, texts, user_ids):
+        logger.info(f"RAG: {len(texts)}개 텍스트 일괄 임베딩 시작")
+        success = self.vector_store_svc.add_user_texts(texts, user_ids)
+        logger.info(f"RAG: 일괄 추가 결과: {'성공' if success else '실패'}")
+        if success:
+            self.vector_store_svc.persist()
@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import tiktoken
+
+from app.core.cache import LRUCache
+from app.core.config import (CHAT_MODEL, PROMPT_CONTEXT_TOKENS,
+                             PROMPT_TOKEN_BUDGET, TOKEN_COUNT_CACHE_SIZE)
+
+logger = logging.getLogger(__name__)
+
+# chat completions 형식의 메시지당 고정 오버헤드와 응답 시작 토큰
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+
+class TokenCounter:
+    """모델 토크나이저 기반 토큰 수 계산기
+
+    시스템 프롬프트와 감정 지침처럼 값이 정해진 문자열은 lru_cache로 메모이즈하고,
+    대화 메시지는 내용 해시를 키로 LRU 캐시에 저장해 긴 대화에서도 매 요청마다
+    기록 전체를 다시 토큰화하지 않는다.
+    """
+
+    def __init__(
+        self, model: str = CHAT_MODEL, cache_size: int = TOKEN_COUNT_CACHE_SIZE
+    ):
+        self.model = model
+        self._encoding = None
+        self._encoding_lock = threading.Lock()
+        self._cache = LRUCache(cache_size)
+        self.count_static = lru_cache(maxsize=256)(self._count)
+
+    @property
+    def encoding(self):
+        """토크나이저 (첫 사용 시 로드, 실패하면 None)"""
+        if self._encoding is None:
+            with self._encoding_lock:
+                if self._encoding is None:
+                    try:
+                        self._encoding = tiktoken.encoding_for_model(self.model)
+                    except KeyError:
+                        self._encoding = tiktoken.get_encoding("cl100k_base")
+                    except Exception as e:
+                        # 인코딩 파일을 받을 수 없는 환경에서는 문자 수로 근사
+                        logger.warning(
+                            f"토크나이저 로드 실패, 문자 수로 근사: {str(e)}"
+                        )
+                        self._encoding = False
+        return self._encoding or None
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is None:
+            # 한국어는 대략 글자당 1토큰이므로 글자 수를 상한으로 사용
+            return len(text)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count(self, text: str) -> int:
+        """대화 메시지처럼 매번 달라지는 텍스트의 토큰 수 (내용 해시로 캐시)"""
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        tokens = self._cache.get(key)
+        if tokens is None:
+            tokens = self._count(text)
+            self._cache.set(key, tokens)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """앞에서부터 max_tokens 토큰까지만 남김"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[:max_tokens]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
+
+    def stats(self) -> Dict[str, Any]:
+        static = self.count_static.cache_info()
+        return {
+            "message_cache": self._cache.stats(),
+            "static_hits": static.hits,
+            "static_misses": static.misses,
+        }
+
+
+token_counter = TokenCounter()
+
+
+def assemble_messages(
+    system_prompt: str,
+    user_message: str,
+    history=(),
+    context: str = "",
+    context_header: str = "",
+    budget: int = PROMPT_TOKEN_BUDGET,
+    max_context_tokens: int = PROMPT_CONTEXT_TOKENS,
+    counter: Optional[TokenCounter] = None,
+) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """토큰 예산 안에서 chat completions 메시지 목록 구성
+
+    시스템 프롬프트와 현재 메시지는 항상 포함하고, 남은 예산으로 RAG 컨텍스트
+    (max_context_tokens 이하로 자름)를 넣은 뒤 대화 기록을 최신 메시지부터 채운다.
+    반환값은 (메시지 목록, 토큰 사용 통계)이다.
+    """
+    counter = counter or token_counter
+
+    used = counter.count_static(system_prompt) + TOKENS_PER_MESSAGE
+    used += counter.count(user_message) + TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+    if used > budget:
+        logger.warning(
+            f"시스템 프롬프트와 현재 메시지만으로 예산 초과: {used}/{budget}"
+        )
+
+    context_message = None
+    context_tokens = 0
+    if context:
+        header_tokens = counter.count_static(context_header) + TOKENS_PER_MESSAGE
+        allowance = min(max_context_tokens, budget - used - header_tokens)
+        context = counter.truncate(context, allowance)
+        if context:
+            context_tokens = header_tokens + counter.count(context)
+            used += context_tokens
+            context_message = {"role": "system", "content": context_header + context}
+
+    # 최신 메시지부터 예산이 허락하는 만큼 포함
+    history = list(history)
+    included = []
+    for msg in reversed(history):
+        tokens = counter.count(msg.content) + TOKENS_PER_MESSAGE
+        if used + tokens > budget:
+            break
+        used += tokens
+        role = "user" if msg.is_user else "assistant"
+        included.append({"role": role, "content": msg.content})
+    included.reverse()
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if context_message:
+        messages.append(context_message)
+    messages.extend(included)
+    messages.append({"role": "user", "content": user_message})
+
+    stats = {
+        "prompt_tokens": used,
+        "budget": budget,
+        "context_tokens": context_tokens,
+        "history_included": len(included),
+        "history_dropped": len(history) - len(included),
+    }
+    return messages, stats
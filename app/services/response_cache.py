@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.metrics import RESPONSE_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticResponseCache:
+    """질의 임베딩 유사도로 찾는 응답 캐시 (인사말/잡담처럼 위험이 낮은 턴 전용)
+
+    감정 분석 결과가 중립이고 강도가 낮은 짧은 메시지만 대상으로 하며, 같은 버킷
+    (범위 + 감정 구간) 안에서 코사인 유사도가 임계값 이상인 이전 질의의 응답을 재사용한다.
+    범위는 기본적으로 사용자 단위여서, 대화 기록이나 RAG 컨텍스트가 반영된 응답이
+    다른 사용자에게 돌아가지 않는다. 벡터는 고정 크기 행렬에 보관해 조회 시 행렬-벡터
+    곱 한 번으로 모든 항목과 비교한다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        maxsize: int = 1000,
+        ttl: float = 3600.0,
+        threshold: float = 0.95,
+        max_intensity: int = 3,
+        max_chars: int = 40,
+        scope: str = "user",
+    ):
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_intensity = max_intensity
+        self.max_chars = max_chars
+        self.scope = scope
+        self._vectors: Optional[np.ndarray] = None
+        self._buckets: List[Optional[str]] = [None] * maxsize
+        # 슬롯 번호 → (응답, 만료 시각, 원본 메시지), LRU 순서
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def bucket(
+        self, user_id: str, message: str, emotion_analysis: Dict[str, Any]
+    ) -> Optional[str]:
+        """캐시 대상이면 버킷 이름, 아니면 None (감정이 있거나 긴 메시지는 항상 새로 생성)"""
+        if not self.enabled or len(message.strip()) > self.max_chars:
+            return None
+        if emotion_analysis.get("emotion") != "중립" or "error" in emotion_analysis:
+            return None
+        if emotion_analysis.get("risk"):
+            # 위기/상실 표현이 있는 메시지는 항상 새로 생성
+            return None
+        intensity = emotion_analysis.get("intensity", 10)
+        if intensity > self.max_intensity:
+            return None
+        scope = user_id if self.scope == "user" else "*"
+        return f"{scope}\0중립:{'low' if intensity <= 2 else 'mid'}"
+
+    def _similarities(self, query: np.ndarray, bucket: str) -> np.ndarray:
+        mask = np.fromiter(
+            (b == bucket for b in self._buckets), dtype=bool, count=self.maxsize
+        )
+        scores = np.full(self.maxsize, -np.inf, dtype=np.float32)
+        if mask.any():
+            scores[mask] = self._vectors[mask] @ query
+        return scores
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector, bucket: Optional[str]) -> Dict[str, Any]:
+        """유사한 질의의 캐시된 응답 조회
+
+        반환값의 status는 hit / miss / skip(캐시 대상 아님) 중 하나다.
+        """
+        if bucket is None:
+            self.skipped += 1
+            RESPONSE_CACHE_REQUESTS.labels(result="skip").inc()
+            return {"status": "skip"}
+
+        query = self._normalize(vector)
+        with self._lock:
+            if self._entries:
+                scores = self._similarities(query, bucket)
+                slot = int(np.argmax(scores))
+                similarity = float(scores[slot])
+                if similarity >= self.threshold:
+                    response, expires_at, _ = self._entries[slot]
+                    if expires_at >= time.monotonic():
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        RESPONSE_CACHE_REQUESTS.labels(result="hit").inc()
+                        return {
+                            "status": "hit",
+                            "response": response,
+                            "similarity": round(similarity, 4),
+                        }
+                    self._evict(slot)
+            self.misses += 1
+        RESPONSE_CACHE_REQUESTS.labels(result="miss").inc()
+        return {"status": "miss"}
+
+    def store(self, vector, bucket: Optional[str], message: str, response: str):
+        """새로 생성한 응답 저장 (가득 차면 가장 오래 사용하지 않은 항목을 교체)"""
+        if bucket is None:
+            return
+        query = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.maxsize, len(query)), dtype=np.float32)
+            if len(self._entries) >= self.maxsize:
+                self._evict(next(iter(self._entries)))
+            slot = next(i for i, b in enumerate(self._buckets) if b is None)
+            self._vectors[slot] = query
+            self._buckets[slot] = bucket
+            self._entries[slot] = (response, time.monotonic() + self.ttl, message)
+
+    def _evict(self, slot: int):
+        self._entries.pop(slot, None)
+        self._buckets[slot] = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [None] * self.maxsize
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,287 @@
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterator, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+from app.services.dedup import content_hash
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    faiss_id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    user_id TEXT,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    content_hash INTEGER
+)
+"""
+_HASH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash)"
+)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """FAISS id를 키로 하는 SQLite 문서 저장소
+
+    pickle로 된 InMemoryDocstore와 달리 로드 시 문서를 메모리에 올리지 않고,
+    검색 결과(top-k)에 해당하는 문서만 그때그때 읽는다. 문서는 추가된 순서대로
+    FAISS 인덱스와 같은 순번(faiss_id)을 부여받는다.
+
+    추가 전용 저장소다. 개별 문서 삭제는 지원하지 않으며(faiss_id가 인덱스 순번과
+    어긋나므로), 기존 행을 덮어쓰지도 않는다. 쓰기는 벡터 저장소의 쓰기 워커 하나만
+    수행하고(read_only=False), 읽기 전용으로 연 다른 프로세스는 스냅샷 이후에 기록된
+    행(faiss_id >= 인덱스 크기)을 보이지 않게만 한다.
+    """
+
+    FILE_NAME = "docstore.sqlite"
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._migrate_content_hash()
+        self._next_id = self.count()
+
+    def _migrate_content_hash(self, batch_size: int = 10000):
+        """이전 형식의 파일에 content_hash 컬럼을 추가하고 비어 있는 값을 한 번 채움
+
+        해시를 파일에 두어 로드할 때 모든 본문을 다시 읽어 계산하지 않는다. 값 채우기는
+        쓰기 워커만 수행하며, 그 전까지 읽기 전용 쪽의 해시 조회는 해당 행을 찾지 못한다.
+        """
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        if "content_hash" not in columns:
+            self._conn.execute("BEGIN IMMEDIATE")
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(documents)")
+            }
+            if "content_hash" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE documents ADD COLUMN content_hash INTEGER"
+                )
+            self._conn.commit()
+        self._conn.execute(_HASH_INDEX)
+        self._conn.commit()
+        if self.read_only:
+            return
+
+        filled = 0
+        while True:
+            rows = self._conn.execute(
+                "SELECT faiss_id, user_id, content FROM documents "
+                "WHERE content_hash IS NULL LIMIT ?",
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                break
+            self._conn.executemany(
+                "UPDATE documents SET content_hash = ? WHERE faiss_id = ?",
+                [
+                    (content_hash(user_id, content), faiss_id)
+                    for faiss_id, user_id, content in rows
+                ],
+            )
+            self._conn.commit()
+            filled += len(rows)
+        if filled:
+            logger.info(f"기존 문서 {filled}개의 콘텐츠 해시 기록")
+
+    def count(self) -> int:
+        """파일에 기록된 문서 수 (스냅샷 이후 행 포함)"""
+        row = self._conn.execute("SELECT COALESCE(MAX(faiss_id) + 1, 0) FROM documents")
+        return row.fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """인덱스와 일치하는 문서 수 (faiss_id < size인 행만 유효)"""
+        return self._next_id
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """문서 추가 (FAISS 인덱스에 벡터가 추가된 순서와 같은 순서로 호출됨)
+
+        faiss_id는 쓰기 트랜잭션 안에서 파일의 마지막 순번과 비교해 할당한다. 다른
+        프로세스가 먼저 기록해 순번이 어긋나면 어떤 행도 쓰지 않고 예외를 발생시킨다.
+        """
+        if self.read_only:
+            raise RuntimeError("읽기 전용으로 연 문서 저장소에는 추가할 수 없습니다")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                next_id = self.count()
+                if next_id != self._next_id:
+                    raise RuntimeError(
+                        f"문서 저장소 순번 불일치 (예상 {self._next_id}, 파일 {next_id}): "
+                        "다른 프로세스가 같은 저장소에 기록 중입니다"
+                    )
+                rows = []
+                for doc_id, doc in texts.items():
+                    user_id = doc.metadata.get("user_id")
+                    rows.append(
+                        (
+                            next_id + len(rows),
+                            doc_id,
+                            user_id,
+                            doc.page_content,
+                            json.dumps(doc.metadata, ensure_ascii=False),
+                            content_hash(user_id, doc.page_content),
+                        )
+                    )
+                self._conn.executemany(
+                    "INSERT INTO documents "
+                    "(faiss_id, doc_id, user_id, content, metadata, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._next_id += len(rows)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """문서 id로 문서 조회"""
+        row = self._conn.execute(
+            "SELECT doc_id, content, metadata FROM documents "
+            "WHERE doc_id = ? AND faiss_id < ?",
+            (search, self._next_id),
+        ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return _to_document(row)
+
+    def search_by_faiss_id(self, faiss_id: int) -> Union[str, Document]:
+        """FAISS id로 문서 조회"""
+        row = self._conn.execute(
+            "SELECT doc_id, content, metadata FROM documents WHERE faiss_id = ?",
+            (faiss_id,),
+        ).fetchone()
+        if row is None:
+            return f"FAISS ID {faiss_id} not found."
+        return _to_document(row)
+
+    def contains(self, doc_id: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM documents WHERE doc_id = ? AND faiss_id < ?",
+            (doc_id, self._next_id),
+        ).fetchone()
+        return row is not None
+
+    def contains_hash(self, value: int) -> bool:
+        """콘텐츠 해시가 같은 문서가 있는지 (dedup.content_hash 값)"""
+        row = self._conn.execute(
+            "SELECT 1 FROM documents WHERE content_hash = ? AND faiss_id < ? LIMIT 1",
+            (value, self._next_id),
+        ).fetchone()
+        return row is not None
+
+    def doc_id_for(self, faiss_id: int) -> str:
+        row = self._conn.execute(
+            "SELECT doc_id FROM documents WHERE faiss_id = ?", (faiss_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(faiss_id)
+        return row[0]
+
+    def iter_doc_ids(self) -> Iterator[Tuple[int, str]]:
+        yield from self._conn.execute(
+            "SELECT faiss_id, doc_id FROM documents WHERE faiss_id < ? "
+            "ORDER BY faiss_id",
+            (self._next_id,),
+        )
+
+    def iter_user_ids(self) -> Iterator[Tuple[int, str]]:
+        """(faiss_id, user_id) 목록 (문서 본문은 읽지 않음)"""
+        yield from self._conn.execute(
+            "SELECT faiss_id, user_id FROM documents "
+            "WHERE user_id IS NOT NULL AND faiss_id < ?",
+            (self._next_id,),
+        )
+
+    def rewind(self, ntotal: int):
+        """인덱스 스냅샷 크기에 맞춰 유효 범위를 되돌림
+
+        쓰기 쪽은 faiss_id >= ntotal인 행을 삭제하고(벡터 로그 재생으로 다시 기록됨),
+        읽기 전용 쪽은 쓰기 워커의 행을 건드리지 않고 보이지 않게만 한다.
+        """
+        with self._lock:
+            stale = self.count() - ntotal
+            if stale > 0 and not self.read_only:
+                self._conn.execute(
+                    "DELETE FROM documents WHERE faiss_id >= ?", (ntotal,)
+                )
+                self._conn.commit()
+            self._next_id = ntotal
+        if stale > 0 and not self.read_only:
+            logger.info(
+                f"스냅샷 이후 문서 {stale}개 삭제 (로그 재생으로 다시 기록됩니다)"
+            )
+
+    def backup(self, dest_path: str):
+        """다른 경로로 문서 저장소 복사 (SQLite 온라인 백업)"""
+        dest = sqlite3.connect(dest_path)
+        try:
+            with self._lock:
+                self._conn.backup(dest)
+        finally:
+            dest.close()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteIndexMap:
+    """LangChain FAISS의 index_to_docstore_id를 대신하는 지연 조회 매핑
+
+    FAISS id → 문서 id 조회를 SQLite에 위임해 매핑 전체를 메모리에 올리지 않는다.
+    """
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self.docstore = docstore
+        self._len = docstore.size
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, faiss_id: int) -> str:
+        return self.docstore.doc_id_for(int(faiss_id))
+
+    def __contains__(self, faiss_id) -> bool:
+        return 0 <= int(faiss_id) < self._len
+
+    def get(self, faiss_id, default=None):
+        try:
+            return self[faiss_id]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        return (faiss_id for faiss_id, _ in self.docstore.iter_doc_ids())
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        return self.docstore.iter_doc_ids()
+
+    def values(self):
+        return (doc_id for _, doc_id in self.docstore.iter_doc_ids())
+
+    def update(self, mapping: Dict[int, str]):
+        # 문서는 docstore.add에서 이미 같은 순번으로 기록되었으므로 길이만 갱신
+        if mapping:
+            self._len = max(self._len, max(mapping) + 1)
+
+
+def _to_document(row) -> Document:
+    doc_id, content, metadata = row
+    return Document(id=doc_id, page_content=content, metadata=json.loads(metadata))
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 (없으면 표준 json 사용)
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# /chat-stream 이벤트 형식 버전 (meta 이벤트와 응답 헤더로 알림)
+#   meta  : 스트림 시작 시 한 번 {"v", "stream_id", "emotion_analysis"}
+#   delta : 응답 텍스트 조각 {"t"} (짧은 간격/바이트 기준으로 합쳐서 전송)
+#   done  : 완료 {"timings", "response_cache"}
+#   error : 오류 {"error"}
+# 이벤트 id는 "<stream_id>:<순번>"이며 Last-Event-ID로 이어받을 수 있다.
+SSE_PROTOCOL_VERSION = 2
+
+
+def dumps(data: Any) -> bytes:
+    """이벤트 데이터 직렬화 (orjson이 있으면 사용, 한글은 이스케이프하지 않음)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def format_event(event_id: str, event: str, data: Any) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        event_id.encode("ascii"),
+        event.encode("ascii"),
+        dumps(data),
+    )
+
+
+def parse_event_id(event_id: Optional[str]):
+    """Last-Event-ID를 (stream_id, 순번)으로 분리 (형식이 틀리면 None)"""
+    if not event_id or ":" not in event_id:
+        return None
+    stream_id, _, seq = event_id.rpartition(":")
+    try:
+        return stream_id, int(seq)
+    except ValueError:
+        return None
+
+
+async def coalesce(
+    pieces: AsyncIterator[str], interval: float, max_bytes: int
+) -> AsyncIterator[str]:
+    """업스트림 토큰을 flush 간격 또는 바이트 기준으로 합쳐서 반환
+
+    첫 조각은 TTFT를 늘리지 않도록 바로 내보낸다. 업스트림이 멈춰 있어도 모아 둔
+    텍스트는 간격이 지나면 전송되도록 다음 토큰 대기와 타이머를 함께 기다린다.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = pieces.__aiter__()
+    buffer: List[str] = []
+    size = 0
+    first = True
+    deadline = None
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+                continue
+
+            try:
+                piece = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+            buffer.append(piece)
+            size += len(piece.encode("utf-8"))
+            if first or size >= max_bytes:
+                first = False
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+            elif deadline is None:
+                deadline = loop.time() + interval
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending
+            except BaseException:
+                pass
+
+
+class SSEStream:
+    """한 응답의 SSE 이벤트 기록
+
+    생성 태스크(producer)가 이벤트를 추가하고, 읽는 쪽은 subscribe로 지정한 순번 이후의
+    이벤트를 받는다. 생성은 HTTP 연결과 분리되어 있어 연결이 끊겨도 grace 시간 동안
+    계속되며, 그 안에 이어받는 요청이 없으면 생성을 취소해 업스트림 호출을 멈춘다.
+    이어받기가 불가능한 경우(grace가 0 이하, 클라이언트가 이벤트 id를 하나도 받지 못함,
+    레지스트리에서 제거됨)에는 기다리지 않고 바로 취소한다.
+    """
+
+    def __init__(self, stream_id: str, grace: float):
+        self.stream_id = stream_id
+        self.grace = grace
+        self.events: List[bytes] = []
+        self.finished = False
+        self.updated_at = time.monotonic()
+        self.producer: Optional[asyncio.Task] = None
+        self.readers = 0
+        # 클라이언트에 전달된 이벤트가 있어야 Last-Event-ID로 이어받을 수 있음
+        self.delivered = False
+        self.resumable = True
+        self._changed = asyncio.Event()
+        self._abort_handle: Optional[asyncio.TimerHandle] = None
+
+    def emit(self, event: str, data: Any):
+        if self.finished:
+            return
+        self.events.append(
+            format_event(f"{self.stream_id}:{len(self.events)}", event, data)
+        )
+        if event in ("done", "error"):
+            self.finished = True
+        self._notify()
+
+    def finish(self):
+        """생성 종료 (done/error 없이 끝난 경우 읽는 쪽이 대기하지 않도록)"""
+        if not self.finished:
+            self.finished = True
+            self._notify()
+
+    def _notify(self):
+        self.updated_at = time.monotonic()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self, after: int = -1) -> AsyncIterator[bytes]:
+        """순번 after 이후의 이벤트를 반환하고, 생성 중이면 새 이벤트를 기다림"""
+        self.readers += 1
+        if self._abort_handle is not None:
+            self._abort_handle.cancel()
+            self._abort_handle = None
+        index = after + 1
+        try:
+            while True:
+                while index < len(self.events):
+                    self.delivered = True
+                    yield self.events[index]
+                    index += 1
+                if self.finished:
+                    return
+                await self._changed.wait()
+        finally:
+            self.readers -= 1
+            if self.readers == 0 and not self.finished and self.producer:
+                if self.grace <= 0 or not self.delivered or not self.resumable:
+                    self._abort()
+                else:
+                    self._abort_handle = asyncio.get_running_loop().call_later(
+                        self.grace, self._abort
+                    )
+
+    def discard(self):
+        """레지스트리에서 제거됨 (더 이상 이어받을 수 없으므로 읽는 쪽이 없으면 생성 취소)"""
+        self.resumable = False
+        if self._abort_handle is not None:
+            self._abort_handle.cancel()
+        self._abort()
+
+    def _abort(self):
+        self._abort_handle = None
+        if self.readers == 0 and not self.finished and self.producer:
+            logger.info(f"SSE 스트림 {self.stream_id}: 이어받는 연결이 없어 생성 중단")
+            self.producer.cancel()
+
+
+class SSEStreamRegistry:
+    """이어받기(resume)를 위해 최근 스트림의 이벤트를 보관
+
+    끝난 스트림은 ttl 동안 유지하고, 개수가 maxsize를 넘으면 오래된 것부터 제거한다.
+    이벤트는 프로세스 메모리에만 있으므로 여러 워커로 실행하면 스트림을 만든 워커에서만
+    이어받을 수 있다. 다른 워커로 간 이어받기 요청은 404를 받으므로 클라이언트는 새
+    요청으로 다시 시작해야 한다 (이어받기가 필요하면 스티키 세션으로 배포).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, grace: float = 10.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.grace = grace
+        self._streams: "OrderedDict[str, SSEStream]" = OrderedDict()
+
+    def create(self) -> SSEStream:
+        self._prune()
+        stream = SSEStream(uuid.uuid4().hex, self.grace)
+        self._streams[stream.stream_id] = stream
+        return stream
+
+    def get(self, stream_id: str) -> Optional[SSEStream]:
+        return self._streams.get(stream_id)
+
+    def _prune(self):
+        expires_before = time.monotonic() - self.ttl
+        for stream_id, stream in list(self._streams.items()):
+            if stream.finished and stream.updated_at < expires_before:
+                del self._streams[stream_id]
+        while len(self._streams) >= self.maxsize:
+            _, stream = self._streams.popitem(last=False)
+            stream.discard()
+
+    def stats(self) -> Dict[str, Any]:
+        active = sum(1 for stream in self._streams.values() if not stream.finished)
+        return {"buffered": len(self._streams), "active": active}
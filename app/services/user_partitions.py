@@ -0,0 +1,129 @@
+import logging
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import faiss
+import numpy as np
+
+from app.services.faiss_index import index_type_of
+
+logger = logging.getLogger(__name__)
+
+
+class UserPartitionIndex:
+    """사용자 ID → FAISS 벡터 id 목록 매핑
+
+    전역 인덱스를 그대로 두고 사용자별 id 목록만 관리한다. 검색 시 해당 사용자의
+    벡터만 복원(reconstruct)해 거리를 계산하므로, 검색 비용은 전체 사용자 수가 아니라
+    해당 사용자의 벡터 수에만 비례한다.
+
+    전역 인덱스가 IVF/HNSW이고 사용자 벡터가 ann_min_size개 이상이면 복원 대신
+    사용자 id 목록을 IDSelector로 넘겨 ANN 검색을 사용한다 (벡터가 적으면 정확한
+    brute-force가 더 빠르고 그래프 탐색이 필터에 막혀 결과가 모자랄 수 있으므로).
+    """
+
+    def __init__(self, block_size: int = 4096, ann_min_size: int = 4096):
+        self.block_size = block_size
+        self.ann_min_size = ann_min_size
+        self._ids: Dict[str, array] = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def clear(self):
+        self._ids.clear()
+
+    def add(self, user_id: str, faiss_ids: Iterable[int]):
+        """사용자 파티션에 벡터 id 추가"""
+        self._ids.setdefault(user_id, array("q")).extend(faiss_ids)
+
+    def count(self, user_id: str) -> int:
+        """사용자 파티션의 벡터 수"""
+        return len(self._ids.get(user_id, ()))
+
+    def rebuild(self, vector_store):
+        """LangChain FAISS 저장소의 docstore 메타데이터로 파티션 재구성"""
+        self.clear()
+        docstore = vector_store.docstore
+        if hasattr(docstore, "iter_user_ids"):
+            # SQLite 문서 저장소는 본문을 읽지 않고 user_id 컬럼만 조회
+            for faiss_id, user_id in docstore.iter_user_ids():
+                self.add(user_id, (faiss_id,))
+            logger.info(f"사용자 파티션 재구성 완료: {len(self._ids)}명")
+            return
+
+        for faiss_id, doc_id in vector_store.index_to_docstore_id.items():
+            doc = vector_store.docstore.search(doc_id)
+            user_id = getattr(doc, "metadata", {}).get("user_id")
+            if user_id is not None:
+                self.add(user_id, (faiss_id,))
+        logger.info(f"사용자 파티션 재구성 완료: {len(self._ids)}명")
+
+    def search(
+        self, index, query_vector: np.ndarray, user_id: str, k: int
+    ) -> List[Tuple[int, float]]:
+        """사용자 벡터만 대상으로 k-NN 검색 (파티션이 크면 ANN, 아니면 brute-force)
+
+        반환값은 (faiss id, 점수) 목록이며 점수는 인덱스 거리 척도를 따른다
+        (L2: 제곱 거리, 작을수록 유사 / 내적: 클수록 유사).
+        """
+        ids = self._ids.get(user_id)
+        if not ids or k <= 0:
+            return []
+
+        all_ids = np.array(ids, dtype=np.int64)
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        if len(all_ids) >= self.ann_min_size:
+            hits = self._search_ann(index, query, all_ids, k)
+            # 필터 때문에 후보가 모자라면 정확한 검색으로 대체
+            if hits is not None and len(hits) >= min(k, len(all_ids)):
+                return hits
+        return self._search_exact(index, query, all_ids, k)
+
+    def _search_ann(self, index, query, all_ids, k):
+        """IDSelector로 사용자 벡터만 허용해 IVF/HNSW 검색 (해당 인덱스가 아니면 None)"""
+        index_type = index_type_of(index)
+        selector = faiss.IDSelectorBatch(all_ids)
+        if index_type == "ivf":
+            params = faiss.SearchParametersIVF(
+                sel=selector, nprobe=faiss.extract_index_ivf(index).nprobe
+            )
+        elif index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(
+                sel=selector, efSearch=max(index.hnsw.efSearch, k)
+            )
+        else:
+            return None
+        scores, labels = index.search(query.reshape(1, -1), k, params=params)
+        return [
+            (int(faiss_id), float(score))
+            for faiss_id, score in zip(labels[0], scores[0])
+            if faiss_id >= 0
+        ]
+
+    def _search_exact(self, index, query, all_ids, k):
+        """사용자 벡터를 블록 단위로 복원해 정확한(brute-force) 거리 계산"""
+        inner_product = index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        # 블록 단위로 복원해 대용량 사용자도 메모리 사용량을 일정하게 유지
+        for start in range(0, len(all_ids), self.block_size):
+            block_ids = all_ids[start : start + self.block_size]
+            vectors = index.reconstruct_batch(block_ids)
+            if inner_product:
+                scores = -(vectors @ query)
+            else:
+                diff = vectors - query
+                scores = np.einsum("ij,ij->i", diff, diff)
+
+            best_ids = np.concatenate([best_ids, block_ids])
+            best_scores = np.concatenate([best_scores, scores.astype(np.float32)])
+            if len(best_scores) > k:
+                keep = np.argpartition(best_scores, k - 1)[:k]
+                best_ids, best_scores = best_ids[keep], best_scores[keep]
+
+        order = np.argsort(best_scores)
+        if inner_product:
+            best_scores = -best_scores
+        return [(int(best_ids[i]), float(best_scores[i])) for i in order]
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    embedding BLOB NOT NULL
+)
+"""
+
+InboxRecord = Tuple[int, str, str, Dict[str, Any], List[float]]
+
+
+class VectorInbox:
+    """읽기 전용 워커가 쓰기 워커에게 넘기는 임베딩 대기열 (SQLite)
+
+    벡터 저장소에 쓰는 프로세스는 하나뿐이므로, 다른 워커는 임베딩까지 계산한
+    문서를 여기에 넣고 쓰기 워커가 주기적으로 꺼내 인덱스와 로그에 반영한다.
+    여러 프로세스가 같은 파일에 넣어도 SQLite 트랜잭션으로 직렬화된다.
+    """
+
+    FILE_NAME = "inbox.sqlite"
+
+    def __init__(self, store_path: str):
+        self.path = os.path.join(store_path, self.FILE_NAME)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def put(self, texts, embeddings, metadatas, ids):
+        """문서와 임베딩을 대기열에 추가"""
+        rows = [
+            (
+                doc_id,
+                text,
+                json.dumps(metadata, ensure_ascii=False),
+                array("f", embedding).tobytes(),
+            )
+            for text, embedding, metadata, doc_id in zip(
+                texts, embeddings, metadatas, ids
+            )
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO pending (doc_id, content, metadata, embedding) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+
+    def take(self, limit: int = 500) -> List[InboxRecord]:
+        """가장 오래된 레코드부터 limit개 조회 (ack 전까지는 대기열에 남음)"""
+        if not os.path.exists(self.path):
+            return []
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT id, doc_id, content, metadata, embedding FROM pending "
+                    "ORDER BY id LIMIT ?",
+                    (limit,),
+                )
+                .fetchall()
+            )
+        records = []
+        for row_id, doc_id, content, metadata, blob in rows:
+            embedding = array("f")
+            embedding.frombytes(blob)
+            records.append(
+                (row_id, doc_id, content, json.loads(metadata), embedding.tolist())
+            )
+        return records
+
+    def ack(self, last_id: int):
+        """last_id까지의 레코드 삭제 (인덱스 반영과 로그 fsync 이후 호출)"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM pending WHERE id <= ?", (last_id,))
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
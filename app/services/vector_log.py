@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import struct
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 레코드 헤더: (메타데이터 JSON 길이, 벡터 바이트 길이)
+_RECORD_HEADER = struct.Struct("<II")
+
+LogRecord = Tuple[str, str, Dict[str, Any], List[float]]
+
+
+class VectorLog:
+    """벡터 저장소의 증분 저장을 위한 append-only 로그 세그먼트
+
+    새 문서와 임베딩 벡터를 파일 끝에 이어 쓰고, fsync는 배치 단위로 수행한다.
+    스냅샷(index.faiss/index.pkl)이 갱신되면 reset()으로 로그를 비운다.
+    """
+
+    FILE_NAME = "vectors.log"
+
+    def __init__(
+        self, store_path: str, fsync_batch: int = 16, fsync_interval: float = 1.0
+    ):
+        self.path = os.path.join(store_path, self.FILE_NAME)
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "ab")
+        return self._file
+
+    def append(
+        self, doc_id: str, text: str, metadata: Dict[str, Any], embedding: List[float]
+    ):
+        """레코드 하나를 로그에 추가 (fsync는 flush에서 수행)"""
+        header = json.dumps(
+            {"id": doc_id, "text": text, "metadata": metadata}, ensure_ascii=False
+        ).encode("utf-8")
+        vector = array("f", embedding).tobytes()
+        f = self._open()
+        f.write(_RECORD_HEADER.pack(len(header), len(vector)))
+        f.write(header)
+        f.write(vector)
+        self._pending += 1
+
+    def flush(self, force: bool = False) -> bool:
+        """버퍼를 비우고, 배치 크기나 시간 간격에 도달하면 fsync"""
+        if self._file is None or self._pending == 0:
+            return False
+
+        self._file.flush()
+        elapsed = time.monotonic() - self._last_fsync
+        if force or self._pending >= self.fsync_batch or elapsed >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            logger.debug(f"벡터 로그 fsync: {self._pending}개 레코드")
+            self._pending = 0
+            self._last_fsync = time.monotonic()
+            return True
+        return False
+
+    def size(self) -> int:
+        """로그 파일 크기 (바이트)"""
+        if self._file is not None:
+            self._file.flush()
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def replay(self) -> Iterator[LogRecord]:
+        """로그의 레코드를 순서대로 반환
+
+        마지막 레코드가 중간에 잘린 경우(비정상 종료) 해당 부분은 버리고
+        파일을 마지막 온전한 레코드 위치로 잘라낸다.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            while True:
+                raw = f.read(_RECORD_HEADER.size)
+                if len(raw) < _RECORD_HEADER.size:
+                    break
+                header_len, vector_len = _RECORD_HEADER.unpack(raw)
+                header = f.read(header_len)
+                vector = f.read(vector_len)
+                if len(header) < header_len or len(vector) < vector_len:
+                    break
+                try:
+                    payload = json.loads(header.decode("utf-8"))
+                except ValueError:
+                    break
+
+                embedding = array("f")
+                embedding.frombytes(vector)
+                good_offset = f.tell()
+                yield (
+                    payload["id"],
+                    payload["text"],
+                    payload["metadata"],
+                    embedding.tolist(),
+                )
+
+        if good_offset < os.path.getsize(self.path):
+            logger.warning(f"벡터 로그 끝의 손상된 레코드 제거: {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+
+    def reset(self):
+        """스냅샷 이후 로그 비우기"""
+        self.close()
+        with open(self.path, "wb") as f:
+            os.fsync(f.fileno())
+        self._pending = 0
+
+    def close(self):
+        """남은 레코드를 fsync하고 파일 닫기"""
+        if self._file is not None:
+            self.flush(force=True)
+            self._file.close()
+            self._file = None
@@ -1,21 +1,128 @@
 import logging
 import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
 from typing import List, Optional
 
+import faiss
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
+
+from app.core.config import (EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE,
+                             EMBEDDING_MODEL, VECTOR_DEDUP_COSINE,
+                             VECTOR_DEDUP_ENABLED, VECTOR_HNSW_EF_CONSTRUCTION,
+                             VECTOR_HNSW_EF_SEARCH, VECTOR_HNSW_M,
+                             VECTOR_INDEX_QUANTIZATION, VECTOR_INDEX_TYPE,
+                             VECTOR_IVF_NLIST, VECTOR_IVF_NPROBE,
+                             VECTOR_IVF_TRAIN_SIZE, VECTOR_LOG_FSYNC_BATCH,
+                             VECTOR_LOG_FSYNC_INTERVAL,
+                             VECTOR_PARTITION_ANN_MIN_SIZE, VECTOR_PQ_M,
+                             VECTOR_RERANK_FACTOR, VECTOR_SNAPSHOT_BYTES,
+                             VECTOR_SNAPSHOT_INTERVAL, VECTOR_STORE_DOCSTORE,
+                             VECTOR_STORE_PERSIST_MODE)
+from app.core.metrics import (FAISS_SEARCH_HITS, FAISS_SEARCH_LATENCY,
+                              SNAPSHOT_LATENCY, VECTOR_DEDUP_SKIPPED,
+                              VECTOR_INDEX_SIZE, VECTOR_SNAPSHOT_SIZE)
+from app.services.dedup import ContentHashIndex, cosine_similarity
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.faiss_index import (build_index, describe_index,
+                                      prepare_index, quantization_of,
+                                      rebuild_index)
+from app.services.openai_gateway import GatewayEmbeddings, openai_gateway
+from app.services.sqlite_docstore import SQLiteDocstore, SQLiteIndexMap
+from app.services.user_partitions import UserPartitionIndex
+from app.services.vector_inbox import VectorInbox
+from app.services.vector_log import VectorLog
 
 logger = logging.getLogger(__name__)
 
+# pickle 저장소의 현재 스냅샷 세대 디렉터리 이름을 담는 포인터 파일
+SNAPSHOT_POINTER = "CURRENT"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+def snapshot_dir(store_path: str) -> str:
+    """현재 스냅샷 파일(index.faiss, index.pkl)이 있는 디렉터리
+
+    pickle 저장소는 세대 디렉터리에 스냅샷을 쓰고 CURRENT를 교체해 전환한다.
+    CURRENT가 없으면 저장소 디렉터리 자체 (SQLite 저장소와 이전 형식의 pickle 저장소).
+    """
+    try:
+        with open(os.path.join(store_path, SNAPSHOT_POINTER), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return store_path
+    return os.path.join(store_path, name)
+
 
 class VectorStoreService:
-    def __init__(self, api_key=None, vector_store_path: str = "vector_store"):
+    def __init__(
+        self,
+        api_key=None,
+        vector_store_path: str = "vector_store",
+        persist_mode: str = VECTOR_STORE_PERSIST_MODE,
+        use_mmap: bool = False,
+        docstore_backend: str = VECTOR_STORE_DOCSTORE,
+        index_type: str = VECTOR_INDEX_TYPE,
+        quantization: str = VECTOR_INDEX_QUANTIZATION,
+        rerank_factor: int = VECTOR_RERANK_FACTOR,
+        dedup: bool = VECTOR_DEDUP_ENABLED,
+        dedup_cosine: float = VECTOR_DEDUP_COSINE,
+    ):
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         self.vector_store_path = vector_store_path
+        self.persist_mode = persist_mode
+        self.use_mmap = use_mmap
+        # 새 저장소의 문서 저장 방식 ("sqlite" 또는 "pickle", 기존 저장소는 파일로 판별)
+        self.docstore_backend = docstore_backend
+        # 새로 만들거나 rebuild_index로 재구성할 인덱스 종류 (기존 인덱스는 파일의 종류를 따름)
+        self.index_type = index_type
+        self.quantization = quantization
+        # 양자화 인덱스 검색 시 k * rerank_factor개 후보를 원본 벡터로 재정렬 (1 이하면 비활성)
+        self.rerank_factor = rerank_factor
+        # 삽입 전 중복 제거 (dedup_cosine > 0이면 같은 사용자의 근접 중복도 제외)
+        self.dedup = dedup
+        self.dedup_cosine = dedup_cosine
+        self.content_hashes = ContentHashIndex()
+        # 읽기 전용 워커는 저장소에 직접 쓰지 않고 새 문서를 inbox로 넘기며,
+        # 쓰기 워커가 남긴 스냅샷을 다시 로드해 반영한다 (쓰기 워커는 프로세스 하나)
+        self.read_only = False
+        self.inbox = VectorInbox(vector_store_path)
+        # mmap으로 로드된 인덱스는 읽기 전용이므로 첫 쓰기 때 힙으로 복사
+        self._index_mmapped = False
+        # 로드/저장한 스냅샷 파일 시그니처와 세대 번호 (핫 리로드 판단용)
+        self.loaded_signature = None
+        self.generation = 0
+        self.vector_store = None
+        self.log = VectorLog(
+            vector_store_path,
+            fsync_batch=VECTOR_LOG_FSYNC_BATCH,
+            fsync_interval=VECTOR_LOG_FSYNC_INTERVAL,
+        )
+        self.snapshot_bytes = VECTOR_SNAPSHOT_BYTES
+        self.snapshot_interval = VECTOR_SNAPSHOT_INTERVAL
+        self._last_snapshot = time.monotonic()
+        self.partitions = UserPartitionIndex(ann_min_size=VECTOR_PARTITION_ANN_MIN_SIZE)
+        # 검색은 스레드에서 실행되므로 인덱스 변경/검색/저장을 직렬화
+        self._lock = threading.RLock()
+        # 추가와 (재)로드를 직렬화 (로드는 검색을 막지 않도록 _lock 밖에서 인덱스를 만들지만,
+        # 그동안 추가가 끼어들면 문서 저장소의 순번이 어긋나므로). 항상 _lock보다 먼저 잡는다.
+        self._write_lock = threading.RLock()
+        self._loading = False
         try:
-            self.embeddings = OpenAIEmbeddings(openai_api_key=self.api_key)
-            self.vector_store = None
+            # 모든 임베딩 호출은 콘텐츠 주소 캐시를 거친 뒤 공유 게이트웨이로 전달
+            self.embeddings = CachedEmbeddings(
+                GatewayEmbeddings(openai_gateway, model=EMBEDDING_MODEL),
+                model=EMBEDDING_MODEL,
+                cache_size=EMBEDDING_CACHE_SIZE,
+                disk_path=EMBEDDING_CACHE_PATH or None,
+            )
             self.text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=1000, chunk_overlap=200
             )
@@ -24,26 +131,391 @@ class VectorStoreService:
             logger.error(f"벡터 저장소 초기화 실패: {str(e)}")
             self.embeddings = None
 
+    def resolve_backend(self, store_path: Optional[str] = None) -> str:
+        """저장소 디렉터리의 파일로 문서 저장 방식 판별 (없으면 설정값)"""
+        store_path = store_path or self.vector_store_path
+        if os.path.exists(os.path.join(store_path, SQLiteDocstore.FILE_NAME)):
+            return "sqlite"
+        if os.path.exists(os.path.join(snapshot_dir(store_path), "index.pkl")):
+            return "pickle"
+        return self.docstore_backend
+
+    def _open_sqlite_docstore(self, store_path: str) -> SQLiteDocstore:
+        os.makedirs(store_path, exist_ok=True)
+        return SQLiteDocstore(
+            os.path.join(store_path, SQLiteDocstore.FILE_NAME),
+            read_only=self.read_only,
+        )
+
+    def _create_store(self, dim: int) -> FAISS:
+        """빈 FAISS 저장소 생성
+
+        IVF와 sq8/pq 양자화는 학습할 벡터가 없으므로 Flat으로 시작하고, 벡터가 쌓인 뒤
+        rebuild_index로 학습해 전환한다.
+        """
+        index = build_index(
+            self.index_type,
+            dim,
+            quantization=self.quantization,
+            hnsw_m=VECTOR_HNSW_M,
+            ef_construction=VECTOR_HNSW_EF_CONSTRUCTION,
+            pq_m=VECTOR_PQ_M,
+        )
+        if not index.is_trained:
+            logger.info(
+                f"{self.index_type}/{self.quantization} 인덱스는 "
+                "학습 전까지 Flat 인덱스로 시작합니다"
+            )
+            index = build_index("flat", dim)
+        self._prepare(index)
+        if self.resolve_backend(self.vector_store_path) == "sqlite":
+            docstore = self._open_sqlite_docstore(self.vector_store_path)
+            if docstore.count() > 0:
+                if self.snapshot_signature() is not None:
+                    docstore.close()
+                    raise RuntimeError(
+                        "스냅샷이 있는 문서 저장소를 빈 인덱스로 덮어쓸 수 없습니다"
+                    )
+                # 스냅샷이 없으면 기존 행은 어느 인덱스에도 속하지 않음 (로그 재생으로 다시 기록)
+                docstore.rewind(0)
+            index_to_docstore_id = SQLiteIndexMap(docstore)
+        else:
+            docstore = InMemoryDocstore()
+            index_to_docstore_id = {}
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def _prepare(self, index):
+        return prepare_index(
+            index, nprobe=VECTOR_IVF_NPROBE, ef_search=VECTOR_HNSW_EF_SEARCH
+        )
+
+    def index_info(self):
+        """현재 사용 중인 인덱스 종류와 검색 파라미터 (저장소가 없으면 None)"""
+        with self._lock:
+            if self.vector_store is None:
+                return None
+            info = describe_index(self.vector_store.index)
+        info["configured_type"] = self.index_type
+        info["configured_quantization"] = self.quantization
+        info["rerank_factor"] = self.rerank_factor
+        return info
+
+    def rebuild_index(
+        self,
+        index_type: Optional[str] = None,
+        quantization: Optional[str] = None,
+        nlist: int = VECTOR_IVF_NLIST,
+        train_size: int = VECTOR_IVF_TRAIN_SIZE,
+    ) -> bool:
+        """현재 벡터를 지정한 종류/양자화 방식의 인덱스로 다시 구성 (필요하면 학습 포함)
+
+        FAISS id 순서를 그대로 유지하므로 문서 저장소와 사용자 파티션은 바뀌지 않는다.
+        재구성한 인덱스는 스냅샷으로 저장해야 다른 워커에 반영된다.
+        """
+        index_type = index_type or self.index_type
+        quantization = quantization or self.quantization
+        if self.read_only:
+            logger.warning("읽기 전용 워커에서는 인덱스를 재구성할 수 없습니다")
+            return False
+        try:
+            with self._lock:
+                if self.vector_store is None:
+                    logger.warning("재구성할 벡터 저장소가 없습니다")
+                    return False
+                started = time.perf_counter()
+                index = rebuild_index(
+                    self.vector_store.index,
+                    index_type,
+                    quantization=quantization,
+                    nlist=nlist,
+                    hnsw_m=VECTOR_HNSW_M,
+                    ef_construction=VECTOR_HNSW_EF_CONSTRUCTION,
+                    pq_m=VECTOR_PQ_M,
+                    train_size=train_size,
+                )
+                self.vector_store.index = self._prepare(index)
+                self._index_mmapped = False
+                self.index_type = index_type
+                self.quantization = quantization
+            logger.info(
+                f"인덱스 재구성 완료: {describe_index(index)} "
+                f"({time.perf_counter() - started:.1f}초)"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"인덱스 재구성 실패: {str(e)}")
+            return False
+
+    def _uses_sqlite(self) -> bool:
+        return self.vector_store is not None and isinstance(
+            self.vector_store.docstore, SQLiteDocstore
+        )
+
+    def _snapshot_files(self, store_path: str):
+        """스냅샷을 구성하는 파일 (SQLite 문서 저장소는 추가 시점에 이미 기록됨)"""
+        if self.resolve_backend(store_path) == "sqlite":
+            return ("index.faiss",)
+        return ("index.faiss", "index.pkl")
+
+    def _add_embeddings(self, texts, embeddings, metadatas, ids):
+        """미리 계산된 임베딩을 FAISS 인덱스에 추가"""
+        if self._index_mmapped:
+            logger.info("mmap 인덱스에 쓰기 발생: 인덱스를 메모리로 복사")
+            self.vector_store.index = self._prepare(
+                faiss.clone_index(self.vector_store.index)
+            )
+            self._index_mmapped = False
+
+        if self.vector_store is None:
+            self._ensure_store(len(embeddings[0]))
+        start = self.vector_store.index.ntotal
+        self._append(texts, embeddings, metadatas, ids, start)
+        VECTOR_INDEX_SIZE.set(self.vector_store.index.ntotal)
+
+        # 새 벡터의 FAISS id를 사용자 파티션과 콘텐츠 해시 인덱스에 등록
+        for offset, (text, metadata) in enumerate(zip(texts, metadatas)):
+            user_id = metadata.get("user_id")
+            if user_id is not None:
+                self.partitions.add(user_id, (start + offset,))
+            self.content_hashes.add(user_id, text)
+
+    def _append(self, texts, embeddings, metadatas, ids, start: int):
+        """문서 저장소에 먼저 기록한 뒤 인덱스에 벡터를 추가
+
+        LangChain FAISS.add_embeddings는 인덱스에 먼저 추가하므로 문서 저장소가 순번
+        불일치로 거부하면 인덱스에만 벡터가 남는다. 순서를 바꿔 저장소가 거부하면
+        인덱스는 그대로 두고, 인덱스 추가가 실패하면 저장소의 행을 되돌린다.
+        """
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        if len(ids) != len(set(ids)):
+            raise ValueError("추가할 문서 id에 중복이 있습니다")
+        documents = {
+            doc_id: Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        }
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        docstore = self.vector_store.docstore
+        docstore.add(documents)
+        try:
+            self.vector_store.index.add(vectors)
+        except BaseException:
+            if isinstance(docstore, SQLiteDocstore):
+                docstore.rewind(start)
+            else:
+                docstore.delete(ids)
+            raise
+        self.vector_store.index_to_docstore_id.update(
+            {start + offset: doc_id for offset, doc_id in enumerate(ids)}
+        )
+
+    def _ensure_store(self, dim: int):
+        """첫 추가 전에 디스크의 저장소를 먼저 로드하고, 저장된 것이 없을 때만 새로 생성
+
+        로드 전에 빈 저장소를 만들어 추가하면 기존 문서와 같은 FAISS id를 쓰게 되므로
+        스냅샷이나 로그가 있으면 반드시 로드한 뒤 추가한다.
+        """
+        if not self._loading and (
+            self.snapshot_signature() is not None or self.log.size() > 0
+        ):
+            logger.info("로드 전 추가 요청: 디스크의 벡터 저장소를 먼저 로드")
+            self.load_local()
+            if self.vector_store is None:
+                raise RuntimeError(
+                    "기존 벡터 저장소를 로드하지 못해 추가할 수 없습니다"
+                )
+            return
+        self.vector_store = self._create_store(dim)
+        # SQLite 저장소는 해시를 파일에서 조회하므로 새 저장소에 연결
+        self.content_hashes.rebuild(self.vector_store)
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids=None):
+        """미리 계산된 임베딩을 중복 확인 후 추가 (증분 모드에서는 로그에도 기록)
+
+        같은 텍스트가 동시에 들어올 수 있으므로 중복 확인과 추가를 한 잠금 안에서 수행한다.
+        반환값은 사유별 중복 제외 수 {"exact", "near"}.
+        """
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        if self.read_only:
+            # 쓰기 워커가 중복 확인 후 반영
+            self.inbox.put(texts, embeddings, metadatas, ids)
+            return {"exact": 0, "near": 0}
+        with self._write_lock, self._lock:
+            (texts, embeddings, metadatas, ids), skipped = self._filter_duplicates(
+                texts, embeddings, metadatas, ids
+            )
+            if ids:
+                self._add_embeddings(texts, embeddings, metadatas, ids)
+
+            # 증분 저장 모드에서는 로그에 기록 (fsync는 persist에서 배치 처리)
+            if self.persist_mode == "incremental":
+                for doc_id, text, metadata, embedding in zip(
+                    ids, texts, metadatas, embeddings
+                ):
+                    self.log.append(doc_id, text, metadata, embedding)
+        return skipped
+
+    def drain_inbox(self, batch_size: int = 500) -> int:
+        """읽기 전용 워커가 넘긴 문서를 인덱스에 반영 (쓰기 워커에서 주기적으로 호출)
+
+        로그 fsync 이후에 대기열에서 삭제하므로 중간에 종료되어도 유실되지 않으며,
+        다시 전달된 레코드는 문서 id로 걸러낸다.
+        """
+        if self.read_only:
+            return 0
+        drained = 0
+        while True:
+            records = self.inbox.take(batch_size)
+            if not records:
+                break
+            texts, embeddings, metadatas, ids = [], [], [], []
+            for _, doc_id, text, metadata, embedding in records:
+                if self._contains_document(doc_id):
+                    continue
+                ids.append(doc_id)
+                texts.append(text)
+                metadatas.append(metadata)
+                embeddings.append(embedding)
+            if ids:
+                self.add_embeddings(texts, embeddings, metadatas, ids)
+                if not self.persist(force=True):
+                    # 로그에 기록되지 않았으므로 대기열에 남겨 두고 다음에 다시 시도
+                    break
+            self.inbox.ack(records[-1][0])
+            drained += len(records)
+        if drained:
+            logger.info(f"inbox에서 {drained}개 문서 반영")
+        return drained
+
+    def _contains_document(self, doc_id: str) -> bool:
+        with self._lock:
+            if self.vector_store is None:
+                return False
+            return isinstance(self.vector_store.docstore.search(doc_id), Document)
+
+    def filter_known(self, texts, user_ids):
+        """이미 저장된(또는 목록 안에서 반복되는) 텍스트를 제외한 (texts, user_ids)
+
+        임베딩 전에 호출해 완전 중복에 대한 임베딩 요청을 줄인다.
+        """
+        if not self.dedup:
+            return list(texts), list(user_ids)
+        seen = set()
+        kept_texts, kept_user_ids = [], []
+        for text, user_id in zip(texts, user_ids):
+            key = (user_id, text)
+            if key in seen or self.content_hashes.contains(user_id, text):
+                continue
+            seen.add(key)
+            kept_texts.append(text)
+            kept_user_ids.append(user_id)
+        return kept_texts, kept_user_ids
+
+    def _filter_duplicates(self, texts, embeddings, metadatas, ids):
+        """삽입 직전 중복 확인 (잠금 안에서 호출)
+
+        콘텐츠 해시로 완전 중복을, dedup_cosine > 0이면 같은 사용자 파티션에서 가장
+        가까운 벡터와의 코사인 유사도로 근접 중복을 제외한다. 같은 배치 안의 항목끼리도 비교한다.
+        반환값은 남은 (texts, embeddings, metadatas, ids)와 사유별 제외 수.
+        """
+        skipped = {"exact": 0, "near": 0}
+        if not self.dedup:
+            return (texts, embeddings, metadatas, ids), skipped
+
+        kept = ([], [], [], [])
+        batch_hashes = ContentHashIndex()
+        batch_vectors = {}
+        for text, embedding, metadata, doc_id in zip(texts, embeddings, metadatas, ids):
+            user_id = metadata.get("user_id")
+            if self.content_hashes.contains(user_id, text) or batch_hashes.contains(
+                user_id, text
+            ):
+                skipped["exact"] += 1
+                continue
+            if self.dedup_cosine > 0 and self._is_near_duplicate(
+                user_id, embedding, batch_vectors.get(user_id, ())
+            ):
+                skipped["near"] += 1
+                continue
+            batch_hashes.add(user_id, text)
+            batch_vectors.setdefault(user_id, []).append(embedding)
+            for column, value in zip(kept, (text, embedding, metadata, doc_id)):
+                column.append(value)
+
+        for reason, count in skipped.items():
+            if count:
+                VECTOR_DEDUP_SKIPPED.labels(reason=reason).inc(count)
+        return kept, skipped
+
+    def _is_near_duplicate(self, user_id, embedding, batch_vectors) -> bool:
+        """같은 사용자의 가장 가까운 저장 벡터(및 같은 배치의 벡터)와 코사인 유사도 비교"""
+        for other in batch_vectors:
+            if cosine_similarity(embedding, other) >= self.dedup_cosine:
+                return True
+        if (
+            user_id is None
+            or self.vector_store is None
+            or self.partitions.count(user_id) == 0
+        ):
+            return False
+        index = self.vector_store.index
+        hits = self.partitions.search(
+            index, np.asarray(embedding, dtype=np.float32), user_id, 1
+        )
+        if not hits:
+            return False
+        nearest = index.reconstruct(hits[0][0])
+        return cosine_similarity(embedding, nearest) >= self.dedup_cosine
+
     def add_texts(self, texts, user_id):
         """텍스트를 벡터 저장소에 추가"""
+        return self.add_user_texts(texts, [user_id] * len(texts))
+
+    def add_user_texts(self, texts, user_ids):
+        """여러 사용자의 텍스트를 한 번의 임베딩 요청으로 추가 (texts와 user_ids는 같은 길이)"""
         if not self.embeddings:
             logger.warning("임베딩 모델이 초기화되지 않았습니다")
             return False
 
         try:
+            # 이미 저장된 텍스트는 임베딩 전에 제외
+            requested = len(texts)
+            texts, user_ids = self.filter_known(texts, user_ids)
+            if len(texts) < requested:
+                VECTOR_DEDUP_SKIPPED.labels(reason="exact").inc(requested - len(texts))
+            if not texts:
+                logger.info(f"중복 텍스트 {requested}개 건너뜀")
+                return True
+
             # 메타데이터 추가
-            metadatas = [{"user_id": user_id} for _ in texts]
+            metadatas = [{"user_id": user_id} for user_id in user_ids]
 
             # 문서 분할
             docs = self.text_splitter.create_documents(texts, metadatas=metadatas)
+            if not docs:
+                return True
+
+            chunk_texts = [doc.page_content for doc in docs]
+            chunk_metadatas = [doc.metadata for doc in docs]
+            embeddings = self.embeddings.embed_documents(chunk_texts)
 
             # 벡터 저장소에 추가
-            if self.vector_store is None:
-                self.vector_store = FAISS.from_documents(docs, self.embeddings)
-                logger.info(f"새 벡터 저장소 생성: {len(docs)}개 문서 추가")
+            is_new = self.vector_store is None
+            skipped = self.add_embeddings(chunk_texts, embeddings, chunk_metadatas)
+
+            added = len(chunk_texts) - sum(skipped.values())
+            duplicates = requested - len(texts) + sum(skipped.values())
+            if is_new:
+                logger.info(f"새 벡터 저장소 생성: {added}개 문서 추가")
             else:
-                self.vector_store.add_documents(docs)
-                logger.info(f"기존 벡터 저장소에 {len(docs)}개 문서 추가")
+                logger.info(
+                    f"기존 벡터 저장소에 {added}개 문서 추가 (중복 {duplicates}개 제외)"
+                )
 
             return True
         except Exception as e:
@@ -56,22 +528,49 @@ class VectorStoreService:
         user_id: Optional[str] = None,
         k: int = 3,
         score_threshold: float = 0.3,
+        query_vector: Optional[List[float]] = None,
     ):
-        """쿼리와 관련된 문서 검색"""
+        """쿼리와 관련된 문서 검색 (query_vector를 주면 질의 임베딩을 다시 계산하지 않음)"""
         try:
             if not self.vector_store:
                 logger.warning("벡터 저장소가 로드되지 않았습니다")
                 return []
 
-            # 필터 설정
-            filter_dict = None
+            # 검색 실행 (사용자 지정 시 해당 사용자 파티션만 검색)
             if user_id:
-                filter_dict = {"user_id": user_id}
+                if self.partitions.count(user_id) == 0:
+                    return []
+                # 질의 임베딩(네트워크 호출)은 잠금 밖에서 수행
+                if query_vector is None:
+                    query_vector = self.embeddings.embed_query(query)
+                query_vector = np.asarray(query_vector, dtype=np.float32)
+                with self._lock, FAISS_SEARCH_LATENCY.labels(scope="user").time():
+                    fetch_k = self._fetch_k(k)
+                    docs_with_scores = self._search_partition(
+                        query_vector,
+                        user_id,
+                        fetch_k,
+                        score_threshold if fetch_k == k else None,
+                    )
+                FAISS_SEARCH_HITS.labels(scope="user").observe(len(docs_with_scores))
+            else:
+                if query_vector is None:
+                    query_vector = self.embeddings.embed_query(query)
+                with self._lock, FAISS_SEARCH_LATENCY.labels(scope="global").time():
+                    fetch_k = self._fetch_k(k)
+                    docs_with_scores = (
+                        self.vector_store.similarity_search_with_score_by_vector(
+                            query_vector,
+                            k=fetch_k,
+                            score_threshold=score_threshold if fetch_k == k else None,
+                        )
+                    )
+                FAISS_SEARCH_HITS.labels(scope="global").observe(len(docs_with_scores))
 
-            # 검색 실행
-            docs_with_scores = self.vector_store.similarity_search_with_score(
-                query, k=k, filter=filter_dict, score_threshold=score_threshold
-            )
+            if fetch_k != k:
+                docs_with_scores = self._rerank(
+                    query_vector, docs_with_scores, k, score_threshold
+                )
 
             # 유사도 점수 메타데이터에 추가
             docs = []
@@ -85,44 +584,354 @@ class VectorStoreService:
             logger.error(f"검색 실패: {str(e)}")
             return []
 
+    def _search_partition(self, query_vector, user_id, k, score_threshold):
+        """사용자 파티션 내에서만 검색 (후처리 필터 대신 사전 필터링)"""
+        hits = self.partitions.search(self.vector_store.index, query_vector, user_id, k)
+
+        results = []
+        for faiss_id, score in hits:
+            if not self._passes_threshold(score, score_threshold):
+                continue
+            doc_id = self.vector_store.index_to_docstore_id[faiss_id]
+            doc = self.vector_store.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                continue
+            results.append(
+                (
+                    Document(
+                        page_content=doc.page_content, metadata=dict(doc.metadata)
+                    ),
+                    score,
+                )
+            )
+        return results
+
+    def _passes_threshold(self, score, score_threshold) -> bool:
+        """LangChain FAISS와 동일한 임계값 규칙 (L2 거리는 작을수록 유사)"""
+        if score_threshold is None:
+            return True
+        if self.vector_store.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return score >= score_threshold
+        return score <= score_threshold
+
+    def _fetch_k(self, k: int) -> int:
+        """양자화 인덱스에서 재정렬을 위해 뽑을 후보 수"""
+        if self.rerank_factor <= 1 or not hasattr(self.embeddings, "lookup"):
+            return k
+        if quantization_of(self.vector_store.index) == "none":
+            return k
+        return k * self.rerank_factor
+
+    def _rerank(self, query_vector, docs_with_scores, k, score_threshold):
+        """양자화로 근사된 점수를 임베딩 캐시의 원본 벡터로 다시 계산해 상위 k개 선택
+
+        캐시에 원본 벡터가 없는 후보는 근사 점수를 그대로 사용한다 (API는 호출하지 않음).
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        inner_product = (
+            self.vector_store.index.metric_type == faiss.METRIC_INNER_PRODUCT
+        )
+        rescored = []
+        exact = 0
+        for doc, score in docs_with_scores:
+            vector = self.embeddings.lookup(doc.page_content)
+            if vector is not None:
+                vector = np.asarray(vector, dtype=np.float32)
+                if inner_product:
+                    score = float(vector @ query)
+                else:
+                    diff = vector - query
+                    score = float(diff @ diff)
+                exact += 1
+            rescored.append((doc, score))
+
+        rescored.sort(key=lambda item: -item[1] if inner_product else item[1])
+        logger.debug(f"재정렬: 후보 {len(rescored)}개 중 {exact}개 원본 벡터 사용")
+        return [
+            (doc, score)
+            for doc, score in rescored[:k]
+            if self._passes_threshold(score, score_threshold)
+        ]
+
+    def persist(self, force: bool = False) -> bool:
+        """대화 추가 후 호출되는 저장 진입점
+
+        증분 모드에서는 로그를 배치 단위로 fsync하고, 로그 크기나 경과 시간이
+        임계값을 넘을 때만 전체 스냅샷으로 압축한다. full 모드에서는 매번 전체 저장한다.
+        force=True면 배치 크기와 관계없이 즉시 fsync한다.
+        """
+        if self.read_only:
+            return True
+        if self.persist_mode != "incremental":
+            return self.save_local()
+
+        try:
+            with self._lock:
+                self.log.flush(force=force)
+                log_size = self.log.size()
+            elapsed = time.monotonic() - self._last_snapshot
+            if log_size >= self.snapshot_bytes or (
+                log_size > 0 and elapsed >= self.snapshot_interval
+            ):
+                logger.info(f"벡터 로그 압축 시작 (로그 크기: {log_size} bytes)")
+                return self.save_local()
+            return True
+        except Exception as e:
+            logger.error(f"벡터 로그 저장 실패: {str(e)}")
+            return False
+
     def save_local(self, path: Optional[str] = None) -> bool:
-        """벡터 저장소를 로컬에 저장"""
+        """벡터 저장소를 로컬에 저장 (새 파일에 쓴 뒤 원자적으로 교체/전환)"""
         try:
             if not self.vector_store:
                 logger.warning("저장할 벡터 저장소가 없습니다")
                 return False
 
             store_path = path or self.vector_store_path
+            if self.read_only and os.path.abspath(store_path) == os.path.abspath(
+                self.vector_store_path
+            ):
+                logger.warning("읽기 전용 워커는 공유 스냅샷을 저장하지 않습니다")
+                return False
             logger.info(f"벡터 저장소 저장 중: {store_path}")
 
-            self.vector_store.save_local(store_path)
+            snapshot_started = time.perf_counter()
+            with self._lock:
+                if self._uses_sqlite():
+                    # 문서는 SQLite에 이미 있으므로 인덱스만 기록 (파일 하나라 교체로 충분)
+                    tmp_path = os.path.join(store_path, ".snapshot")
+                    os.makedirs(tmp_path, exist_ok=True)
+                    tmp_file = os.path.join(tmp_path, "index.faiss")
+                    faiss.write_index(self.vector_store.index, tmp_file)
+                    if os.path.abspath(store_path) != os.path.abspath(
+                        self.vector_store_path
+                    ):
+                        self.vector_store.docstore.backup(
+                            os.path.join(store_path, SQLiteDocstore.FILE_NAME)
+                        )
+                    with open(tmp_file, "rb") as f:
+                        os.fsync(f.fileno())
+                    os.replace(tmp_file, os.path.join(store_path, "index.faiss"))
+                else:
+                    self._write_generation(store_path)
+
+                # 스냅샷에 로그 내용이 모두 반영되었으므로 로그 비우기
+                if os.path.abspath(store_path) == os.path.abspath(
+                    self.vector_store_path
+                ):
+                    self.log.reset()
+                    self._last_snapshot = time.monotonic()
+                    # 자기 자신이 쓴 스냅샷은 다시 로드하지 않도록 시그니처 기록
+                    self.loaded_signature = self.snapshot_signature()
 
+            SNAPSHOT_LATENCY.observe(time.perf_counter() - snapshot_started)
+            VECTOR_SNAPSHOT_SIZE.set(
+                os.path.getsize(os.path.join(snapshot_dir(store_path), "index.faiss"))
+            )
             logger.info(f"벡터 저장소 저장 완료: {store_path}")
             return True
         except Exception as e:
             logger.error(f"벡터 저장소 저장 실패: {str(e)}")
             return False
 
-    def load_local(self, path: Optional[str] = None) -> bool:
-        """로컬에서 벡터 저장소 로드"""
+    def _write_generation(self, store_path: str):
+        """pickle 스냅샷을 새 세대 디렉터리에 쓰고 CURRENT를 원자적으로 교체
+
+        index.faiss와 index.pkl을 따로 교체하면 그 사이에 로드한 워커가 서로 다른 세대의
+        인덱스와 문서를 읽을 수 있으므로 포인터 파일 하나의 교체로 전환한다. 직전 세대는
+        로드 중인 워커를 위해 남기고 그보다 오래된 세대는 삭제한다.
+        """
+        previous = snapshot_dir(store_path)
+        stamp = time.time_ns()
+        while os.path.exists(os.path.join(store_path, f"{SNAPSHOT_PREFIX}{stamp}")):
+            stamp += 1
+        name = f"{SNAPSHOT_PREFIX}{stamp}"
+        generation_path = os.path.join(store_path, name)
+        self.vector_store.save_local(generation_path)
+        for file_name in ("index.faiss", "index.pkl"):
+            with open(os.path.join(generation_path, file_name), "rb") as f:
+                os.fsync(f.fileno())
+
+        pointer = os.path.join(store_path, SNAPSHOT_POINTER)
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{pointer}.tmp", pointer)
+
+        keep = {name, os.path.basename(previous)}
+        for entry in os.listdir(store_path):
+            if entry.startswith(SNAPSHOT_PREFIX) and entry not in keep:
+                shutil.rmtree(os.path.join(store_path, entry), ignore_errors=True)
+        if previous != store_path:
+            # 이전 형식의 루트 스냅샷은 한 세대 전 것이므로 이제 삭제
+            for file_name in ("index.faiss", "index.pkl"):
+                try:
+                    os.remove(os.path.join(store_path, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def snapshot_signature(self, path: Optional[str] = None):
+        """현재 스냅샷 세대와 파일의 (수정 시각, 크기) 시그니처 (파일이 없으면 None)"""
+        store_path = path or self.vector_store_path
+        snapshot = snapshot_dir(store_path)
         try:
-            store_path = path or self.vector_store_path
-            index_path = os.path.join(store_path, "index.faiss")
-            pkl_path = os.path.join(store_path, "index.pkl")
+            return (os.path.basename(snapshot),) + tuple(
+                (stat.st_mtime_ns, stat.st_size)
+                for stat in (
+                    os.stat(os.path.join(snapshot, name))
+                    for name in self._snapshot_files(store_path)
+                )
+            )
+        except OSError:
+            return None
 
-            if not os.path.exists(index_path) or not os.path.exists(pkl_path):
-                logger.warning(f"벡터 저장소 파일이 '{store_path}'에 존재하지 않습니다")
-                return False
+    def reload_if_changed(self) -> bool:
+        """디스크의 스냅샷이 마지막으로 로드/저장한 것과 다를 때만 다시 로드"""
+        signature = self.snapshot_signature()
+        if signature is None or signature == self.loaded_signature:
+            return False
+        logger.info(f"벡터 저장소 스냅샷 변경 감지 (세대 {self.generation})")
+        return self.load_local()
 
-            logger.info(f"벡터 저장소 로드 중: {store_path}")
+    def _read_snapshot(self, store_path):
+        """스냅샷 로드 (use_mmap이면 index.faiss를 메모리 매핑으로 읽음)
+
+        SQLite 문서 저장소는 연결만 열고 문서는 검색 시점에 필요한 것만 읽는다.
+        """
+        snapshot = snapshot_dir(store_path)
+        index_path = os.path.join(snapshot, "index.faiss")
+        if self.resolve_backend(store_path) == "sqlite":
+            index = self._read_index(index_path)
+            docstore = self._open_sqlite_docstore(store_path)
+            # 스냅샷 이후 기록된 문서는 로그 재생으로 다시 추가됨
+            docstore.rewind(index.ntotal)
+            return FAISS(
+                embedding_function=self.embeddings,
+                index=index,
+                docstore=docstore,
+                index_to_docstore_id=SQLiteIndexMap(docstore),
+            )
 
+        if not self.use_mmap:
             # 보안 경고를 무시하고 pickle 파일 로드 허용
-            self.vector_store = FAISS.load_local(
-                store_path, self.embeddings, allow_dangerous_deserialization=True
+            return FAISS.load_local(
+                snapshot, self.embeddings, allow_dangerous_deserialization=True
             )
 
-            logger.info(f"벡터 저장소 로드 완료: {store_path}")
+        index = self._read_index(index_path)
+        with open(os.path.join(snapshot, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def _read_index(self, index_path):
+        if not self.use_mmap:
+            return faiss.read_index(index_path)
+        io_flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        return faiss.read_index(index_path, io_flags)
+
+    def load_local(self, path: Optional[str] = None) -> bool:
+        """로컬에서 벡터 저장소 로드 (스냅샷 로드 후 증분 로그 재생)
+
+        새 인덱스와 사용자 파티션/콘텐츠 해시는 잠금 밖에서 만든 뒤 잠금 안에서 교체하므로
+        다시 로드하는 동안에도 검색이 막히지 않는다. 로그 재생은 쓰기 워커만 수행하며
+        (로그를 쓰는 쪽이므로), 읽기 전용 워커는 쓰기 워커가 압축한 스냅샷으로 새 문서를 반영한다.
+        """
+        with self._write_lock:
+            return self._load_local(path)
+
+    def _load_local(self, path: Optional[str]) -> bool:
+        try:
+            store_path = path or self.vector_store_path
+            own_store = os.path.abspath(store_path) == os.path.abspath(
+                self.vector_store_path
+            )
+            signature = self.snapshot_signature(store_path)
+            store = None
+            partitions = UserPartitionIndex(ann_min_size=self.partitions.ann_min_size)
+            content_hashes = ContentHashIndex()
+            if signature is not None:
+                logger.info(f"벡터 저장소 로드 중: {store_path}")
+                store = self._read_snapshot(store_path)
+                self._prepare(store.index)
+                partitions.rebuild(store)
+                # SQLite는 해시를 파일에서 조회하므로 연결만 함 (중복 제거가 꺼져 있어도)
+                if self.dedup or isinstance(store.docstore, SQLiteDocstore):
+                    content_hashes.rebuild(store)
+            else:
+                logger.warning(f"벡터 저장소 파일이 '{store_path}'에 존재하지 않습니다")
+
+            with self._lock:
+                previous = self.vector_store
+                self.vector_store = store
+                self.partitions = partitions
+                self.content_hashes = content_hashes
+                self._index_mmapped = store is not None and self.use_mmap
+                if previous is not None and isinstance(
+                    previous.docstore, SQLiteDocstore
+                ):
+                    previous.docstore.close()
+                if own_store:
+                    if not self.read_only:
+                        self._loading = True
+                        try:
+                            self._replay_log()
+                        finally:
+                            self._loading = False
+                    self.loaded_signature = signature
+                    self.generation += 1
+                if self.vector_store is not None:
+                    VECTOR_INDEX_SIZE.set(self.vector_store.index.ntotal)
+
+            if self.vector_store is None:
+                return False
+
+            logger.info(f"벡터 저장소 로드 완료: {store_path} (세대 {self.generation})")
             return True
         except Exception as e:
             logger.error(f"벡터 저장소 로드 실패: {str(e)}")
             return False
+
+    def _has_document(self, doc_id: str, existing: set) -> bool:
+        if doc_id in existing:
+            return True
+        return self._uses_sqlite() and self.vector_store.docstore.contains(doc_id)
+
+    def _replay_log(self):
+        """스냅샷 이후 로그에 기록된 문서를 인덱스에 재적용"""
+        # 아직 버퍼에 있는 레코드도 읽히도록 파일에 기록
+        self.log.flush()
+        existing = (
+            set(self.vector_store.index_to_docstore_id.values())
+            if self.vector_store and not self._uses_sqlite()
+            else set()
+        )
+        texts, embeddings, metadatas, ids = [], [], [], []
+        for doc_id, text, metadata, embedding in self.log.replay():
+            if self._has_document(doc_id, existing):
+                continue
+            existing.add(doc_id)
+            ids.append(doc_id)
+            texts.append(text)
+            metadatas.append(metadata)
+            embeddings.append(embedding)
+
+        if ids:
+            self._add_embeddings(texts, embeddings, metadatas, ids)
+            logger.info(f"벡터 로그 재생: {len(ids)}개 문서 복원")
+
+    def _close_docstore(self):
+        if self._uses_sqlite():
+            self.vector_store.docstore.close()
+
+    def close(self):
+        """남은 로그 레코드를 디스크에 기록하고 문서 저장소 연결 종료"""
+        self.log.close()
+        self.inbox.close()
+        with self._lock:
+            self._close_docstore()
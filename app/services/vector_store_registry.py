@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 (단일 프로세스로 실행한다고 가정)
+    fcntl = None
+
+from app.core.config import (VECTOR_INBOX_POLL_INTERVAL, VECTOR_STORE_MMAP,
+                             VECTOR_STORE_PATH, VECTOR_STORE_RELOAD_INTERVAL,
+                             VECTOR_STORE_ROLE)
+from app.services.vector_store import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+WRITER_LOCK_FILE = "writer.lock"
+WRITER_LOCK_HELD = (
+    "서버의 쓰기 워커가 writer.lock을 잡고 있습니다. 서버를 멈춘 뒤 다시 실행하세요"
+)
+
+
+def acquire_writer_lock(store_path: str):
+    """writer.lock을 비차단으로 잡고 잠금 파일을 반환 (다른 프로세스가 잡고 있으면 None)
+
+    잠금은 파일을 닫거나 프로세스가 종료되면 OS가 해제한다.
+    """
+    os.makedirs(store_path, exist_ok=True)
+    lock_file = open(os.path.join(store_path, WRITER_LOCK_FILE), "a+")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+@contextmanager
+def writer_lock(store_path: str):
+    """유지보수 스크립트가 저장소에 쓰는 동안 writer.lock을 잡음
+
+    서버의 쓰기 워커가 이미 잡고 있으면 False를 넘기며, 이때 스크립트는 저장소를
+    건드리지 않고 종료해야 한다 (서버를 멈춘 뒤 다시 실행).
+    """
+    lock_file = acquire_writer_lock(store_path)
+    try:
+        yield lock_file is not None
+    finally:
+        if lock_file is not None:
+            lock_file.close()
+
+
+class VectorStoreRegistry:
+    """프로세스 전역에서 하나의 벡터 저장소 인스턴스를 공유하기 위한 레지스트리
+
+    라우터마다 따로 인덱스를 만들지 않도록 get()으로 같은 인스턴스를 돌려주고,
+    디스크의 스냅샷이 바뀐 경우에만 새 세대로 교체한다.
+
+    저장소(로그, 스냅샷, 문서 저장소)에 쓰는 워커는 writer.lock을 잡은 프로세스 하나뿐이다.
+    쓰기 워커는 인덱스를 힙에 올려 두고 다른 워커가 inbox에 넣은 문서를 주기적으로 반영하며,
+    읽기 전용 워커는 (use_mmap이면) 스냅샷을 mmap으로 공유하고 쓰기 워커가 새 스냅샷을
+    남기면 다시 로드한다. 따라서 읽기 전용 워커에서는 다른 워커가 추가한 문서가 다음
+    스냅샷 압축 이후부터 검색된다. 쓰기 워커가 종료되면 다음 확인 주기에 다른 워커가
+    잠금을 잡고 로그를 재생한 뒤 쓰기 워커가 된다. 유지보수 스크립트도 writer_lock()으로
+    같은 잠금을 잡으므로 서버가 쓰는 중에는 실행되지 않으며, 쓰기 워커도 스냅샷 시그니처를
+    확인해 서버 밖에서 저장된 스냅샷을 다시 로드한다.
+    """
+
+    LOCK_FILE = WRITER_LOCK_FILE
+
+    def __init__(
+        self,
+        vector_store_path: str = VECTOR_STORE_PATH or "vector_store",
+        use_mmap: bool = VECTOR_STORE_MMAP,
+        reload_interval: float = VECTOR_STORE_RELOAD_INTERVAL,
+        role: str = VECTOR_STORE_ROLE,
+        poll_interval: float = VECTOR_INBOX_POLL_INTERVAL,
+    ):
+        self.vector_store_path = vector_store_path
+        self.use_mmap = use_mmap
+        self.reload_interval = reload_interval
+        self.role = role
+        self.poll_interval = poll_interval
+        self._service: Optional[VectorStoreService] = None
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_writer(self) -> bool:
+        return self._service is not None and not self._service.read_only
+
+    def get(self) -> VectorStoreService:
+        """공유 벡터 저장소 서비스 반환 (처음 호출 시 생성, 로드는 load()에서)"""
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    writer = self._acquire_writer_lock()
+                    service = VectorStoreService(
+                        vector_store_path=self.vector_store_path,
+                        # 쓰기 워커의 인덱스는 어차피 첫 추가 때 힙으로 복사되므로 mmap 미사용
+                        use_mmap=self.use_mmap and not writer,
+                    )
+                    service.read_only = not writer
+                    self._service = service
+                    logger.info(
+                        f"벡터 저장소 역할: {'쓰기' if writer else '읽기 전용'} 워커 (pid {os.getpid()})"
+                    )
+        return self._service
+
+    def _acquire_writer_lock(self) -> bool:
+        """writer.lock을 잡으면 True (프로세스가 종료되면 OS가 잠금을 해제)"""
+        if self.role == "reader":
+            return False
+        lock_file = acquire_writer_lock(self.vector_store_path)
+        if lock_file is None:
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _try_promote(self) -> bool:
+        """쓰기 워커가 종료되어 잠금이 풀렸으면 쓰기 워커로 전환하고 로그를 재생"""
+        service = self.get()
+        if not service.read_only or not self._acquire_writer_lock():
+            return False
+        logger.info("writer.lock 획득: 쓰기 워커로 전환")
+        service.use_mmap = False
+        service.read_only = False
+        service.load_local()
+        return True
+
+    def load(self) -> bool:
+        """스냅샷 로드 및 증분 로그 재생 (앱 시작 시 한 번 호출)"""
+        return self.get().load_local()
+
+    def reload_if_changed(self) -> bool:
+        """스냅샷 파일이 바뀐 경우에만 새 세대 로드"""
+        return self.get().reload_if_changed()
+
+    def start_watching(self):
+        """inbox 반영(쓰기 워커)과 외부 스냅샷 변경 확인을 수행하는 태스크 시작"""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self):
+        last_reload = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if not self.is_writer:
+                    await asyncio.to_thread(self._try_promote)
+                if self.is_writer:
+                    await asyncio.to_thread(self.get().drain_inbox)
+                if (
+                    self.reload_interval > 0
+                    and time.monotonic() - last_reload >= self.reload_interval
+                ):
+                    # 쓰기 워커도 확인: 자기 스냅샷은 시그니처가 같아 다시 로드하지 않음
+                    last_reload = time.monotonic()
+                    await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                logger.error(f"벡터 저장소 확인 실패: {str(e)}")
+
+    def close(self):
+        if self._service is not None:
+            if self.is_writer:
+                # 종료 전에 남은 inbox 레코드를 반영
+                self._service.drain_inbox()
+            self._service.close()
+            self._service = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+vector_store_registry = VectorStoreRegistry()
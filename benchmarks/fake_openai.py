@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 로컬 부하 테스트용 OpenAI 호환 서버
+# chat completions(일반/스트리밍), embeddings, models 엔드포인트만 흉내 낸다.
+
+FILLER = (
+    "말씀해주셔서 감사해요. 그런 상황이라면 누구라도 지치고 힘들 수 있어요. "
+    "잠시 숨을 고르고 지금 느끼는 감정을 그대로 바라보는 것부터 시작해보면 어떨까요? "
+    "오늘 하루 중 가장 마음에 남았던 순간은 언제였나요?"
+).split()
+
+
+class FakeOpenAISettings:
+    def __init__(
+        self,
+        first_token_latency=0.3,
+        tokens_per_sec=50.0,
+        response_tokens=60,
+        embedding_latency=0.05,
+        embedding_dim=1536,
+        rate_limit_ratio=0.0,
+        jitter=0.1,
+    ):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_sec = tokens_per_sec
+        self.response_tokens = response_tokens
+        self.embedding_latency = embedding_latency
+        self.embedding_dim = embedding_dim
+        self.rate_limit_ratio = rate_limit_ratio
+        self.jitter = jitter
+
+
+def fake_embedding(text: str, dim: int):
+    """텍스트 해시로 시드를 정한 결정적 단위 벡터 (같은 텍스트는 같은 벡터)"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+def create_app(settings: FakeOpenAISettings) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    app.state.settings = settings
+    app.state.requests = {"chat": 0, "chat_stream": 0, "embeddings": 0, "429": 0}
+
+    def jittered(seconds):
+        return max(
+            0.0, seconds * random.uniform(1 - settings.jitter, 1 + settings.jitter)
+        )
+
+    def rate_limited():
+        if settings.rate_limit_ratio and random.random() < settings.rate_limit_ratio:
+            app.state.requests["429"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "0.1"},
+                content={
+                    "error": {
+                        "message": "Rate limit reached (fake)",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+            )
+        return None
+
+    def reply_tokens(messages):
+        system = " ".join(
+            m.get("content", "") for m in messages if m["role"] == "system"
+        )
+        if "감정을 따로 분석" in system:
+            # 감정 분석 배치 요청에는 메시지 id별 JSON 결과로 응답
+            items = json.loads(messages[-1]["content"])
+            results = [
+                {"id": item["id"], "emotion": "중립", "intensity": 3} for item in items
+            ]
+            return [json.dumps({"results": results}, ensure_ascii=False)]
+        if "감정을 분석" in system:
+            # 감정 분석 요청에는 파서가 기대하는 형식으로 응답
+            return ["감정:", "중립\n", "강도:", "3"]
+        return [FILLER[i % len(FILLER)] + " " for i in range(settings.response_tokens)]
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {
+            "object": "list",
+            "data": [
+                {
+                    "id": "gpt-3.5-turbo",
+                    "object": "model",
+                    "created": 0,
+                    "owned_by": "fake",
+                }
+            ],
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        limited = rate_limited()
+        if limited:
+            return limited
+
+        body = await request.json()
+        tokens = reply_tokens(body.get("messages", []))[
+            : body.get("max_tokens") or None
+        ]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "gpt-3.5-turbo")
+        token_delay = 1.0 / settings.tokens_per_sec if settings.tokens_per_sec else 0.0
+
+        if not body.get("stream"):
+            app.state.requests["chat"] += 1
+            await asyncio.sleep(
+                jittered(settings.first_token_latency + token_delay * len(tokens))
+            )
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 0,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": len(tokens),
+                },
+            }
+
+        app.state.requests["chat_stream"] += 1
+
+        def chunk(delta, finish_reason=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def stream():
+            await asyncio.sleep(jittered(settings.first_token_latency))
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                yield chunk({"content": token})
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        limited = rate_limited()
+        if limited:
+            return limited
+
+        app.state.requests["embeddings"] += 1
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await asyncio.sleep(jittered(settings.embedding_latency))
+        return {
+            "object": "list",
+            "model": body.get("model"),
+            "data": [
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": fake_embedding(str(text), settings.embedding_dim),
+                }
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.requests
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="초")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="초")
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument(
+        "--rate-limit-ratio", type=float, default=0.0, help="429를 반환할 요청 비율"
+    )
+
+
+def settings_from_args(args) -> FakeOpenAISettings:
+    return FakeOpenAISettings(
+        first_token_latency=args.first_token_latency,
+        tokens_per_sec=args.tokens_per_sec,
+        response_tokens=args.response_tokens,
+        embedding_latency=args.embedding_latency,
+        embedding_dim=args.embedding_dim,
+        rate_limit_ratio=args.rate_limit_ratio,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="부하 테스트용 가짜 OpenAI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(settings_from_args(args)), host=args.host, port=args.port)
@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+# /chat, /chat-stream 부하 생성기
+# 동시성 단계별로 RPS, 지연 시간 p50/p95/p99, 스트리밍 TTFT를 측정한다.
+
+SAMPLE_MESSAGES = [
+    "안녕하세요, 오늘 하루가 너무 길게 느껴져요.",
+    "요즘 회사 일 때문에 계속 불안하고 잠을 잘 못 자요.",
+    "친구랑 싸워서 마음이 좀 슬퍼요.",
+    "시험에 합격해서 너무 기뻐요!",
+    "배고파",
+    "사소한 일에도 자꾸 짜증이 나는데 어떻게 해야 할까요?",
+    "주말에 뭘 하면 기분 전환이 될까요?",
+    "발표가 다가오니까 긴장돼서 아무것도 손에 안 잡혀요.",
+]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """nearest-rank 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+    }
+
+
+async def chat_once(client: httpx.AsyncClient, user_id: str, message: str):
+    started = time.perf_counter()
+    response = await client.post("/chat", json={"user_id": user_id, "message": message})
+    response.raise_for_status()
+    return time.perf_counter() - started, None
+
+
+async def chat_stream_once(client: httpx.AsyncClient, user_id: str, message: str):
+    """스트림을 끝까지 읽고 (전체 시간, 첫 delta 이벤트까지 시간) 반환"""
+    started = time.perf_counter()
+    ttft = None
+    event = "message"
+    async with client.stream(
+        "POST", "/chat-stream", json={"user_id": user_id, "message": message}
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+                continue
+            if not line.startswith("data:"):
+                continue
+            payload = json.loads(line[len("data:") :].strip() or "{}")
+            if event == "error":
+                raise RuntimeError(payload["error"])
+            if event == "done":
+                break
+            if event == "delta" and ttft is None:
+                ttft = time.perf_counter() - started
+    return time.perf_counter() - started, ttft
+
+
+async def run_level(
+    base_url: str,
+    endpoint: str,
+    concurrency: int,
+    total_requests: int,
+    users: int,
+    timeout: float,
+):
+    """concurrency개의 워커가 total_requests개의 요청을 나눠 보냄"""
+    request_fn = chat_stream_once if endpoint == "chat-stream" else chat_once
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(total_requests))
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, limits=limits
+    ) as client:
+
+        async def worker():
+            for i in counter:
+                user_id = f"bench-user-{i % users}"
+                message = random.choice(SAMPLE_MESSAGES)
+                try:
+                    latency, ttft = await request_fn(client, user_id, message)
+                except Exception as e:
+                    key = type(e).__name__
+                    errors[key] = errors.get(key, 0) + 1
+                    continue
+                latencies.append(latency)
+                if ttft is not None:
+                    ttfts.append(ttft)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency": summarize(latencies),
+    }
+    if endpoint == "chat-stream":
+        result["ttft"] = summarize(ttfts)
+    return result
+
+
+def print_result(result):
+    latency = result["latency"]
+    line = (
+        f"{result['endpoint']:<12} c={result['concurrency']:<4} "
+        f"ok={result['succeeded']:<5} err={sum(result['errors'].values()):<4} "
+        f"rps={result['rps']:<8} "
+        f"p50={latency['p50_ms']}ms p95={latency['p95_ms']}ms p99={latency['p99_ms']}ms"
+    )
+    if "ttft" in result:
+        ttft = result["ttft"]
+        line += f" | ttft p50={ttft['p50_ms']}ms p95={ttft['p95_ms']}ms p99={ttft['p99_ms']}ms"
+    print(line, flush=True)
+
+
+async def main(args):
+    endpoints = ["chat", "chat-stream"] if args.endpoint == "both" else [args.endpoint]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = []
+    for endpoint in endpoints:
+        if args.warmup:
+            await run_level(
+                args.url, endpoint, 1, args.warmup, args.users, args.timeout
+            )
+        for level in levels:
+            result = await run_level(
+                args.url,
+                endpoint,
+                level,
+                max(args.requests, level),
+                args.users,
+                args.timeout,
+            )
+            print_result(result)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"url": args.url, "created_at": time.time(), "results": results},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="채팅 API 부하 생성기")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--endpoint", choices=["chat", "chat-stream", "both"], default="both"
+    )
+    parser.add_argument(
+        "--concurrency", default="1,4,16,64", help="쉼표로 구분한 동시성 단계"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="단계별 요청 수")
+    parser.add_argument("--users", type=int, default=50, help="요청에 사용할 사용자 수")
+    parser.add_argument("--warmup", type=int, default=5, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="결과 JSON 파일 경로")
+    asyncio.run(main(parser.parse_args()))
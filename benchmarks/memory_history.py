@@ -0,0 +1,101 @@
+import asyncio
+import bisect
+import datetime
+import itertools
+from collections import defaultdict
+
+from app.core.metrics import MONGO_LATENCY
+from app.models import Message
+from app.services.chat_history import parse_history_cursor
+
+# ChatHistoryService와 같은 비동기 인터페이스를 가진 인메모리 대화 기록 저장소
+# 부하 테스트에서 MongoDB 없이 앱을 실행할 때 사용한다.
+
+
+class InMemoryChatHistoryService:
+    def __init__(self, latency: float = 0.0):
+        # 네트워크 왕복을 흉내 내기 위한 작업당 지연(초)
+        self.latency = latency
+        # user_id → (timestamp, seq, is_user, content) 목록 (시간순 정렬 유지)
+        self._messages = defaultdict(list)
+        self._seq = itertools.count()
+
+    async def _roundtrip(self):
+        await asyncio.sleep(self.latency)
+
+    async def add_message(self, user_id, message):
+        return await self.add_messages([(user_id, message)])
+
+    async def add_messages(self, entries):
+        with MONGO_LATENCY.labels(operation="insert_many", kind="write").time():
+            await self._roundtrip()
+            for user_id, message in entries:
+                timestamp = message.timestamp or datetime.datetime.now()
+                bisect.insort(
+                    self._messages[user_id],
+                    (timestamp, next(self._seq), message.is_user, message.content),
+                )
+        return True
+
+    async def ensure_indexes(self):
+        pass
+
+    async def get_history(self, user_id, limit=20):
+        messages, _ = await self.get_history_page(user_id, limit=limit)
+        return messages
+
+    async def get_history_page(self, user_id, limit=20, before=None):
+        with MONGO_LATENCY.labels(operation="find_history", kind="read").time():
+            await self._roundtrip()
+            rows = self._messages.get(user_id, [])
+            if before:
+                # 커서 형식 검증은 실제 서비스와 같은 함수를 사용 (시간 기준으로만 자름)
+                parse_history_cursor(before)
+                timestamp = datetime.datetime.fromisoformat(before.partition("_")[0])
+                rows = rows[: bisect.bisect_left(rows, (timestamp,))]
+            page = rows[-limit:]
+
+        messages = [
+            Message(is_user=is_user, content=content, timestamp=timestamp)
+            for timestamp, _, is_user, content in page
+        ]
+        next_before = None
+        if len(page) == limit:
+            next_before = page[0][0].isoformat()
+        return messages, next_before
+
+    async def iter_history(self, user_id, since=None, until=None, batch_size=500):
+        """ChatHistoryService.iter_history와 같은 순서((timestamp, 삽입 순) 오름차순)와
+        필드로 메시지를 반환 (since 이상, until 미만)
+
+        batch_size개마다 왕복 지연을 한 번 흉내 내고, 다음 배치는 마지막으로 보낸
+        (timestamp, seq) 이후부터 찾으므로 내보내는 중에 메시지가 추가되어도 이미 보낸
+        메시지가 다시 나오지 않는다.
+        """
+        last_key = None
+        while True:
+            await self._roundtrip()
+            rows = self._messages.get(user_id, [])
+            if last_key is not None:
+                start = bisect.bisect_left(rows, (last_key[0], last_key[1] + 1))
+            elif since:
+                start = bisect.bisect_left(rows, (since,))
+            else:
+                start = 0
+            batch = rows[start : start + batch_size]
+            for timestamp, seq, is_user, content in batch:
+                if until and timestamp >= until:
+                    return
+                yield {"timestamp": timestamp, "is_user": is_user, "content": content}
+                last_key = (timestamp, seq)
+            if len(batch) < batch_size:
+                return
+
+    async def get_message_count(self, user_id):
+        return len(self._messages.get(user_id, []))
+
+    async def ping(self):
+        return True
+
+    async def close(self):
+        pass
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+
+import uvicorn
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_openai
+
+logger = logging.getLogger(__name__)
+
+
+def configure_environment(args, work_dir):
+    """앱 모듈을 임포트하기 전에 가짜 OpenAI와 임시 저장 경로를 가리키도록 설정"""
+    os.environ["OPENAI_BASE_URL"] = f"http://{args.fake_host}:{args.fake_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    os.environ["VECTOR_STORE_PATH"] = os.path.join(work_dir, "vector_store")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(work_dir, "embedding_cache")
+
+
+async def serve(args):
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="serenity-bench-")
+    configure_environment(args, work_dir)
+
+    # 환경 변수 설정 후에 앱을 임포트해야 설정값이 반영됨
+    import app.main as app_main
+    from benchmarks.memory_history import InMemoryChatHistoryService
+
+    if not args.use_mongo:
+        app_main.ChatHistoryService = lambda: InMemoryChatHistoryService(
+            latency=args.mongo_latency
+        )
+
+    fake_server = uvicorn.Server(
+        uvicorn.Config(
+            fake_openai.create_app(fake_openai.settings_from_args(args)),
+            host=args.fake_host,
+            port=args.fake_port,
+            log_level="warning",
+        )
+    )
+    app_server = uvicorn.Server(
+        uvicorn.Config(
+            app_main.app, host=args.host, port=args.port, log_level=args.log_level
+        )
+    )
+    logger.info(
+        f"가짜 OpenAI: http://{args.fake_host}:{args.fake_port}, "
+        f"앱: http://{args.host}:{args.port}, 작업 디렉토리: {work_dir}"
+    )
+    await asyncio.gather(fake_server.serve(), app_server.serve())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="가짜 OpenAI와 인메모리 대화 기록으로 앱 실행 (부하 테스트용)"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fake-host", default="127.0.0.1")
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument(
+        "--work-dir", help="벡터 저장소/임베딩 캐시 경로 (기본: 임시 디렉토리)"
+    )
+    parser.add_argument(
+        "--use-mongo", action="store_true", help="인메모리 대신 설정된 MongoDB 사용"
+    )
+    parser.add_argument(
+        "--mongo-latency",
+        type=float,
+        default=0.002,
+        help="인메모리 저장소 작업당 지연(초)",
+    )
+    parser.add_argument("--log-level", default="warning")
+    fake_openai.add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args))
@@ -0,0 +1,302 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 합성 임베딩만 사용하므로 임베딩 디스크 캐시는 끔 (앱 설정을 임포트하기 전에 지정)
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from app.services.faiss_index import INDEX_TYPES, QUANTIZATIONS
+from app.services.vector_store import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+# VectorStoreService 마이크로벤치마크
+# 합성 임베딩으로 코퍼스 크기별 add_texts / search / save_local / load_local 비용과
+# 메모리 사용량, 디스크 크기를 측정해 JSON으로 기록한다 (API 호출 없음).
+
+
+class SyntheticEmbeddings(Embeddings):
+    """텍스트 해시로 시드를 정한 결정적 합성 임베딩"""
+
+    def __init__(self, dim: int = 1536):
+        self.dim = dim
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(
+            hashlib.sha256(text.encode("utf-8")).digest()[:8], "little"
+        )
+        vector = (
+            np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        )
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+def rss_bytes() -> int:
+    """현재 프로세스의 상주 메모리(RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # /proc이 없는 환경에서는 최대 RSS로 대체
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def total_memory_bytes() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError):
+        return 0
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(
+            ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3
+        )
+
+    return {
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+
+
+def new_service(store_path: str, args) -> VectorStoreService:
+    service = VectorStoreService(
+        vector_store_path=store_path,
+        use_mmap=args.mmap,
+        docstore_backend=args.docstore,
+        index_type=args.index_type,
+        quantization=args.quantization,
+        # 저장 비용은 save_local 단계에서 따로 측정하고, 합성 텍스트는 중복이 없음
+        persist_mode="full",
+        dedup=False,
+    )
+    service.embeddings = SyntheticEmbeddings(args.dim)
+    return service
+
+
+def populate(service: VectorStoreService, size: int, args, rng):
+    """합성 벡터를 배치 단위로 직접 적재 (임베딩/분할 과정 생략)"""
+    for start in range(0, size, args.batch_size):
+        count = min(args.batch_size, size - start)
+        vectors = rng.standard_normal((count, args.dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        texts = [f"synthetic message {start + i}" for i in range(count)]
+        metadatas = [
+            {"user_id": f"user-{(start + i) % args.users}"} for i in range(count)
+        ]
+        ids = [str(uuid.uuid4()) for _ in range(count)]
+        service.add_embeddings(texts, vectors.tolist(), metadatas, ids)
+
+
+def bench_scoped_search(service: VectorStoreService, queries: List[str], args) -> Dict:
+    """채팅 경로(사용자 지정 검색)의 ANN(IDSelector)과 brute-force 비교
+
+    같은 파티션을 두 방식으로 검색해 지연 시간과 brute-force 대비 recall@k를 기록한다.
+    """
+    partitions = service.partitions
+    index = service.vector_store.index
+    vectors = [
+        np.asarray(service.embeddings.embed_query(query), dtype=np.float32)
+        for query in queries
+    ]
+    ann_min_size = partitions.ann_min_size
+    result = {}
+    hits = {}
+    try:
+        for label, min_size in (("ann", 0), ("exact", sys.maxsize)):
+            partitions.ann_min_size = min_size
+            samples, hits[label] = [], []
+            for vector in vectors:
+                started = time.perf_counter()
+                found = partitions.search(index, vector, "user-0", args.k)
+                samples.append(time.perf_counter() - started)
+                hits[label].append({faiss_id for faiss_id, _ in found})
+            result[label] = latency_summary(samples)
+    finally:
+        partitions.ann_min_size = ann_min_size
+
+    matched = sum(len(a & e) for a, e in zip(hits["ann"], hits["exact"]))
+    expected = sum(len(e) for e in hits["exact"])
+    result["recall_at_k"] = round(matched / expected, 4) if expected else None
+    return result
+
+
+def bench_size(size: int, args, work_dir: str) -> Dict:
+    store_path = os.path.join(work_dir, f"store_{size}")
+    rng = np.random.default_rng(args.seed)
+    result = {"size": size}
+
+    estimated = size * args.dim * 4
+    available = total_memory_bytes()
+    if available and estimated > available * args.max_memory_ratio:
+        result["skipped"] = (
+            f"예상 인덱스 크기 {estimated / 2**30:.1f}GB가 "
+            f"메모리 {available / 2**30:.1f}GB의 {args.max_memory_ratio:.0%}를 초과"
+        )
+        logger.warning(f"{size}개 건너뜀: {result['skipped']}")
+        return result
+
+    service = new_service(store_path, args)
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    populate(service, size, args, rng)
+    populate_elapsed = time.perf_counter() - started
+    result["populate"] = {
+        "seconds": round(populate_elapsed, 3),
+        "vectors_per_sec": round(size / populate_elapsed, 1),
+    }
+    if args.index_type == "ivf" or args.quantization in ("sq8", "pq"):
+        # 학습이 필요한 인덱스는 Flat으로 적재한 뒤 학습해 재구성
+        started = time.perf_counter()
+        service.rebuild_index(nlist=args.nlist)
+        result["rebuild"] = {"seconds": round(time.perf_counter() - started, 3)}
+    result["memory"] = {"rss_delta_bytes": rss_bytes() - rss_before}
+    result["index"] = service.index_info()
+
+    # 한 턴(사용자 메시지 + 응답) 추가 비용
+    samples = []
+    for i in range(args.add_repeats):
+        user_id = f"user-{i % args.users}"
+        turn = [f"bench turn user {i}", f"bench turn assistant {i}"]
+        started = time.perf_counter()
+        service.add_texts(turn, user_id)
+        samples.append(time.perf_counter() - started)
+    result["add_texts"] = latency_summary(samples)
+
+    # 검색 (전역 / 사용자 필터)
+    queries = [f"bench query {i}" for i in range(args.queries)]
+    for label, user_id in (("search_global", None), ("search_user", "user-0")):
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            service.search(query, user_id=user_id, k=args.k, score_threshold=None)
+            samples.append(time.perf_counter() - started)
+        result[label] = latency_summary(samples)
+    result["user_partition_size"] = service.partitions.count("user-0")
+    if args.index_type != "flat":
+        result["search_user_scoped"] = bench_scoped_search(service, queries, args)
+
+    started = time.perf_counter()
+    service.save_local()
+    result["save_local"] = {"seconds": round(time.perf_counter() - started, 3)}
+    result["disk_bytes"] = dir_size(store_path)
+    service.close()
+    del service
+
+    rss_before = rss_bytes()
+    loaded = new_service(store_path, args)
+    started = time.perf_counter()
+    loaded.load_local()
+    result["load_local"] = {
+        "seconds": round(time.perf_counter() - started, 3),
+        "rss_delta_bytes": rss_bytes() - rss_before,
+    }
+    loaded.close()
+    del loaded
+
+    if not args.keep:
+        shutil.rmtree(store_path, ignore_errors=True)
+    logger.info(f"{size}개 완료: {json.dumps(result, ensure_ascii=False)}")
+    return result
+
+
+def main(args):
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="serenity-vs-bench-")
+    results = [bench_size(int(size), args, work_dir) for size in args.sizes.split(",")]
+    report = {
+        "commit": git_commit(),
+        "created_at": time.time(),
+        "config": {
+            "dim": args.dim,
+            "users": args.users,
+            "k": args.k,
+            "queries": args.queries,
+            "docstore": args.docstore,
+            "mmap": args.mmap,
+            "index_type": args.index_type,
+            "quantization": args.quantization,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+    if not args.keep and not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 저장소 마이크로벤치마크")
+    parser.add_argument(
+        "--sizes",
+        default="10000,100000,1000000,10000000",
+        help="쉼표로 구분한 코퍼스 크기 (메모리가 부족한 크기는 건너뜀)",
+    )
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--add-repeats", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--docstore", choices=["sqlite", "pickle"], default="sqlite")
+    parser.add_argument(
+        "--mmap", action="store_true", help="load_local을 mmap으로 측정"
+    )
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="none")
+    parser.add_argument("--nlist", type=int, default=1024, help="IVF 중심점 수")
+    parser.add_argument("--max-memory-ratio", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir")
+    parser.add_argument(
+        "--keep", action="store_true", help="생성한 저장소를 삭제하지 않음"
+    )
+    parser.add_argument("--output", default="vector_store_bench.json")
+    logging.basicConfig(level=logging.INFO)
+    main(parser.parse_args())
@@ -42,7 +42,14 @@ document.addEventListener('DOMContentLoaded', function() {
         let html = '';
         if (data.success) {
             html += `<p class="success">${data.message}</p>`;
-            
+            if (data.index) {
+                const params = Object.entries(data.index)
+                    .filter(([key]) => key !== 'type')
+                    .map(([key, value]) => `${key}=${value}`)
+                    .join(', ');
+                html += `<p><strong>인덱스:</strong> ${data.index.type} (${params})</p>`;
+            }
+
             if (data.results.length === 0) {
                 html += '<p>검색 결과가 없습니다.</p>';
             } else {
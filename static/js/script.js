@@ -46,125 +46,147 @@ document.addEventListener('DOMContentLoaded', function() {
         loadingElement.textContent = '...';
         messagesContainer.appendChild(loadingElement);
         
-        // 스트리밍 요청
-        fetch('/chat-stream', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                user_id: 'user_' + Date.now(),
-                message: message
-            })
-        }).then(response => {
-            // 로딩 표시 제거
-            messagesContainer.removeChild(loadingElement);
-            
-            // 새 메시지 요소 생성
-            const messageElement = document.createElement('div');
-            messageElement.classList.add('message', 'assistant');
-            messagesContainer.appendChild(messageElement);
-            
-            // 응답 텍스트를 저장할 변수
-            let fullResponse = '';
+        // 새 메시지 요소 (첫 응답 조각을 받으면 로딩 표시와 교체)
+        const messageElement = document.createElement('div');
+        messageElement.classList.add('message', 'assistant');
+        
+        // 응답 텍스트를 저장할 변수
+        let fullResponse = '';
+        let lastEventId = null;
+        let finished = false;
+        let resumeAttempts = 0;
+        
+        function showMessageElement() {
+            if (messagesContainer.contains(loadingElement)) {
+                messagesContainer.replaceChild(messageElement, loadingElement);
+            }
+        }
+        
+        function finishMessage() {
+            // 스트림 완료 시 전체 응답을 마크다운으로 변환
+            try {
+                if (typeof marked !== 'undefined') {
+                    messageElement.innerHTML = marked.parse(fullResponse);
+                } else {
+                    // 대체 방법: 간단한 마크다운 변환
+                    messageElement.innerHTML = simpleMarkdownToHtml(fullResponse);
+                }
+            } catch (e) {
+                console.error("마크다운 변환 오류:", e);
+                messageElement.textContent = fullResponse;
+            }
             
+            // 시간 추가
+            const timeElement = document.createElement('div');
+            timeElement.className = 'message-time';
+            const now = new Date();
+            timeElement.textContent = `${now.getHours()}:${now.getMinutes().toString().padStart(2, '0')}`;
+            messageElement.appendChild(timeElement);
+        }
+        
+        // SSE 프로토콜 v2 이벤트 처리 (meta → delta... → done / error)
+        function handleEvent(event, data) {
+            if (event === 'meta') {
+                console.log("스트림 시작:", data.stream_id, data.emotion_analysis);
+            } else if (event === 'delta') {
+                showMessageElement();
+                // 응답 텍스트 누적 (스트리밍 중에는 일반 텍스트로 표시)
+                fullResponse += data.t;
+                messageElement.textContent = fullResponse;
+            } else if (event === 'done') {
+                finished = true;
+                showMessageElement();
+                finishMessage();
+            } else if (event === 'error') {
+                finished = true;
+                showMessageElement();
+                messageElement.textContent = '오류가 발생했습니다: ' + data.error;
+            }
+        }
+        
+        // 빈 줄로 구분된 이벤트 블록 파싱 (읽기 단위가 이벤트 경계와 맞지 않을 수 있음)
+        function handleBlock(block) {
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('id: ')) {
+                    lastEventId = line.substring(4);
+                } else if (line.startsWith('event: ')) {
+                    event = line.substring(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.substring(6);
+                }
+            });
+            if (!data) return;
+            try {
+                handleEvent(event, JSON.parse(data));
+            } catch (e) {
+                console.error('JSON 파싱 오류:', e, block);
+            }
+        }
+        
+        function readStream(response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
+            let buffer = '';
             
-            function readStream() {
-                reader.read().then(({ done, value }) => {
+            function read() {
+                return reader.read().then(({ done, value }) => {
                     if (done) {
-                        console.log("스트림 완료, 최종 응답:", fullResponse);
-                        
-                        // 스트림이 완료되면 전체 응답을 마크다운으로 변환
-                        try {
-                            // marked 라이브러리가 있는지 확인
-                            if (typeof marked !== 'undefined') {
-                                console.log("marked 라이브러리 사용");
-                                messageElement.innerHTML = marked.parse(fullResponse);
-                            } else {
-                                console.error("marked 라이브러리를 찾을 수 없습니다");
-                                // 대체 방법: 간단한 마크다운 변환
-                                messageElement.innerHTML = simpleMarkdownToHtml(fullResponse);
-                            }
-                        } catch (e) {
-                            console.error("마크다운 변환 오류:", e);
-                            messageElement.textContent = fullResponse;
+                        if (!finished) {
+                            throw new Error('스트림이 완료되기 전에 연결이 끊겼습니다');
                         }
-                        
-                        // 시간 추가
-                        const timeElement = document.createElement('div');
-                        timeElement.className = 'message-time';
-                        const now = new Date();
-                        timeElement.textContent = `${now.getHours()}:${now.getMinutes().toString().padStart(2, '0')}`;
-                        messageElement.appendChild(timeElement);
-                        
                         return;
                     }
                     
-                    const text = decoder.decode(value);
-                    const lines = text.split('\n\n');
-                    
-                    lines.forEach(line => {
-                        if (line.startsWith('data: ')) {
-                            try {
-                                const data = JSON.parse(line.substring(6));
-                                
-                                if (data.error) {
-                                    messageElement.textContent = '오류가 발생했습니다: ' + data.error;
-                                } else if (data.chunk) {
-                                    // 응답 텍스트 누적
-                                    fullResponse += data.response;
-                                    
-                                    // 임시로 일반 텍스트로 표시 (스트리밍 중)
-                                    messageElement.textContent = fullResponse;
-                                } else if (data.done) {
-                                    console.log("done 신호 수신, 최종 응답:", fullResponse);
-                                    
-                                    // 스트림 완료 시 마크다운 변환
-                                    try {
-                                        if (typeof marked !== 'undefined') {
-                                            messageElement.innerHTML = marked.parse(fullResponse);
-                                        } else {
-                                            messageElement.innerHTML = simpleMarkdownToHtml(fullResponse);
-                                        }
-                                    } catch (e) {
-                                        console.error("마크다운 변환 오류:", e);
-                                        messageElement.textContent = fullResponse;
-                                    }
-                                    
-                                    // 시간 추가
-                                    const timeElement = document.createElement('div');
-                                    timeElement.className = 'message-time';
-                                    const now = new Date();
-                                    timeElement.textContent = `${now.getHours()}:${now.getMinutes().toString().padStart(2, '0')}`;
-                                    messageElement.appendChild(timeElement);
-                                }
-                            } catch (e) {
-                                console.error('JSON 파싱 오류:', e, line);
-                            }
-                        }
-                    });
+                    buffer += decoder.decode(value, { stream: true });
+                    const blocks = buffer.split('\n\n');
+                    buffer = blocks.pop();
+                    blocks.forEach(handleBlock);
                     
                     // 스크롤을 최신 메시지로 이동
                     messagesContainer.scrollTop = messagesContainer.scrollHeight;
                     
-                    readStream();
-                }).catch(error => {
-                    console.error('스트림 읽기 오류:', error);
-                    messageElement.textContent = '오류가 발생했습니다: ' + error.message;
+                    return read();
                 });
             }
             
-            readStream();
-        }).catch(error => {
+            return read();
+        }
+        
+        // 연결이 끊기면 마지막으로 받은 이벤트 이후부터 이어받기
+        function resumeOrFail(error) {
+            if (!finished && lastEventId && resumeAttempts < 3) {
+                resumeAttempts += 1;
+                console.warn('스트림 이어받기 시도:', lastEventId, error);
+                return fetch('/chat-stream/resume', {
+                    headers: { 'Last-Event-ID': lastEventId }
+                }).then(readStream).catch(resumeOrFail);
+            }
             console.error('Error:', error);
             // 로딩 표시 제거
             if (messagesContainer.contains(loadingElement)) {
                 messagesContainer.removeChild(loadingElement);
             }
-            addMessage('오류가 발생했습니다: ' + error.message, 'assistant');
-        });
+            if (!finished) {
+                addMessage('오류가 발생했습니다: ' + error.message, 'assistant');
+            }
+        }
+        
+        // 스트리밍 요청
+        fetch('/chat-stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                user_id: 'user_' + Date.now(),
+                message: message
+            })
+        }).then(readStream).catch(resumeOrFail);
     }
     
     // 간단한 마크다운 변환 함수 (marked 라이브러리가 없을 경우 대체용)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 테스트에서는 디스크 임베딩 캐시와 실제 API 키를 사용하지 않음
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+os.environ.setdefault("OPENAI_API_KEY", "")
+
+
+@pytest.fixture
+def vector_store_service(tmp_path):
+    """임시 디렉토리의 SQLite/증분 모드 벡터 저장소 (결정적 가짜 임베딩 사용)"""
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain_community")
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    from app.services.vector_store import VectorStoreService
+
+    service = VectorStoreService(
+        vector_store_path=str(tmp_path / "vector_store"),
+        persist_mode="incremental",
+        docstore_backend="sqlite",
+        dedup=False,
+    )
+    service.embeddings = DeterministicFakeEmbedding(size=8)
+    yield service
+    service.close()
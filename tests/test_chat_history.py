@@ -0,0 +1,103 @@
+import asyncio
+import datetime
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from bson import ObjectId
+
+from app.services.chat_history import ChatHistoryService, parse_history_cursor
+
+
+def _matches(doc, query):
+    """테스트에 필요한 만큼의 MongoDB 조건 평가 (같음, $lt, $or)"""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not doc[field] < condition["$lt"]:
+                return False
+        elif doc[field] != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None, sort=None, limit=0):
+        docs = [doc for doc in self.docs if _matches(doc, query)]
+        # (timestamp, _id) 역순 정렬만 사용
+        docs.sort(key=lambda doc: (doc["timestamp"], doc["_id"]), reverse=True)
+        return FakeCursor(docs[:limit] if limit else docs)
+
+
+def _service(docs):
+    service = ChatHistoryService.__new__(ChatHistoryService)
+    service.collection = FakeCollection(docs)
+    return service
+
+
+def test_keyset_pages_do_not_skip_or_repeat_messages_with_equal_timestamps():
+    same = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    docs = [
+        {
+            "_id": ObjectId(),
+            "user_id": "user-1",
+            # 한 번에 저장된 배치처럼 여러 메시지가 같은 timestamp를 가짐
+            "timestamp": same if i < 5 else same + datetime.timedelta(seconds=i),
+            "is_user": i % 2 == 0,
+            "content": f"메시지 {i}",
+        }
+        for i in range(8)
+    ]
+    docs.append({**docs[0], "_id": ObjectId(), "user_id": "user-2"})
+    service = _service(docs)
+
+    async def read_all():
+        pages, before = [], None
+        while True:
+            messages, before = await service.get_history_page(
+                "user-1", limit=3, before=before
+            )
+            pages.append([m.content for m in messages])
+            if before is None:
+                return pages
+
+    pages = asyncio.run(read_all())
+
+    assert pages == [
+        ["메시지 5", "메시지 6", "메시지 7"],
+        ["메시지 2", "메시지 3", "메시지 4"],
+        ["메시지 0", "메시지 1"],
+    ]
+
+
+def test_history_cursor_parsing():
+    object_id = ObjectId()
+    timestamp = datetime.datetime(2026, 1, 1, 12, 0, 0)
+
+    assert parse_history_cursor(f"{timestamp.isoformat()}_{object_id}") == {
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": object_id}},
+        ]
+    }
+    assert parse_history_cursor(timestamp.isoformat()) == {
+        "timestamp": {"$lt": timestamp}
+    }
+    with pytest.raises(ValueError):
+        parse_history_cursor(f"{timestamp.isoformat()}_not-an-id")
+    with pytest.raises(ValueError):
+        parse_history_cursor("어제")
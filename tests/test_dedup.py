@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from app.services.dedup import ContentHashIndex, content_hash
+
+
+def test_content_hash_ignores_whitespace_but_not_user():
+    assert content_hash("user-1", "오늘  너무\n피곤해") == content_hash(
+        "user-1", "오늘 너무 피곤해"
+    )
+    assert content_hash("user-1", "오늘 너무 피곤해") != content_hash(
+        "user-2", "오늘 너무 피곤해"
+    )
+
+
+def test_content_hash_index_is_scoped_per_user():
+    hashes = ContentHashIndex()
+    hashes.add("user-1", "같은 말")
+
+    assert hashes.contains("user-1", "같은 말")
+    assert not hashes.contains("user-2", "같은 말")
+
+
+def test_add_embeddings_skips_exact_duplicates_per_user(vector_store_service):
+    vector_store_service.dedup = True
+    vector = [0.1] * 8
+
+    skipped = vector_store_service.add_embeddings(
+        ["같은 말", "같은 말", "같은 말"],
+        [vector, vector, vector],
+        [{"user_id": "user-1"}, {"user_id": "user-1"}, {"user_id": "user-2"}],
+    )
+
+    assert skipped == {"exact": 1, "near": 0}
+    assert vector_store_service.vector_store.index.ntotal == 2
+
+
+def test_filter_known_drops_stored_and_repeated_texts_before_embedding(
+    vector_store_service,
+):
+    vector_store_service.dedup = True
+    assert vector_store_service.add_texts(["이미 저장된 말"], "user-1")
+
+    texts, user_ids = vector_store_service.filter_known(
+        ["이미 저장된 말", "새로운 말", "새로운 말", "이미 저장된 말"],
+        ["user-1", "user-1", "user-1", "user-2"],
+    )
+
+    assert texts == ["새로운 말", "이미 저장된 말"]
+    assert user_ids == ["user-1", "user-2"]
+
+
+def test_content_hashes_are_read_from_the_docstore_after_reload(vector_store_service):
+    vector_store_service.dedup = True
+    assert vector_store_service.add_texts(["다시 로드해도 중복"], "user-1")
+    assert vector_store_service.save_local()
+
+    assert vector_store_service.load_local()
+
+    assert vector_store_service.content_hashes.contains("user-1", "다시 로드해도 중복")
+    assert not vector_store_service.content_hashes.contains(
+        "user-2", "다시 로드해도 중복"
+    )
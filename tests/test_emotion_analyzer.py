@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("langchain_core")
+
+from app.core.config import EMOTION_LOCAL_CONFIDENCE
+from app.services import emotion_analyzer
+from app.services.emotion_analyzer import (analyze_emotion,
+                                           classify_emotion_locally)
+
+CRISIS_MESSAGES = [
+    "죽고 싶어",
+    "다 끝내고 싶다",
+    "엄마가 돌아가셨어",
+    "헤어졌어",
+]
+
+
+@pytest.mark.parametrize("message", CRISIS_MESSAGES)
+def test_crisis_messages_are_never_answered_locally(message):
+    result = classify_emotion_locally(message)
+
+    assert result["confidence"] < EMOTION_LOCAL_CONFIDENCE
+    assert result["risk"] is True
+
+
+def test_negated_positive_word_is_not_classified_as_joy_locally():
+    result = classify_emotion_locally("아무도 나를 안 좋아해")
+
+    assert result["confidence"] < EMOTION_LOCAL_CONFIDENCE
+
+
+@pytest.mark.parametrize("message", ["안녕하세요", "응", "고마워요!", "잘자요"])
+def test_whole_token_smalltalk_is_neutral_with_high_confidence(message):
+    result = classify_emotion_locally(message)
+
+    assert result["emotion"] == "중립"
+    assert result["confidence"] >= EMOTION_LOCAL_CONFIDENCE
+
+
+@pytest.mark.parametrize("message", ["네가 그랬잖아", "그래서 어떡해", "응급실 왔어"])
+def test_markers_inside_other_words_do_not_count_as_smalltalk(message):
+    result = classify_emotion_locally(message)
+
+    assert result["confidence"] < EMOTION_LOCAL_CONFIDENCE
+
+
+def test_short_messages_without_lexicon_go_to_llm(monkeypatch):
+    calls = []
+
+    async def fake_llm(message):
+        calls.append(message)
+        return {"emotion": "슬픔", "intensity": 8, "raw_analysis": "감정: 슬픔"}
+
+    monkeypatch.setattr(emotion_analyzer, "_analyze_emotion_with_llm", fake_llm)
+    emotion_analyzer.emotion_cache.clear()
+
+    result = asyncio.run(analyze_emotion("죽고 싶어"))
+
+    assert calls == ["죽고 싶어"]
+    assert result["tier"] == "llm"
+    assert result["risk"] is True
+
+
+def test_risk_messages_bypass_response_cache():
+    pytest.importorskip("numpy")
+    from app.services.response_cache import SemanticResponseCache
+
+    cache = SemanticResponseCache(enabled=True)
+    analysis = {"emotion": "중립", "intensity": 2, "risk": True}
+
+    assert cache.bucket("user-1", "헤어졌어", analysis) is None
+    assert cache.bucket("user-1", "안녕", {"emotion": "중립", "intensity": 2})
+
+
+def test_unavailable_gateway_falls_back_to_local_without_caching(monkeypatch):
+    monkeypatch.setattr(emotion_analyzer.openai_gateway, "api_key", "")
+    emotion_analyzer.emotion_cache.clear()
+
+    result = asyncio.run(analyze_emotion("죽고 싶어"))
+
+    assert result["tier"] == "local"
+    assert "error" in result
+    assert result["risk"] is True
+    assert emotion_analyzer.emotion_cache.get("죽고 싶어") is None
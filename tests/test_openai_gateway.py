@@ -0,0 +1,56 @@
+import asyncio
+
+from app.services.openai_gateway import OpenAIGateway
+
+
+def _slow_call(calls, result="결과"):
+    async def make_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return result
+
+    return make_call
+
+
+def test_followers_get_the_result_when_the_leader_is_cancelled():
+    gateway = OpenAIGateway(api_key="test")
+    calls = []
+
+    async def scenario():
+        make_call = _slow_call(calls)
+        leader = asyncio.ensure_future(gateway._coalesced("chat", "key", make_call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(gateway._coalesced("chat", "key", make_call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        return leader.cancelled(), await follower
+
+    leader_cancelled, result = asyncio.run(scenario())
+    assert leader_cancelled
+    assert result == "결과"
+    assert calls == [1]
+    assert gateway._limiter("chat").coalesced == 1
+    assert gateway._inflight == {}
+
+
+def test_shared_call_is_cancelled_when_every_waiter_is_gone():
+    gateway = OpenAIGateway(api_key="test")
+    calls = []
+
+    async def scenario():
+        waiters = [
+            asyncio.ensure_future(gateway._coalesced("chat", "key", _slow_call(calls)))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        task = gateway._inflight["key"]
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.gather(task, return_exceptions=True)
+        return task.cancelled()
+
+    assert asyncio.run(scenario())
+    assert gateway._inflight == {}
+    assert gateway._limiter("chat").in_flight == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+from app.models import Message
+from app.services.persistence_worker import ConversationTurn, PersistenceWorker
+
+
+class FakeChatHistory:
+    def __init__(self):
+        self.entries = []
+
+    async def add_messages(self, entries):
+        self.entries.extend(entries)
+        return True
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.texts = []
+        self.persisted = 0
+
+    def add_user_texts(self, texts, user_ids):
+        self.texts.extend(texts)
+        return True
+
+    def persist(self):
+        self.persisted += 1
+
+
+def _turn(user_id, text):
+    return ConversationTurn(
+        user_id,
+        Message(is_user=True, content=text),
+        Message(is_user=False, content=f"{text}에 대한 답"),
+    )
+
+
+def _worker(**kwargs):
+    kwargs.setdefault("batch_size", 10)
+    kwargs.setdefault("flush_interval", 0.01)
+    return PersistenceWorker(FakeChatHistory(), FakeVectorStore(), **kwargs)
+
+
+def test_indexing_waits_until_vector_store_is_loaded():
+    async def scenario():
+        worker = _worker()
+        worker.start()
+        await worker.enqueue(_turn("user-1", "안녕"))
+        await asyncio.sleep(0.1)
+        # 채팅 기록은 바로 저장되지만 벡터 색인은 로드 완료까지 대기
+        saved_before = len(worker.chat_history_svc.entries)
+        indexed_before = list(worker.vector_store_svc.texts)
+
+        worker.mark_vector_store_loaded()
+        await worker.stop(timeout=1)
+        return saved_before, indexed_before, worker.vector_store_svc.texts
+
+    saved_before, indexed_before, indexed_after = asyncio.run(scenario())
+    assert saved_before == 2
+    assert indexed_before == []
+    assert indexed_after == ["안녕", "안녕에 대한 답"]
+
+
+def test_pending_turns_are_flushed_in_batches_on_stop():
+    async def scenario():
+        worker = _worker(batch_size=2, flush_interval=60)
+        worker.mark_vector_store_loaded()
+        worker.start()
+        for i in range(5):
+            await worker.enqueue(_turn("user-1", f"메시지 {i}"))
+        await worker.stop(timeout=1)
+        return worker
+
+    worker = asyncio.run(scenario())
+    assert len(worker.chat_history_svc.entries) == 10
+    assert len(worker.vector_store_svc.texts) == 10
+    # 배치 크기 2로 나뉘어 세 번 저장
+    assert worker.vector_store_svc.persisted == 3
+
+
+def test_stop_returns_within_timeout_when_the_queue_is_full():
+    class StuckChatHistory(FakeChatHistory):
+        async def add_messages(self, entries):
+            await asyncio.Event().wait()
+
+    async def scenario():
+        worker = PersistenceWorker(
+            StuckChatHistory(), FakeVectorStore(), maxsize=1, flush_interval=0
+        )
+        worker.mark_vector_store_loaded()
+        worker.start()
+        await worker.enqueue(_turn("user-1", "처리 중"))
+        await asyncio.sleep(0.01)
+        await worker.enqueue(_turn("user-1", "대기 중"))
+        assert worker.queue.full()
+
+        started = asyncio.get_running_loop().time()
+        await asyncio.wait_for(worker.stop(timeout=0.1), timeout=1)
+        return asyncio.get_running_loop().time() - started, worker
+
+    elapsed, worker = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert worker._task is None
@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip("tiktoken")
+
+from app.models import Message
+from app.services.prompt_budget import (TOKENS_PER_MESSAGE, TOKENS_PER_REPLY,
+                                        TokenCounter, assemble_messages)
+
+
+@pytest.fixture
+def counter():
+    """글자 수를 토큰 수로 쓰는 계산기 (토크나이저 파일 없이 결정적으로 동작)"""
+    counter = TokenCounter(cache_size=100)
+    counter._encoding = False
+    return counter
+
+
+def _history(count):
+    return [
+        Message(is_user=i % 2 == 0, content=f"기록{i:02d}" * 5) for i in range(count)
+    ]
+
+
+def test_history_is_filled_newest_first_within_the_budget(counter):
+    system_prompt = "시스템 프롬프트"
+    history = _history(10)
+    per_message = len(history[0].content) + TOKENS_PER_MESSAGE
+    fixed = len(system_prompt) + len("안녕") + 2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+    budget = fixed + per_message * 3 + per_message // 2
+
+    messages, stats = assemble_messages(
+        system_prompt, "안녕", history=history, budget=budget, counter=counter
+    )
+
+    assert messages[0] == {"role": "system", "content": system_prompt}
+    assert messages[-1] == {"role": "user", "content": "안녕"}
+    # 가장 최근 3개만 원래 순서대로 포함
+    assert [m["content"] for m in messages[1:-1]] == [
+        msg.content for msg in history[-3:]
+    ]
+    assert [m["role"] for m in messages[1:-1]] == ["assistant", "user", "assistant"]
+    assert stats["history_included"] == 3
+    assert stats["history_dropped"] == 7
+    assert stats["prompt_tokens"] == fixed + per_message * 3 <= budget
+
+
+def test_system_prompt_and_message_are_kept_when_over_budget(counter):
+    system_prompt = "긴 시스템 프롬프트" * 10
+
+    messages, stats = assemble_messages(
+        system_prompt, "안녕", history=_history(4), budget=10, counter=counter
+    )
+
+    assert messages == [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": "안녕"},
+    ]
+    assert stats["history_dropped"] == 4
+    assert stats["prompt_tokens"] > stats["budget"]
+
+
+def test_context_is_truncated_to_its_allowance_before_history(counter):
+    messages, stats = assemble_messages(
+        "시스템",
+        "안녕",
+        history=_history(2),
+        context="가" * 100,
+        context_header="참고: ",
+        budget=1000,
+        max_context_tokens=20,
+        counter=counter,
+    )
+
+    assert messages[1] == {"role": "system", "content": "참고: " + "가" * 20}
+    assert stats["history_included"] == 2
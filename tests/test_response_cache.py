@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services import response_cache
+from app.services.response_cache import SemanticResponseCache
+
+NEUTRAL = {"emotion": "중립", "intensity": 2}
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("enabled", True)
+    kwargs.setdefault("threshold", 0.9)
+    return SemanticResponseCache(**kwargs)
+
+
+def _fill(cache, user_id, message, vector, response):
+    bucket = cache.bucket(user_id, message, NEUTRAL)
+    cache.store(vector, bucket, message, response)
+    return bucket
+
+
+def test_similar_query_hits_and_dissimilar_query_misses():
+    cache = _cache()
+    bucket = _fill(cache, "user-1", "안녕", [1.0, 0.0, 0.0], "안녕하세요!")
+
+    hit = cache.lookup([0.99, 0.05, 0.0], bucket)
+    assert hit["status"] == "hit"
+    assert hit["response"] == "안녕하세요!"
+    assert hit["similarity"] >= 0.9
+
+    assert cache.lookup([0.0, 1.0, 0.0], bucket) == {"status": "miss"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entry_misses_and_frees_its_slot(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = _cache(ttl=10)
+    bucket = _fill(cache, "user-1", "안녕", [1.0, 0.0], "안녕하세요!")
+
+    now[0] += 5
+    assert cache.lookup([1.0, 0.0], bucket)["status"] == "hit"
+
+    now[0] += 10
+    assert cache.lookup([1.0, 0.0], bucket) == {"status": "miss"}
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_and_its_slot_reused():
+    cache = _cache(maxsize=2)
+    bucket = _fill(cache, "user-1", "안녕", [1.0, 0.0, 0.0], "첫 번째")
+    _fill(cache, "user-1", "응", [0.0, 1.0, 0.0], "두 번째")
+
+    # 첫 항목을 사용해 최근 항목으로 만든 뒤 세 번째 항목 저장
+    assert cache.lookup([1.0, 0.0, 0.0], bucket)["status"] == "hit"
+    _fill(cache, "user-1", "고마워", [0.0, 0.0, 1.0], "세 번째")
+
+    assert cache.lookup([0.0, 1.0, 0.0], bucket) == {"status": "miss"}
+    assert cache.lookup([1.0, 0.0, 0.0], bucket)["response"] == "첫 번째"
+    assert cache.lookup([0.0, 0.0, 1.0], bucket)["response"] == "세 번째"
+    assert sorted(cache._entries) == [0, 1]
+
+
+def test_entries_are_isolated_per_user_bucket():
+    cache = _cache()
+    _fill(cache, "user-1", "안녕", [1.0, 0.0], "user-1의 응답")
+    other = cache.bucket("user-2", "안녕", NEUTRAL)
+
+    assert cache.lookup([1.0, 0.0], other) == {"status": "miss"}
+
+    shared = _cache(scope="global")
+    _fill(shared, "user-1", "안녕", [1.0, 0.0], "공유 응답")
+    bucket = shared.bucket("user-2", "안녕", NEUTRAL)
+    assert shared.lookup([1.0, 0.0], bucket)["response"] == "공유 응답"
+
+
+@pytest.mark.parametrize(
+    "analysis",
+    [
+        {"emotion": "중립", "intensity": 2, "risk": True},
+        {"emotion": "슬픔", "intensity": 2},
+        {"emotion": "중립", "intensity": 7},
+        {"emotion": "중립", "intensity": 2, "error": "분석 실패"},
+    ],
+)
+def test_risky_or_emotional_messages_are_never_cached(analysis):
+    cache = _cache()
+
+    bucket = cache.bucket("user-1", "안녕", analysis)
+    cache.store([1.0, 0.0], bucket, "안녕", "저장되면 안 됨")
+
+    assert bucket is None
+    assert cache.lookup([1.0, 0.0], bucket) == {"status": "skip"}
+    assert cache.stats()["size"] == 0
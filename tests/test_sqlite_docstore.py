@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document
+
+from app.services.dedup import content_hash
+from app.services.sqlite_docstore import SQLiteDocstore
+
+
+def _doc(text, user_id):
+    return Document(page_content=text, metadata={"user_id": user_id})
+
+
+def test_add_refuses_to_overwrite_rows_written_by_another_process(tmp_path):
+    path = str(tmp_path / SQLiteDocstore.FILE_NAME)
+    first, second = SQLiteDocstore(path), SQLiteDocstore(path)
+    try:
+        first.add({"a": _doc("user-1의 기록", "user-1")})
+
+        with pytest.raises(RuntimeError):
+            second.add({"b": _doc("user-2의 기록", "user-2")})
+
+        assert first.search_by_faiss_id(0).metadata["user_id"] == "user-1"
+        assert first.count() == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_rewind_deletes_only_for_the_writer(tmp_path):
+    path = str(tmp_path / SQLiteDocstore.FILE_NAME)
+    writer = SQLiteDocstore(path)
+    writer.add({"a": _doc("하나", "user-1"), "b": _doc("둘", "user-1")})
+
+    reader = SQLiteDocstore(path, read_only=True)
+    reader.rewind(1)
+    assert reader.size == 1
+    assert not reader.contains("b")
+    assert writer.count() == 2
+
+    writer.rewind(1)
+    assert writer.count() == 1
+    writer.add({"c": _doc("셋", "user-1")})
+    assert writer.doc_id_for(1) == "c"
+
+    with pytest.raises(RuntimeError):
+        reader.add({"d": _doc("넷", "user-1")})
+    writer.close()
+    reader.close()
+
+
+def test_content_hashes_are_stored_with_documents(tmp_path):
+    path = str(tmp_path / SQLiteDocstore.FILE_NAME)
+    writer = SQLiteDocstore(path)
+    writer.add({"a": _doc("같은 말", "user-1"), "b": _doc("다른 말", "user-1")})
+    writer.close()
+
+    reopened = SQLiteDocstore(path, read_only=True)
+    try:
+        assert reopened.contains_hash(content_hash("user-1", "같은  말"))
+        assert not reopened.contains_hash(content_hash("user-2", "같은 말"))
+        # 인덱스 스냅샷 밖의 행은 중복으로 보지 않음
+        reopened.rewind(1)
+        assert not reopened.contains_hash(content_hash("user-1", "다른 말"))
+    finally:
+        reopened.close()
+
+
+def test_legacy_file_gets_content_hash_column_backfilled_by_the_writer(tmp_path):
+    path = str(tmp_path / SQLiteDocstore.FILE_NAME)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE documents (faiss_id INTEGER PRIMARY KEY, "
+        "doc_id TEXT NOT NULL UNIQUE, user_id TEXT, content TEXT NOT NULL, "
+        "metadata TEXT NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO documents VALUES (0, 'a', 'user-1', '이전 문서', "
+        '\'{"user_id": "user-1"}\')'
+    )
+    conn.commit()
+    conn.close()
+
+    reader = SQLiteDocstore(path, read_only=True)
+    assert not reader.contains_hash(content_hash("user-1", "이전 문서"))
+
+    writer = SQLiteDocstore(path)
+    try:
+        assert writer.contains_hash(content_hash("user-1", "이전 문서"))
+        assert reader.contains_hash(content_hash("user-1", "이전 문서"))
+        assert writer.search("a").page_content == "이전 문서"
+    finally:
+        writer.close()
+        reader.close()
@@ -0,0 +1,137 @@
+import asyncio
+
+from app.services.sse import (SSEStreamRegistry, coalesce, format_event,
+                              parse_event_id)
+
+
+async def _disconnect_after(stream, events):
+    """events개의 이벤트를 받고 다음 이벤트를 기다리던 중 연결이 끊긴 것처럼 구독을 닫음"""
+    subscription = stream.subscribe()
+    for _ in range(events):
+        await subscription.__anext__()
+    waiting = asyncio.ensure_future(subscription.__anext__())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    await subscription.aclose()
+    await asyncio.sleep(0)
+
+
+def _start(registry):
+    stream = registry.create()
+    stream.producer = asyncio.get_running_loop().create_task(asyncio.sleep(60))
+    return stream
+
+
+def test_producer_cancelled_immediately_when_nothing_was_delivered():
+    async def scenario():
+        stream = _start(SSEStreamRegistry(grace=60))
+        await _disconnect_after(stream, 0)
+        return stream.producer.cancelled()
+
+    assert asyncio.run(scenario())
+
+
+def test_producer_kept_for_resume_after_events_were_delivered():
+    async def scenario():
+        stream = _start(SSEStreamRegistry(grace=60))
+        stream.emit("meta", {"v": 2})
+        await _disconnect_after(stream, 1)
+        kept = not stream.producer.done()
+        stream.producer.cancel()
+        return kept
+
+    assert asyncio.run(scenario())
+
+
+def test_producer_cancelled_immediately_without_grace():
+    async def scenario():
+        stream = _start(SSEStreamRegistry(grace=0))
+        stream.emit("meta", {"v": 2})
+        await _disconnect_after(stream, 1)
+        return stream.producer.cancelled()
+
+    assert asyncio.run(scenario())
+
+
+def test_evicted_stream_stops_its_producer():
+    async def scenario():
+        registry = SSEStreamRegistry(maxsize=1, grace=60)
+        stream = _start(registry)
+        registry.create()
+        await asyncio.sleep(0)
+        return stream.producer.cancelled()
+
+    assert asyncio.run(scenario())
+
+
+async def _pieces(*items):
+    """문자열은 바로 내보내고 숫자는 그만큼 멈추는 업스트림"""
+    for item in items:
+        if isinstance(item, str):
+            yield item
+        else:
+            await asyncio.sleep(item)
+
+
+async def _collect(iterator):
+    return [piece async for piece in iterator]
+
+
+def test_coalesce_sends_first_piece_immediately_and_flushes_on_interval():
+    pieces = _pieces("첫", "둘", "셋", 0.2, "넷")
+
+    result = asyncio.run(_collect(coalesce(pieces, interval=0.05, max_bytes=1024)))
+
+    # 업스트림이 멈춘 동안에도 간격이 지나면 모아 둔 조각을 전송
+    assert result == ["첫", "둘셋", "넷"]
+
+
+def test_coalesce_flushes_when_buffer_reaches_max_bytes():
+    pieces = _pieces("ab", "cd", "ef", "g")
+
+    result = asyncio.run(_collect(coalesce(pieces, interval=60, max_bytes=4)))
+
+    assert result == ["ab", "cdef", "g"]
+
+
+def test_events_are_formatted_with_sequential_ids():
+    assert format_event("s:0", "delta", {"t": "안녕"}) == (
+        'id: s:0\nevent: delta\ndata: {"t":"안녕"}\n\n'.encode("utf-8")
+    )
+
+    async def scenario():
+        stream = SSEStreamRegistry().create()
+        stream.emit("meta", {"v": 2})
+        stream.emit("delta", {"t": "안녕"})
+        stream.emit("done", {})
+        stream.emit("delta", {"t": "완료 후 무시"})
+        return stream
+
+    stream = asyncio.run(scenario())
+    ids = [event.split(b"\n", 1)[0] for event in stream.events]
+    assert ids == [f"id: {stream.stream_id}:{seq}".encode() for seq in range(3)]
+    assert parse_event_id(f"{stream.stream_id}:2") == (stream.stream_id, 2)
+    assert parse_event_id("잘못된-id") is None
+    assert parse_event_id(f"{stream.stream_id}:x") is None
+
+
+def test_resume_replays_events_after_last_event_id_and_follows_live_events():
+    async def scenario():
+        registry = SSEStreamRegistry(grace=60)
+        stream = _start(registry)
+        stream.emit("meta", {"v": 2})
+        stream.emit("delta", {"t": "안"})
+        stream.emit("delta", {"t": "녕"})
+
+        stream_id, seq = parse_event_id(f"{stream.stream_id}:0")
+        resumed = registry.get(stream_id).subscribe(after=seq)
+        received = [await resumed.__anext__(), await resumed.__anext__()]
+        stream.emit("done", {})
+        received += [event async for event in resumed]
+        stream.producer.cancel()
+        return stream, received
+
+    stream, received = asyncio.run(scenario())
+    assert received == stream.events[1:]
+    assert b"event: done" in received[-1]
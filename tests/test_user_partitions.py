@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from app.services.faiss_index import build_index, prepare_index
+from app.services.user_partitions import UserPartitionIndex
+
+
+def _ivf_index(vectors, nlist=8):
+    index = build_index("ivf", vectors.shape[1], nlist=nlist)
+    index.train(vectors)
+    index.add(vectors)
+    return prepare_index(index, nprobe=nlist)
+
+
+def test_exact_search_only_returns_the_users_vectors():
+    vectors = np.eye(4, dtype=np.float32)
+    index = build_index("flat", 4)
+    index.add(vectors)
+    partitions = UserPartitionIndex()
+    partitions.add("user-1", (1, 3))
+    partitions.add("user-2", (0, 2))
+
+    hits = partitions.search(index, vectors[0], "user-1", 2)
+
+    assert sorted(faiss_id for faiss_id, _ in hits) == [1, 3]
+    assert partitions.search(index, vectors[0], "user-3", 2) == []
+
+
+def test_exact_search_spans_blocks():
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((100, 8)).astype(np.float32)
+    index = build_index("flat", 8)
+    index.add(vectors)
+    partitions = UserPartitionIndex(block_size=7)
+    partitions.add("user-1", range(100))
+
+    hits = partitions.search(index, vectors[42], "user-1", 3)
+
+    assert hits[0] == (42, 0.0)
+    assert [score for _, score in hits] == sorted(score for _, score in hits)
+
+
+def test_user_scoped_search_uses_ann_index_with_id_selector():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 8)).astype(np.float32)
+    index = _ivf_index(vectors)
+
+    partitions = UserPartitionIndex(ann_min_size=1)
+    partitions.add("user-1", range(0, 2000, 2))
+    query = vectors[10]
+
+    calls = []
+    original = partitions._search_exact
+    partitions._search_exact = lambda *args: calls.append(args) or original(*args)
+    hits = partitions.search(index, query, "user-1", 5)
+
+    assert not calls
+    assert hits[0] == (10, 0.0)
+    assert all(faiss_id % 2 == 0 for faiss_id, _ in hits)
+
+    partitions.ann_min_size = 10**9
+    exact = partitions.search(index, query, "user-1", 5)
+    assert calls
+    assert [faiss_id for faiss_id, _ in exact] == [faiss_id for faiss_id, _ in hits]
+
+
+def test_small_partitions_fall_back_to_exact_search():
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((500, 8)).astype(np.float32)
+    index = _ivf_index(vectors)
+    partitions = UserPartitionIndex(ann_min_size=1000)
+    partitions.add("user-1", range(0, 500, 5))
+
+    calls = []
+    partitions._search_ann = lambda *args: calls.append(args)
+    hits = partitions.search(index, vectors[5], "user-1", 3)
+
+    assert not calls
+    assert hits[0] == (5, 0.0)
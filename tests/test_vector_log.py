@@ -0,0 +1,52 @@
+import os
+
+from app.services.vector_log import VectorLog
+
+
+def _records(log):
+    return [(doc_id, text, metadata) for doc_id, text, metadata, _ in log.replay()]
+
+
+def test_replay_returns_records_in_append_order(tmp_path):
+    log = VectorLog(str(tmp_path))
+    log.append("a", "첫 번째", {"user_id": "user-1"}, [0.5, 1.0])
+    log.append("b", "두 번째", {"user_id": "user-2"}, [1.5, 2.0])
+    log.close()
+
+    assert _records(log) == [
+        ("a", "첫 번째", {"user_id": "user-1"}),
+        ("b", "두 번째", {"user_id": "user-2"}),
+    ]
+    assert [embedding for *_, embedding in log.replay()] == [[0.5, 1.0], [1.5, 2.0]]
+
+
+def test_replay_drops_and_truncates_a_torn_last_record(tmp_path):
+    log = VectorLog(str(tmp_path))
+    log.append("a", "온전한 레코드", {}, [1.0])
+    log.append("b", "잘린 레코드", {}, [2.0])
+    log.close()
+    with open(log.path, "r+b") as f:
+        f.truncate(os.path.getsize(log.path) - 2)
+
+    assert _records(log) == [("a", "온전한 레코드", {})]
+    assert _records(log) == [("a", "온전한 레코드", {})]
+
+
+def test_flush_fsyncs_only_at_batch_size_unless_forced(tmp_path):
+    log = VectorLog(str(tmp_path), fsync_batch=2, fsync_interval=3600)
+    log.append("a", "하나", {}, [1.0])
+    assert not log.flush()
+    log.append("b", "둘", {}, [1.0])
+    assert log.flush()
+    log.append("c", "셋", {}, [1.0])
+    assert log.flush(force=True)
+    log.close()
+
+
+def test_reset_empties_the_log(tmp_path):
+    log = VectorLog(str(tmp_path))
+    log.append("a", "하나", {}, [1.0])
+    log.reset()
+
+    assert log.size() == 0
+    assert _records(log) == []
@@ -0,0 +1,194 @@
+import os
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from app.services.vector_log import VectorLog
+from app.services.vector_store import (SNAPSHOT_POINTER, SNAPSHOT_PREFIX,
+                                       VectorStoreService, snapshot_dir)
+
+
+def _reopen(service):
+    reopened = VectorStoreService(
+        vector_store_path=service.vector_store_path,
+        persist_mode=service.persist_mode,
+        docstore_backend="sqlite",
+        dedup=False,
+    )
+    reopened.embeddings = service.embeddings
+    return reopened
+
+
+def _pickle_service(store_path, embeddings):
+    service = VectorStoreService(
+        vector_store_path=store_path, docstore_backend="pickle", dedup=False
+    )
+    service.embeddings = embeddings
+    return service
+
+
+def _generations(store_path):
+    return sorted(
+        name for name in os.listdir(store_path) if name.startswith(SNAPSHOT_PREFIX)
+    )
+
+
+def test_persist_compacts_log_past_threshold(vector_store_service):
+    vector_store_service.snapshot_bytes = 1
+
+    assert vector_store_service.add_texts(
+        ["오늘 너무 피곤했어", "내일은 쉬고 싶어"], "user-1"
+    )
+    assert vector_store_service.log.size() > 0
+
+    assert vector_store_service.persist(force=True)
+
+    store_path = vector_store_service.vector_store_path
+    assert os.path.exists(os.path.join(store_path, "index.faiss"))
+    assert vector_store_service.log.size() == 0
+    assert os.path.getsize(os.path.join(store_path, VectorLog.FILE_NAME)) == 0
+
+
+def test_persist_keeps_log_below_threshold(vector_store_service):
+    vector_store_service.snapshot_bytes = 1 << 30
+
+    assert vector_store_service.add_texts(["안녕"], "user-1")
+    assert vector_store_service.persist(force=True)
+
+    assert vector_store_service.log.size() > 0
+    assert not os.path.exists(
+        os.path.join(vector_store_service.vector_store_path, "index.faiss")
+    )
+
+
+def test_restart_replays_log_records_written_after_the_snapshot(vector_store_service):
+    vector_store_service.snapshot_bytes = 1 << 30
+    assert vector_store_service.add_texts(["스냅샷에 포함"], "user-1")
+    assert vector_store_service.save_local()
+    assert vector_store_service.add_texts(["로그에만 기록"], "user-1")
+    vector_store_service.close()
+
+    restarted = _reopen(vector_store_service)
+    try:
+        assert restarted.load_local()
+        contents = {
+            doc.page_content
+            for doc in restarted.search(
+                "스냅샷", user_id="user-1", k=5, score_threshold=None
+            )
+        }
+        assert contents == {"스냅샷에 포함", "로그에만 기록"}
+    finally:
+        restarted.close()
+
+
+def test_add_before_load_keeps_persisted_documents(vector_store_service):
+    texts = [f"저장된 문장 {i}" for i in range(5)]
+    assert vector_store_service.add_texts(texts, "user-1")
+    assert vector_store_service.save_local()
+    vector_store_service.close()
+
+    restarted = _reopen(vector_store_service)
+    try:
+        # 워밍업(load_local)이 끝나기 전에 대화가 저장된 경우
+        assert restarted.add_texts(["로드 전에 들어온 문장"], "user-1")
+        assert restarted.load_local()
+
+        store = restarted.vector_store
+        contents = [
+            store.docstore.search(store.index_to_docstore_id[i]).page_content
+            for i in range(store.index.ntotal)
+        ]
+        assert contents == texts + ["로드 전에 들어온 문장"]
+    finally:
+        restarted.close()
+
+
+def test_failed_load_refuses_to_overwrite_existing_snapshot(vector_store_service):
+    assert vector_store_service.add_texts(["지켜야 할 문장"], "user-1")
+    assert vector_store_service.save_local()
+    vector_store_service.close()
+
+    restarted = _reopen(vector_store_service)
+    restarted.load_local = lambda path=None: False
+    try:
+        assert not restarted.add_texts(["덮어쓰면 안 됨"], "user-1")
+        docstore = restarted._open_sqlite_docstore(restarted.vector_store_path)
+        assert docstore.count() == 1
+        docstore.close()
+    finally:
+        restarted.close()
+
+
+def test_rejected_docstore_add_leaves_index_unchanged(vector_store_service):
+    assert vector_store_service.add_texts(["첫 문장"], "user-1")
+    assert vector_store_service.save_local()
+
+    other = _reopen(vector_store_service)
+    try:
+        assert other.load_local()
+        # 다른 프로세스가 같은 문서 저장소에 먼저 기록해 순번이 어긋난 상황
+        assert other.add_texts(["다른 프로세스의 문장"], "user-2")
+
+        ntotal = vector_store_service.vector_store.index.ntotal
+        assert not vector_store_service.add_texts(["거부되어야 할 문장"], "user-1")
+        assert vector_store_service.vector_store.index.ntotal == ntotal
+        assert len(vector_store_service.vector_store.index_to_docstore_id) == ntotal
+    finally:
+        other.close()
+
+
+def test_pickle_snapshot_switches_generations_through_one_pointer(
+    vector_store_service, tmp_path
+):
+    store_path = str(tmp_path / "pickle_store")
+    service = _pickle_service(store_path, vector_store_service.embeddings)
+    for text in ("첫 번째", "두 번째", "세 번째"):
+        assert service.add_texts([text], "user-1")
+        assert service.save_local()
+    service.close()
+
+    # 현재 세대와 직전 세대만 남고, 포인터가 가리키는 세대에 두 파일이 함께 있음
+    generations = _generations(store_path)
+    assert len(generations) == 2
+    current = snapshot_dir(store_path)
+    assert os.path.basename(current) == generations[-1]
+    assert sorted(os.listdir(current)) == ["index.faiss", "index.pkl"]
+    assert not os.path.exists(os.path.join(store_path, "index.pkl"))
+
+    # 포인터를 바꾸기 전에 중단된 세대는 로드에 영향을 주지 않음
+    os.makedirs(os.path.join(store_path, f"{SNAPSHOT_PREFIX}9999999999999999999"))
+    restarted = _pickle_service(store_path, vector_store_service.embeddings)
+    try:
+        assert restarted.resolve_backend() == "pickle"
+        assert restarted.load_local()
+        assert restarted.vector_store.index.ntotal == 3
+    finally:
+        restarted.close()
+
+
+def test_legacy_pickle_snapshot_is_loaded_and_replaced(vector_store_service, tmp_path):
+    store_path = str(tmp_path / "pickle_store")
+    legacy = _pickle_service(store_path, vector_store_service.embeddings)
+    assert legacy.add_texts(["이전 형식으로 저장된 문장"], "user-1")
+    # 이전 버전처럼 저장소 루트에 index.faiss/index.pkl을 직접 기록
+    legacy.vector_store.save_local(store_path)
+    legacy.log.reset()
+    legacy.close()
+
+    service = _pickle_service(store_path, vector_store_service.embeddings)
+    try:
+        assert service.load_local()
+        assert service.vector_store.index.ntotal == 1
+
+        assert service.add_texts(["새 형식으로 저장할 문장"], "user-1")
+        assert service.save_local()
+        assert os.path.exists(os.path.join(store_path, SNAPSHOT_POINTER))
+        # 루트 스냅샷은 직전 세대로 한 번 남겨 두고 다음 저장에서 삭제
+        assert os.path.exists(os.path.join(store_path, "index.pkl"))
+        assert service.save_local()
+        assert not os.path.exists(os.path.join(store_path, "index.pkl"))
+    finally:
+        service.close()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("fcntl")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.services.vector_log import VectorLog
+from app.services.vector_store import VectorStoreService
+from app.services.vector_store_registry import VectorStoreRegistry, writer_lock
+
+
+@pytest.fixture
+def registries(tmp_path):
+    """같은 저장소를 공유하는 두 워커의 레지스트리 (먼저 만든 쪽이 쓰기 워커)"""
+    store_path = str(tmp_path / "vector_store")
+    created = [VectorStoreRegistry(store_path, use_mmap=True) for _ in range(2)]
+    for registry in created:
+        service = registry.get()
+        service.embeddings = DeterministicFakeEmbedding(size=8)
+        service.snapshot_bytes = 1
+    yield created
+    for registry in reversed(created):
+        registry.close()
+
+
+def test_only_one_registry_writes_and_readers_hand_off_through_inbox(registries):
+    writer, reader = (registry.get() for registry in registries)
+    store_path = writer.vector_store_path
+    assert not writer.read_only and not writer.use_mmap
+    assert reader.read_only
+
+    assert reader.add_texts(["읽기 워커에서 들어온 문장"], "user-1")
+    assert reader.vector_store is None
+    assert not os.path.exists(os.path.join(store_path, VectorLog.FILE_NAME))
+
+    assert writer.drain_inbox() == 1
+    assert writer.vector_store.index.ntotal == 1
+    assert writer.inbox.take() == []
+
+    assert reader.reload_if_changed()
+    assert reader.vector_store.index.ntotal == 1
+
+
+def test_reader_is_promoted_when_the_writer_goes_away(registries):
+    writer_registry, reader_registry = registries
+    reader = reader_registry.get()
+    assert reader.add_texts(["쓰기 워커가 종료되기 전에 넘긴 문장"], "user-1")
+
+    # 종료하는 쓰기 워커가 남은 inbox를 반영하고 로그에 기록
+    writer_registry.close()
+
+    assert reader_registry._try_promote()
+    assert reader_registry.is_writer and not reader.use_mmap
+    assert reader.vector_store.index.ntotal == 1
+    assert reader.drain_inbox() == 0
+
+
+def test_maintenance_lock_is_refused_while_the_server_writes(registries):
+    writer_registry, _ = registries
+    store_path = writer_registry.vector_store_path
+
+    with writer_lock(store_path) as locked:
+        assert not locked
+
+    writer_registry.close()
+    with writer_lock(store_path) as locked:
+        assert locked
+
+
+def test_writer_reloads_snapshot_written_outside_the_process(tmp_path):
+    store_path = str(tmp_path / "vector_store")
+    registry = VectorStoreRegistry(store_path, reload_interval=0.01, poll_interval=0.01)
+    service = registry.get()
+    service.embeddings = DeterministicFakeEmbedding(size=8)
+    external = VectorStoreService(vector_store_path=store_path, dedup=False)
+    external.embeddings = service.embeddings
+
+    async def scenario():
+        registry.load()
+        registry.start_watching()
+        assert external.add_texts(["외부에서 저장한 문장"], "user-1")
+        assert external.save_local()
+        await asyncio.sleep(0.2)
+        await registry.stop_watching()
+
+    try:
+        asyncio.run(scenario())
+        assert registry.is_writer
+        assert service.vector_store.index.ntotal == 1
+    finally:
+        external.close()
+        registry.close()